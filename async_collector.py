@@ -0,0 +1,220 @@
+import asyncio
+import queue
+import threading
+import time
+import aiohttp
+from resilience import backoff_delay, is_retryable_status
+
+# =========================
+# CONFIGURATION
+# =========================
+OSRM_BASE_URL = "https://router.project-osrm.org/route/v1/driving/"
+MAX_IN_FLIGHT = 32  # Concurrent OSRM requests sharing one event loop
+REQUEST_TIMEOUT_SECONDS = 15  # Per-request timeout, same as the threaded collectors
+KEEPALIVE_SECONDS = 30  # How long idle pooled connections are kept open
+
+
+def build_route_url(origin_coords, destination_coords, base_url=OSRM_BASE_URL):
+    """Build the OSRM /route URL for a (lon, lat) coordinate pair"""
+    coords = f"{origin_coords[0]},{origin_coords[1]};{destination_coords[0]},{destination_coords[1]}"
+    return f"{base_url}{coords}?overview=false"
+
+
+async def request_route_info(session, url, timeout, bucket=None, limiter=None):
+    """
+    One OSRM attempt. Returns (route_info, retryable) where route_info is
+    (distance_m, duration_s) or None and retryable tells whether another
+    attempt could help (timeouts, connection errors, 429 and 5xx).
+    """
+    if bucket:
+        await bucket.acquire_async()
+    if limiter:
+        await limiter.acquire_async()
+
+    status_code = None
+    error = False
+    start = time.monotonic()
+    try:
+        request_timeout = aiohttp.ClientTimeout(total=timeout)
+        async with session.get(url, timeout=request_timeout) as response:
+            status_code = response.status
+            if response.status == 200:
+                data = await response.json(content_type=None)
+                if data.get('code') == 'Ok' and data.get('routes'):
+                    route = data['routes'][0]
+                    return (route['distance'], route['duration']), False
+                return None, False
+            return None, is_retryable_status(response.status)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        error = True
+        print("Error fetching route:", e)
+        return None, True
+    except ValueError as e:
+        print("Error fetching route:", e)
+        return None, False
+    finally:
+        if limiter:
+            limiter.release(time.monotonic() - start, status_code, error)
+
+
+async def fetch_route_info(session, semaphore, origin_coords, destination_coords,
+                           base_url=OSRM_BASE_URL, timeout=REQUEST_TIMEOUT_SECONDS,
+                           bucket=None, limiter=None, breaker=None, max_retries=0, observe=None):
+    """
+    Fetch (distance_m, duration_s) for one route over the pooled session.
+    bucket (rate_limiter.TokenBucket), limiter (AimdConcurrencyLimiter) and
+    breaker (resilience.CircuitBreaker) are optional and may be shared with
+    other collectors. Retryable failures are retried max_retries times with
+    jittered backoff. observe(seconds, route_info), if given, is called with
+    the lookup latency (retries included, semaphore wait excluded).
+    """
+    url = build_route_url(origin_coords, destination_coords, base_url)
+    route_info = None
+
+    async with semaphore:
+        start = time.monotonic()
+        for attempt in range(max_retries + 1):
+            if breaker and not breaker.allow_request():
+                break
+
+            route_info, retryable = await request_route_info(session, url, timeout, bucket, limiter)
+            if not retryable:
+                if breaker:
+                    breaker.record_success()
+                break
+
+            if breaker:
+                breaker.record_failure()
+            if attempt < max_retries:
+                await asyncio.sleep(backoff_delay(attempt))
+
+        if observe:
+            observe(time.monotonic() - start, route_info)
+
+    return route_info or (None, None)
+
+
+def route_observer(observe, route):
+    """Bind observe(route, seconds, route_info) to one route for fetch_route_info"""
+    if observe is None:
+        return None
+    return lambda seconds, route_info: observe(route, seconds, route_info)
+
+
+async def fetch_all_route_info(routes, max_in_flight=MAX_IN_FLIGHT,
+                               timeout=REQUEST_TIMEOUT_SECONDS, base_url=OSRM_BASE_URL,
+                               bucket=None, limiter=None, breaker=None, max_retries=0, observe=None):
+    """
+    Fetch route info for every entry of an ABUJA_ROUTES style list.
+    All requests share one keep-alive connection pool and at most
+    max_in_flight of them are outstanding at any time.
+    Returns a list of (route, (distance_m, duration_s)) in input order.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    connector = aiohttp.TCPConnector(
+        limit=max_in_flight,
+        ttl_dns_cache=300,
+        keepalive_timeout=KEEPALIVE_SECONDS
+    )
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [
+            fetch_route_info(session, semaphore, route[0], route[1], base_url, timeout,
+                             bucket, limiter, breaker, max_retries, route_observer(observe, route))
+            for route in routes
+        ]
+        results = await asyncio.gather(*tasks)
+
+    return list(zip(routes, results))
+
+
+def collect_route_info(routes, max_in_flight=MAX_IN_FLIGHT,
+                       timeout=REQUEST_TIMEOUT_SECONDS, base_url=OSRM_BASE_URL,
+                       bucket=None, limiter=None, breaker=None, max_retries=0, observe=None):
+    """Blocking entry point for the collectors - runs one sweep on a fresh event loop"""
+    return asyncio.run(fetch_all_route_info(routes, max_in_flight, timeout, base_url,
+                                            bucket, limiter, breaker, max_retries, observe))
+
+
+def iter_route_info(routes, max_in_flight=MAX_IN_FLIGHT,
+                    timeout=REQUEST_TIMEOUT_SECONDS, base_url=OSRM_BASE_URL,
+                    bucket=None, limiter=None, breaker=None, max_retries=0, max_queue=MAX_IN_FLIGHT,
+                    observe=None):
+    """
+    Streaming variant of collect_route_info: yields (route, (distance_m, duration_s))
+    as each request completes. The event loop runs on a helper thread and hands
+    results over through a bounded queue, so a slow consumer throttles fetching.
+    If the consumer stops early (break, close(), an exception), the outstanding
+    requests are cancelled and the session closed instead of blocking on the queue.
+    """
+    results = queue.Queue(maxsize=max_queue)
+    done = object()
+    stop = threading.Event()
+    running = {}  # 'loop' and 'task' of the helper thread, for cancelling from this side
+
+    def publish(item):
+        """Blocking put that gives up once the consumer has gone"""
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def fetch_and_publish():
+        loop = asyncio.get_running_loop()
+        running['loop'], running['task'] = loop, asyncio.current_task()
+        semaphore = asyncio.Semaphore(max_in_flight)
+        connector = aiohttp.TCPConnector(
+            limit=max_in_flight,
+            ttl_dns_cache=300,
+            keepalive_timeout=KEEPALIVE_SECONDS
+        )
+
+        async def fetch(route):
+            info = await fetch_route_info(session, semaphore, route[0], route[1], base_url, timeout,
+                                          bucket, limiter, breaker, max_retries,
+                                          route_observer(observe, route))
+            return route, info
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            tasks = [asyncio.ensure_future(fetch(route)) for route in routes]
+            try:
+                for next_result in asyncio.as_completed(tasks):
+                    item = await next_result
+                    # Blocking put off the loop thread keeps other requests moving
+                    if not await loop.run_in_executor(None, publish, item):
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run():
+        try:
+            asyncio.run(fetch_and_publish())
+            publish(done)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            publish(e)
+
+    thread = threading.Thread(target=run, name='async-collector', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        loop, task = running.get('loop'), running.get('task')
+        if loop is not None and not task.done():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # The loop already finished
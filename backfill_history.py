@@ -0,0 +1,185 @@
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    # pandas' writer is roughly 10x slower but produces the same CSV
+    pa = None
+
+from fake_osrm import fake_leg
+from route_cache import RouteInfoCache, ROUTE_CACHE_FILE
+from traffic_schema import TRAFFIC_COLUMNS
+from traffic_simulation import route_generator, simulate_batch, DRAWS_PER_SAMPLE
+
+# =========================
+# CONFIGURATION
+# =========================
+DEFAULT_OUTPUT = 'abuja_traffic_backfill.csv'
+DEFAULT_INTERVAL_MINUTES = 15
+DEFAULT_CHUNK_DAYS = 7  # Days simulated and written per chunk (bounds memory)
+EPOCH = datetime(1970, 1, 1)
+
+
+def load_routes():
+    """ABUJA_ROUTES from the collector (test.py has the full list)"""
+    from test import ABUJA_ROUTES
+    return ABUJA_ROUTES
+
+
+def base_route_info(routes, cache_file=ROUTE_CACHE_FILE):
+    """
+    (distance_km, base_duration_minutes) arrays for each route.
+    Uses the OSRM route cache where available and a straight-line
+    estimate for pairs that were never fetched, so no network is needed.
+    """
+    cache = RouteInfoCache(cache_file)
+    distance_km = np.empty(len(routes))
+    duration_min = np.empty(len(routes))
+    estimated = 0
+
+    for i, route in enumerate(routes):
+        cached = cache.get(route[0], route[1])
+        if cached:
+            distance_m, duration_s = cached[0], cached[1]
+        else:
+            distance_m, duration_s = fake_leg(route[0], route[1])
+            estimated += 1
+        distance_km[i] = distance_m / 1000
+        duration_min[i] = duration_s / 60
+
+    if estimated:
+        print(f"Estimated base distance/duration for {estimated} of {len(routes)} routes (not in {cache_file})")
+    return distance_km, duration_min
+
+
+def simulate_days(routes, distance_km, duration_min, first_day, n_days, interval_minutes, seed):
+    """
+    Simulate n_days of samples for every route as one DataFrame (time-major,
+    like a real collection run). Each (route, day) gets its own random
+    substream, so the output doesn't depend on the chunk size.
+    """
+    slots_per_day = (24 * 60) // interval_minutes
+    timestamps = pd.date_range(first_day, periods=n_days * slots_per_day, freq=f'{interval_minutes}min')
+    n_times = len(timestamps)
+    n_routes = len(routes)
+
+    uniforms = np.empty((n_routes, n_times, DRAWS_PER_SAMPLE))
+    first_day_number = (first_day - EPOCH).days
+    for r, route in enumerate(routes):
+        for d in range(n_days):
+            rng = route_generator(seed, route[2], first_day_number + d)
+            uniforms[r, d * slots_per_day:(d + 1) * slots_per_day] = rng.random((slots_per_day, DRAWS_PER_SAMPLE))
+    uniforms = uniforms.transpose(1, 0, 2).reshape(n_times * n_routes, DRAWS_PER_SAMPLE)
+
+    hours = np.repeat(timestamps.hour.to_numpy(), n_routes)
+    weekdays = np.repeat(timestamps.weekday.to_numpy(), n_routes)
+    base = np.tile(duration_min, n_times)
+    distance = np.tile(distance_km, n_times)
+
+    simulated = simulate_batch(hours, weekdays, base, distance, uniforms, profile='standard')
+
+    # Repeated strings as categoricals: codes are cheap to build and to write
+    time_codes = np.repeat(np.arange(n_times), n_routes)
+    route_codes = np.tile(np.arange(n_routes), n_times)
+
+    def repeated(values, codes):
+        categories, inverse = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+        return pd.Categorical.from_codes(inverse[codes], categories)
+
+    is_rush_hour = ((hours >= 7) & (hours <= 9)) | ((hours >= 17) & (hours <= 19))
+    df = pd.DataFrame({
+        'timestamp': repeated(timestamps.strftime('%Y-%m-%d %H:%M:%S'), time_codes),
+        'date': repeated(timestamps.strftime('%Y-%m-%d'), time_codes),
+        'time': repeated(timestamps.strftime('%H:%M:%S'), time_codes),
+        'day_of_week': repeated(timestamps.day_name(), time_codes),
+        'hour': hours,
+        'is_weekend': (weekdays >= 5).astype(np.int8),
+        'is_rush_hour': is_rush_hour.astype(np.int8),
+        'route_name': repeated([r[2] for r in routes], route_codes),
+        'origin': repeated([r[3] for r in routes], route_codes),
+        'destination': repeated([r[4] for r in routes], route_codes),
+        'distance_km': distance.round(2),
+        'duration_minutes': base.round(2),
+        'duration_in_traffic_minutes': simulated['duration_in_traffic_minutes'].round(2),
+        'delay_minutes': simulated['delay_minutes'].round(2),
+        'avg_speed_kmh': simulated['avg_speed_kmh'].round(2),
+        'traffic_status': simulated['traffic_status'],
+        'traffic_multiplier': simulated['traffic_multiplier'].round(2)
+    })
+    return df[TRAFFIC_COLUMNS]
+
+
+def write_chunk(df, output, write_header):
+    if pa is None:
+        df.to_csv(output, mode='w' if write_header else 'a', header=write_header, index=False)
+        return
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    options = pa_csv.WriteOptions(include_header=write_header, quoting_style='needed')
+    with open(output, 'wb' if write_header else 'ab') as f:
+        pa_csv.write_csv(table, f, write_options=options)
+
+
+def backfill(start, days, output, interval_minutes=DEFAULT_INTERVAL_MINUTES,
+             chunk_days=DEFAULT_CHUNK_DAYS, seed=0, append=False):
+    """Generate `days` days of history from `start` and write them chunk by chunk"""
+    routes = load_routes()
+    distance_km, duration_min = base_route_info(routes)
+
+    write_header = not (append and os.path.exists(output))
+    total_rows = 0
+    started = time.time()
+
+    for offset in range(0, days, chunk_days):
+        n_days = min(chunk_days, days - offset)
+        first_day = start + timedelta(days=offset)
+        df = simulate_days(routes, distance_km, duration_min, first_day, n_days, interval_minutes, seed)
+        write_chunk(df, output, write_header)
+        write_header = False
+        total_rows += len(df)
+        print(f"✓ {first_day:%Y-%m-%d} +{n_days}d: {len(df):,} rows "
+              f"({total_rows:,} total, {time.time() - started:.1f}s)")
+
+    return total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Abuja traffic history at scale")
+    parser.add_argument('--start', default=None, help="First day (YYYY-MM-DD), default: DAYS days before today")
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--interval-minutes', type=int, default=DEFAULT_INTERVAL_MINUTES)
+    parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--append', action='store_true', help="Append to OUTPUT instead of refusing to overwrite it")
+    args = parser.parse_args()
+
+    if args.start:
+        start = datetime.strptime(args.start, '%Y-%m-%d')
+    else:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=args.days)
+
+    if os.path.exists(args.output) and not args.append:
+        print(f"{args.output} already exists - pass --append or choose another --output")
+        return
+
+    print("=" * 80)
+    print(f"BACKFILLING {args.days} days from {start:%Y-%m-%d} every {args.interval_minutes} min -> {args.output}")
+    print("=" * 80)
+
+    started = time.time()
+    rows = backfill(start, args.days, args.output, args.interval_minutes, args.chunk_days, args.seed, args.append)
+    elapsed = time.time() - started
+    print(f"\n✓ Wrote {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
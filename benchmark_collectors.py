@@ -0,0 +1,161 @@
+import argparse
+import contextlib
+import importlib
+import io
+import time
+import tracemalloc
+
+import aiohttp
+import numpy as np
+import requests
+
+from fake_osrm import start_fake_osrm
+from rate_limiter import TokenBucket
+
+# =========================
+# CONFIGURATION
+# =========================
+# (label, module, COLLECTION_MODE) - modules without COLLECTION_MODE ignore it
+VARIANTS = [
+    ("test.py threads", "test", "threads"),
+    ("test.py async", "test", "async"),
+    ("test.py table", "test", "table"),
+    ("test2.py threads", "test2", "threads"),
+    ("test2.py async", "test2", "async"),
+    ("test2.py table", "test2", "table"),
+    ("main_test2.py threads", "main_test2", None),
+]
+DEFAULT_CYCLES = 3
+
+
+@contextlib.contextmanager
+def measure_request_latency(latencies):
+    """Time every OSRM HTTP request made through requests or aiohttp"""
+    original_request = requests.Session.request
+    original_aiohttp_request = aiohttp.ClientSession._request
+
+    def timed_request(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_request(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    async def timed_aiohttp_request(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await original_aiohttp_request(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    requests.Session.request = timed_request
+    aiohttp.ClientSession._request = timed_aiohttp_request
+    try:
+        yield latencies
+    finally:
+        requests.Session.request = original_request
+        aiohttp.ClientSession._request = original_aiohttp_request
+
+
+def configure_module(module, mode, base_url, routes, workers=None, max_in_flight=None, rate=None):
+    """Point a collector module at the fake server and apply the variant settings"""
+    module.OSRM_BASE_URL = f"{base_url}/route/v1/driving/"
+    if hasattr(module, 'OSRM_TABLE_URL'):
+        module.OSRM_TABLE_URL = f"{base_url}/table/v1/driving/"
+    if hasattr(module, 'USE_ROUTE_CACHE'):
+        # Measure OSRM round trips, not cache hits
+        module.USE_ROUTE_CACHE = False
+    if mode and hasattr(module, 'COLLECTION_MODE'):
+        module.COLLECTION_MODE = mode
+    if workers:
+        module.MAX_WORKERS = workers
+    if max_in_flight and hasattr(module, 'MAX_IN_FLIGHT'):
+        module.MAX_IN_FLIGHT = max_in_flight
+    if hasattr(module, 'rate_limiter'):
+        module.rate_limiter = TokenBucket(rate or 1e9, capacity=rate or 1e9)
+    if hasattr(module, 'osrm_breaker'):
+        module.osrm_breaker.record_success()
+    module.ABUJA_ROUTES = routes
+
+
+def run_cycle(module):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return module.collect_traffic_data()
+
+
+def benchmark_variant(module, cycles):
+    latencies = []
+    records = 0
+    elapsed = 0.0
+
+    with measure_request_latency(latencies):
+        for _ in range(cycles):
+            start = time.perf_counter()
+            records += len(run_cycle(module))
+            elapsed += time.perf_counter() - start
+
+    # Separate run for memory: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    run_cycle(module)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'routes_per_second': records / elapsed if elapsed > 0 else 0.0,
+        'cycle_seconds': elapsed / cycles,
+        'records': records // cycles,
+        'requests': len(latencies) // cycles,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'peak_memory_mb': peak / (1024 * 1024)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the traffic collectors against a local fake OSRM")
+    parser.add_argument('--cycles', type=int, default=DEFAULT_CYCLES, help="Collection sweeps per variant")
+    parser.add_argument('--scale', type=int, default=1, help="Repeat the route list this many times")
+    parser.add_argument('--workers', type=int, nargs='+', default=[None], help="MAX_WORKERS values to try")
+    parser.add_argument('--max-in-flight', type=int, default=None, help="MAX_IN_FLIGHT for async variants")
+    parser.add_argument('--rate', type=float, default=None, help="Token-bucket rate for test.py (default: unlimited)")
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--only', nargs='+', default=None, help="Run only variants whose label contains one of these")
+    args = parser.parse_args()
+
+    server = start_fake_osrm(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+
+    print("=" * 100)
+    print(f"COLLECTOR BENCHMARK - fake OSRM at {server.base_url} "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, error rate {args.error_rate})")
+    print("=" * 100)
+    print(f"{'Variant':<24}{'Workers':>8}{'Routes':>8}{'Req':>6}{'Cycle s':>9}"
+          f"{'Routes/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'Peak MB':>9}")
+
+    for label, module_name, mode in VARIANTS:
+        if args.only and not any(name in label for name in args.only):
+            continue
+        try:
+            # Collector modules only start their scheduler under __main__ or gunicorn, so this is inert
+            module = importlib.import_module(module_name)
+        except Exception as e:
+            print(f"{label:<24} skipped - import failed: {e}")
+            continue
+
+        routes = list(module.ABUJA_ROUTES) * args.scale
+        for workers in args.workers:
+            configure_module(module, mode, server.base_url, routes, workers, args.max_in_flight, args.rate)
+            result = benchmark_variant(module, args.cycles)
+            print(f"{label:<24}{module.MAX_WORKERS:>8}{result['records']:>8}{result['requests']:>6}"
+                  f"{result['cycle_seconds']:>9.2f}{result['routes_per_second']:>10.1f}"
+                  f"{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['peak_memory_mb']:>9.2f}")
+
+    print("=" * 100)
+    print(f"Fake OSRM served {server.request_count} requests")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from traffic_schema import read_csv_typed
+from traffic_store import CSV_FILENAME, read_traffic
+
+# =========================
+# CONFIGURATION
+# =========================
+STATISTICS_COLUMNS = ['timestamp', 'traffic_status', 'delay_minutes']
+DEFAULT_REPEATS = 3
+
+
+def load_train_untyped(path):
+    """What train_model.py did: infer every dtype, then parse the dates"""
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    return df
+
+
+def load_test2_untyped(path):
+    """What test2.py's generate_statistics did: three inferred columns, timestamps parsed after"""
+    df = pd.read_csv(path, usecols=STATISTICS_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    return df
+
+
+# (label, loader) - each one runs in a fresh interpreter so peak RSS is its own
+VARIANTS = [
+    ("train: read_csv", load_train_untyped),
+    ("train: read_traffic", lambda path: read_traffic(path)),
+    ("train: typed, pyarrow engine", lambda path: read_csv_typed(path, engine='pyarrow')),
+    ("test2 stats: read_csv", load_test2_untyped),
+    ("test2 stats: read_traffic", lambda path: read_traffic(path, columns=STATISTICS_COLUMNS)),
+]
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def run_variant(index, path, repeats):
+    """Child process: time the loader and report the frame size and peak RSS as JSON"""
+    label, loader = VARIANTS[index]
+    baseline = peak_rss_mb()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df = loader(path)
+        timings.append(time.perf_counter() - start)
+        if len(timings) < repeats:
+            del df
+    print(json.dumps({
+        'label': label,
+        'rows': len(df),
+        'parse_seconds': min(timings),
+        'frame_mb': df.memory_usage(deep=True).sum() / 1e6,
+        'peak_rss_mb': peak_rss_mb() - baseline
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare traffic data loading: inferred dtypes vs the compact schema")
+    parser.add_argument('--path', default=CSV_FILENAME, help="CSV file (or any store read_traffic accepts)")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help="Loads per variant (best time is kept)")
+    parser.add_argument('--variant', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant is not None:
+        run_variant(args.variant, args.path, args.repeats)
+        return
+    if not os.path.exists(args.path):
+        print(f"{args.path} not found")
+        return
+
+    print("=" * 80)
+    print(f"LOADING BENCHMARK - {args.path} ({os.path.getsize(args.path) / 1e6:.1f} MB)")
+    print("=" * 80)
+    print(f"{'Variant':<32}{'Rows':>10}{'Parse s':>10}{'Frame MB':>10}{'Peak RSS MB':>13}")
+
+    for index, (label, _) in enumerate(VARIANTS):
+        completed = subprocess.run(
+            [sys.executable, __file__, '--path', args.path, '--repeats', str(args.repeats), '--variant', str(index)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{label:<32} failed - {completed.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{label:<32}{result['rows']:>10,}{result['parse_seconds']:>10.2f}"
+              f"{result['frame_mb']:>10.1f}{result['peak_rss_mb']:>13.1f}")
+
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
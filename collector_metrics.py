@@ -0,0 +1,171 @@
+import bisect
+import threading
+import time
+
+# =========================
+# CONFIGURATION
+# =========================
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # Seconds, OSRM lookups
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 900.0)  # Seconds, whole runs
+WRITE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)  # Seconds, storage appends
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for labelled metrics; one lock per metric keeps the hot path short"""
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, *label_values):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return self.header() + [
+            f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.function = None
+
+    def set(self, value, *label_values):
+        with self.lock:
+            self.values[label_values] = value
+
+    def set_function(self, function):
+        """Read the value lazily at scrape time (e.g. a queue's qsize)"""
+        self.function = function
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        if self.function is not None:
+            items = [((), self.function())]
+        return self.header() + [
+            f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(label_values)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *label_values):
+        return Timer(self, label_values)
+
+    def render(self):
+        with self.lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self.values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Timer:
+    """with histogram.time(*labels): ... observes the elapsed seconds"""
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+
+
+class CollectorMetrics:
+    """The collector's metrics, rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.osrm_latency = Histogram(
+            'abuja_osrm_lookup_seconds', 'OSRM route lookup latency per route, retries included',
+            labels=('route',), buckets=LATENCY_BUCKETS)
+        self.osrm_lookups = Counter(
+            'abuja_osrm_lookups_total', 'OSRM route lookups by outcome', labels=('route', 'outcome'))
+        self.run_duration = Histogram(
+            'abuja_collection_run_seconds', 'Duration of a collection run (full cycle or staggered slot)',
+            labels=('kind',), buckets=DURATION_BUCKETS)
+        self.records_written = Counter(
+            'abuja_records_written_total', 'Traffic records appended to storage')
+        self.write_latency = Histogram(
+            'abuja_storage_write_seconds', 'Latency of one batch append to storage', buckets=WRITE_BUCKETS)
+        self.queue_depth = Gauge(
+            'abuja_writer_queue_depth', 'Records waiting in the streaming writer queue')
+        self.queue_depth.set(0)
+        self.metrics = [
+            self.osrm_latency, self.osrm_lookups, self.run_duration,
+            self.records_written, self.write_latency, self.queue_depth
+        ]
+
+    def observe_lookup(self, route_name, seconds, ok):
+        if seconds is not None:
+            self.osrm_latency.observe(seconds, route_name)
+        self.osrm_lookups.inc(1, route_name, 'success' if ok else 'failure')
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,155 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# =========================
+# CONFIGURATION
+# =========================
+DEFAULT_PORT = 5001
+DEFAULT_LATENCY_MS = 50  # Mean response delay per request
+DEFAULT_JITTER_MS = 20  # Uniform +/- jitter around the mean
+DEFAULT_ERROR_RATE = 0.0  # Fraction of requests answered with 503
+ROAD_FACTOR = 1.3  # Road distance / straight-line distance
+AVERAGE_SPEED_KMH = 40.0
+
+
+def haversine_m(a, b):
+    """Straight-line distance in metres between two (lon, lat) points"""
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(h))
+
+
+def fake_leg(a, b):
+    """Deterministic (distance_m, duration_s) for a coordinate pair"""
+    distance = haversine_m(a, b) * ROAD_FACTOR
+    duration = distance / (AVERAGE_SPEED_KMH / 3.6)
+    return round(distance, 1), round(duration, 1)
+
+
+def parse_coordinates(path_tail):
+    return [tuple(float(v) for v in pair.split(',')) for pair in path_tail.split(';') if pair]
+
+
+class FakeOsrmHandler(BaseHTTPRequestHandler):
+    """Serves /route/v1/driving/... and /table/v1/driving/... like OSRM"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so pooled clients behave as against the real server
+
+    def do_GET(self):
+        settings = self.server.settings
+        self.server.count_request()
+
+        delay_ms = settings['latency_ms'] + random.uniform(-settings['jitter_ms'], settings['jitter_ms'])
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        if random.random() < settings['error_rate']:
+            return self.send_json(503, {'code': 'Unavailable', 'message': 'Injected failure'})
+
+        # urlsplit, not urlparse: OSRM separates coordinates with ';'
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 4 or parts[1] != 'v1':
+            return self.send_json(404, {'code': 'InvalidUrl'})
+
+        try:
+            coordinates = parse_coordinates(parts[3])
+        except ValueError:
+            return self.send_json(400, {'code': 'InvalidQuery'})
+
+        if parts[0] == 'route' and len(coordinates) >= 2:
+            distance, duration = fake_leg(coordinates[0], coordinates[-1])
+            return self.send_json(200, {
+                'code': 'Ok',
+                'routes': [{'distance': distance, 'duration': duration, 'legs': []}],
+                'waypoints': []
+            })
+
+        if parts[0] == 'table' and coordinates:
+            query = parse_qs(url.query)
+            sources = [int(i) for i in query.get('sources', [''])[0].split(';') if i] or range(len(coordinates))
+            destinations = [int(i) for i in query.get('destinations', [''])[0].split(';') if i] or range(len(coordinates))
+            try:
+                legs = [[fake_leg(coordinates[s], coordinates[d]) for d in destinations] for s in sources]
+            except IndexError:
+                return self.send_json(400, {'code': 'InvalidQuery'})
+            return self.send_json(200, {
+                'code': 'Ok',
+                'distances': [[leg[0] for leg in row] for row in legs],
+                'durations': [[leg[1] for leg in row] for row in legs]
+            })
+
+        return self.send_json(400, {'code': 'InvalidQuery'})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate benchmark output
+        pass
+
+
+class FakeOsrmServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # The default backlog of 5 drops connects under concurrent load
+
+    def __init__(self, port=DEFAULT_PORT, latency_ms=DEFAULT_LATENCY_MS,
+                 jitter_ms=DEFAULT_JITTER_MS, error_rate=DEFAULT_ERROR_RATE, host='127.0.0.1'):
+        super().__init__((host, port), FakeOsrmHandler)
+        self.settings = {
+            'latency_ms': latency_ms,
+            'jitter_ms': jitter_ms,
+            'error_rate': error_rate
+        }
+        self.request_count = 0
+        self.count_lock = threading.Lock()
+
+    def count_request(self):
+        with self.count_lock:
+            self.request_count += 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fake_osrm(port=0, **settings):
+    """Start a fake OSRM server on a background thread (port 0 picks a free port)"""
+    server = FakeOsrmServer(port=port, **settings)
+    threading.Thread(target=server.serve_forever, name='fake-osrm', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for router.project-osrm.org")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS)
+    parser.add_argument('--jitter-ms', type=float, default=DEFAULT_JITTER_MS)
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_ERROR_RATE)
+    args = parser.parse_args()
+
+    server = FakeOsrmServer(args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Fake OSRM listening on {server.base_url} "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, error rate {args.error_rate})")
+    print(f"Point OSRM_BASE_URL at {server.base_url}/route/v1/driving/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nFake OSRM stopped")
+
+
+if __name__ == "__main__":
+    main()
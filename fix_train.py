@@ -8,11 +8,12 @@ from sklearn.preprocessing import LabelEncoder
 import joblib
 import os
 from datetime import datetime
+from retention import read_history
 
 print("🚗 FIXING MODEL TRAINING AND SAVING...")
 
 # Load the data
-df = pd.read_csv('abuja_traffic_data.csv')
+df = read_history('abuja_traffic_data.csv')
 print(f"✓ Loaded data: {len(df)} records")
 
 # Create basic features
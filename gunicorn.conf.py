@@ -0,0 +1,9 @@
+import importlib
+
+
+def post_worker_init(worker):
+    """Once a worker has loaded the app, join the collector election (test2.start_collector)"""
+    module = importlib.import_module(worker.app.app_uri.split(':')[0])
+    start_collector = getattr(module, 'start_collector', None)
+    if start_collector is not None:
+        start_collector()
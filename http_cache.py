@@ -0,0 +1,118 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import Response, make_response, request
+from werkzeug.http import is_resource_modified
+
+# =========================
+# CONFIGURATION
+# =========================
+HTTP_MAX_AGE_SECONDS = 15  # Clients may reuse a response this long before revalidating
+RESPONSE_CACHE_ENTRIES = 128  # Rendered responses kept per process (LRU)
+
+
+def data_version(summary):
+    """(ETag, Last-Modified) of a store from its manifest: the ingest counter plus row count and newest row"""
+    key = f"{summary.get('version', 0)}|{summary['rows']}|{summary['max_timestamp']}"
+    etag = hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+    last_modified = None
+    if summary.get('updated_at'):
+        # The manifest stamps local time
+        last_modified = datetime.strptime(summary['updated_at'], '%Y-%m-%d %H:%M:%S').astimezone(timezone.utc)
+    return etag, last_modified
+
+
+class VersionedResponses:
+    """
+    Conditional GET and a rendered-response cache for views whose output
+    only changes when new data is ingested. Each response carries the
+    data version as its ETag (plus Last-Modified and Cache-Control); a
+    client that already has that version gets a 304 without the view
+    running, and anyone else gets the rendered body from an LRU cache
+    keyed by URL and version, so polling between collections costs a
+    manifest lookup.
+    """
+
+    def __init__(self, version, max_entries=RESPONSE_CACHE_ENTRIES, max_age=HTTP_MAX_AGE_SECONDS):
+        self.version = version  # Callable returning (etag, last_modified)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def current(self, vary=None):
+        """(ETag, Last-Modified) for the data as it is now"""
+        etag, last_modified = self.version()
+        if vary is not None:
+            etag = f"{etag}-{vary()}"
+        return etag, last_modified
+
+    def headers(self, response, etag, last_modified, max_age):
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.must_revalidate = True
+        return response
+
+    def versioned(self, cache=True, max_age=None, vary=None):
+        """
+        Decorator for a Flask view. cache=False still answers conditional
+        requests but never keeps the body (large downloads); vary is an
+        optional callable whose value also changes the version (e.g. the
+        date, for a view filtered to today).
+        """
+        max_age = self.max_age if max_age is None else max_age
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                etag, last_modified = self.current(vary)
+                if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                    with self.lock:
+                        self.not_modified += 1
+                    return self.headers(Response(status=304), etag, last_modified, max_age)
+
+                key = (request.full_path, etag)
+                entry = self.get(key) if cache else None
+                if entry is not None:
+                    body, status, content_type = entry
+                    response = Response(body, status=status, content_type=content_type)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code not in (200, 206):
+                        return response
+                    if cache and response.status_code == 200 and not response.is_streamed:
+                        self.put(key, (response.get_data(), response.status_code, response.content_type))
+                return self.headers(response, etag, last_modified, max_age)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                    'not_modified': self.not_modified}
@@ -0,0 +1,242 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from store_lock import replace_file
+
+# =========================
+# CONFIGURATION
+# =========================
+DEDUP_WINDOW_HOURS = 48  # Keys this recent are checked exactly; older ones through the Bloom filter
+BLOOM_CAPACITY = 1000000  # Keys per Bloom generation (two generations are kept)
+BLOOM_ERROR_RATE = 0.001  # False-positive rate per generation at capacity
+BLOOM_SAVE_EVERY = 5000  # New keys between snapshots of the filter
+KEYS_SUFFIX = '.keys.npz'
+KEY_COLUMNS = ['timestamp', 'route_name']
+
+
+def record_keys(df):
+    """'YYYY-MM-DD HH:MM:SS|route name' for each row of a frame with timestamp/route_name"""
+    timestamps = pd.to_datetime(df['timestamp'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+    return (timestamps.fillna('') + '|' + df['route_name'].astype(str)).tolist()
+
+
+class RollingBloomFilter:
+    """
+    Bloom filter in two generations: once the current one holds `capacity`
+    keys it becomes the previous one and a fresh filter takes over, so
+    memory stays fixed and the oldest keys age out instead of the
+    false-positive rate creeping up.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.current = np.zeros((self.bits + 7) // 8, dtype=np.uint8)
+        self.previous = None
+        self.count = 0
+
+    def positions(self, keys):
+        """Bit positions, one row of `hashes` per key (double hashing of one blake2b digest)"""
+        digests = b''.join(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest() for key in keys)
+        halves = np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            combined = halves[:, :1] + steps * (halves[:, 1:] | np.uint64(1))
+        return combined % np.uint64(self.bits)
+
+    @staticmethod
+    def test(array, positions):
+        return ((array[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1).all(axis=1)
+
+    def contains_many(self, keys):
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions = self.positions(keys)
+        found = self.test(self.current, positions)
+        if self.previous is not None:
+            found |= self.test(self.previous, positions)
+        return found
+
+    def __contains__(self, key):
+        return bool(self.contains_many([key])[0])
+
+    def add_many(self, keys):
+        start = 0
+        while start < len(keys):
+            if self.count >= self.capacity:
+                self.previous, self.current = self.current, np.zeros_like(self.current)
+                self.count = 0
+            chunk = keys[start:start + self.capacity - self.count]
+            positions = self.positions(chunk).ravel()
+            np.bitwise_or.at(self.current, positions >> 3, np.left_shift(1, positions & 7).astype(np.uint8))
+            self.count += len(chunk)
+            start += len(chunk)
+
+    def memory_bytes(self):
+        return self.current.nbytes * (2 if self.previous is not None else 1)
+
+    def save(self, filename, rows):
+        """Snapshot both generations, noting how many store rows they cover"""
+        previous = self.previous if self.previous is not None else np.zeros(0, dtype=np.uint8)
+        meta = np.array([self.bits, self.hashes, self.count, rows], dtype=np.int64)
+        replace_file(filename, lambda path: np.savez(path, current=self.current, previous=previous, meta=meta),
+                     suffix='.npz')
+
+    def load(self, filename):
+        """Restore a snapshot made with the same sizing; returns the rows it covers, or None"""
+        try:
+            with np.load(filename) as saved:
+                bits, hashes, count, rows = (int(v) for v in saved['meta'])
+                if (bits, hashes) != (self.bits, self.hashes):
+                    return None
+                self.current = saved['current'].copy()
+                self.previous = saved['previous'].copy() if saved['previous'].size else None
+                self.count = count
+                return rows
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+class DedupIndex:
+    """
+    Keys of records already in a store, for dropping duplicate
+    (timestamp, route_name) rows at write time. Keys within window_hours
+    of the newest record are held exactly; every key also goes into a
+    rolling Bloom filter, which answers for late records older than the
+    window (a false positive there drops a genuinely new late record with
+    probability ~BLOOM_ERROR_RATE). The filter is snapshotted next to the
+    store, so a restarted process only reads the rows appended since the
+    snapshot; appends from other processes are picked up the same way.
+    Only a store without a snapshot has its keys scanned, once.
+    """
+
+    def __init__(self, filename=None, window_hours=DEDUP_WINDOW_HOURS,
+                 capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.filename = filename
+        self.window = pd.Timedelta(hours=window_hours)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.reset()
+
+    def reset(self):
+        self.recent = OrderedDict()  # key -> timestamp text, roughly in arrival order
+        self.bloom = RollingBloomFilter(self.capacity, self.error_rate)
+        self.newest = None
+        self.rows_seen = None
+        self.unsaved = 0
+
+    def remember(self, keys):
+        """Add keys to the exact window (the Bloom filter is fed separately)"""
+        for key in keys:
+            self.recent[key] = key[:19]
+            if self.newest is None or key[:19] > self.newest:
+                self.newest = key[:19]
+        cutoff = self.cutoff()
+        while self.recent:
+            key, timestamp = next(iter(self.recent.items()))
+            if timestamp >= cutoff:
+                break
+            self.recent.popitem(last=False)
+
+    def add_keys(self, keys):
+        self.remember(keys)
+        self.bloom.add_many(keys)
+        self.unsaved += len(keys)
+
+    def cutoff(self):
+        """Oldest timestamp text still inside the exact window"""
+        if self.newest is None:
+            return ''
+        return (pd.Timestamp(self.newest) - self.window).strftime('%Y-%m-%d %H:%M:%S')
+
+    def bootstrap(self, store, rows):
+        """Load the snapshot (or scan the keys once), catch up with the store, fill the exact window"""
+        self.reset()
+        covered = self.bloom.load(self.filename) if self.filename else None
+        if covered is None or covered > rows:
+            self.bloom = RollingBloomFilter(self.capacity, self.error_rate)
+            self.bloom.add_many(record_keys(store.read(columns=KEY_COLUMNS)))
+            self.save(rows)
+        elif covered < rows:
+            self.bloom.add_many(record_keys(store.appended(rows - covered, columns=KEY_COLUMNS)))
+            self.unsaved = rows - covered
+
+        newest = store.summary()['max_timestamp']
+        if newest is not None:
+            since = pd.Timestamp(newest) - self.window
+            self.remember(record_keys(store.tail(since=since, columns=KEY_COLUMNS)))
+
+    def sync(self, store):
+        """Catch up with rows other writers appended (call with the store's write lock held)"""
+        rows = store.summary()['rows']
+        if self.rows_seen is None or rows < self.rows_seen:
+            # First use, or the store was replaced
+            self.bootstrap(store, rows)
+        elif rows > self.rows_seen:
+            self.add_keys(record_keys(store.appended(rows - self.rows_seen, columns=KEY_COLUMNS)))
+        self.rows_seen = rows
+
+    def admit(self, df, store):
+        """
+        The rows of a normalized batch that aren't already in the store (or
+        repeated within the batch). Call with the store's write lock held,
+        then committed() once the rows are written.
+        """
+        with self.lock:
+            self.sync(store)
+            keys = record_keys(df)
+            cutoff = self.cutoff()
+            older = [key for key in keys if key[:19] < cutoff]
+            in_bloom = dict(zip(older, self.bloom.contains_many(older)))
+            fresh, seen = [], set()
+            for key in keys:
+                duplicate = key in seen or key in self.recent or in_bloom.get(key, False)
+                fresh.append(not duplicate)
+                seen.add(key)
+            dropped = len(keys) - sum(fresh)
+            if dropped:
+                self.dropped += dropped
+                print(f"✓ Dropped {dropped} duplicate (timestamp, route_name) records")
+            return df[fresh]
+
+    def committed(self, df):
+        """Record the keys of a batch that was just written"""
+        with self.lock:
+            self.add_keys(record_keys(df))
+            if self.rows_seen is not None:
+                self.rows_seen += len(df)
+            if self.unsaved >= BLOOM_SAVE_EVERY:
+                self.save(self.rows_seen)
+
+    def shrink(self, store, drop):
+        """
+        Run drop(), which removes old rows from the store (they moved to
+        another tier) and returns the rows left. The filter is brought up to
+        date first and kept, so those keys still can't come back; it is then
+        snapshotted against the new row count. Call with the store's write
+        lock held.
+        """
+        with self.lock:
+            self.sync(store)
+            rows = drop()
+            self.rows_seen = rows
+            self.save(rows)
+        return rows
+
+    def save(self, rows):
+        if self.filename and rows:
+            self.bloom.save(self.filename, rows)
+            self.unsaved = 0
+
+    def stats(self):
+        with self.lock:
+            return {'recent_keys': len(self.recent), 'bloom_keys': self.bloom.count,
+                    'bloom_bytes': self.bloom.memory_bytes(), 'dropped': self.dropped}
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from store_snapshot import StoreSnapshot
+
+# =========================
+# CONFIGURATION
+# =========================
+LATEST_SUFFIX = '.latest.json'
+
+
+def latest_records(df):
+    """{route_name: record dict} of the newest row per route in a batch, JSON-ready"""
+    df = df.dropna(subset=['timestamp', 'route_name']).copy()
+    if len(df) == 0:
+        return {}
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values('timestamp', kind='stable').drop_duplicates(subset=['route_name'], keep='last')
+    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    df = df.astype(object).where(df.notna(), None)
+    return {str(record['route_name']): record for record in df.to_dict(orient='records')}
+
+
+class LatestState(StoreSnapshot):
+    """
+    The most recent record of every route (a StoreSnapshot), so the live
+    views render from ~40 records whatever the size of the history.
+    """
+
+    def empty(self):
+        return {'rows': 0, 'routes': {}}
+
+    def fold(self, state, df):
+        routes = dict(state['routes'])
+        for route_name, record in latest_records(df).items():
+            current = routes.get(route_name)
+            if current is None or record['timestamp'] >= current['timestamp']:
+                routes[route_name] = record
+        return dict(state, routes=routes)
+
+    def rebuild(self, store):
+        from traffic_store import latest_per_route  # traffic_store imports this module
+        return self.fold(self.empty(), latest_per_route(store))
+
+    def records(self, store, columns=None, start=None, route_names=None):
+        """Latest record per route, newest first, optionally only routes seen since start"""
+        routes = self.current(store)['routes']
+        since = pd.Timestamp(start).strftime('%Y-%m-%d %H:%M:%S') if start is not None else ''
+        records = [
+            record for name, record in routes.items()
+            if (route_names is None or name in route_names) and record['timestamp'] >= since
+        ]
+        records.sort(key=lambda record: record['timestamp'], reverse=True)
+        if columns:
+            records = [{column: record.get(column) for column in columns} for record in records]
+        return records
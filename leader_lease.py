@@ -0,0 +1,93 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): there is no multi-worker gunicorn there either
+    fcntl = None
+
+# =========================
+# CONFIGURATION
+# =========================
+LEASE_FILE = 'collector.lease'
+LEASE_RETRY_SECONDS = 10  # How often followers try to take over
+
+
+class LeaderLease:
+    """
+    Host-wide leader election through an exclusive flock on LEASE_FILE.
+    The lock lives as long as the holding process keeps the file open, so
+    the kernel releases it the moment the leader exits or crashes - there
+    is no expiry to tune. Followers retry every retry_seconds and the first
+    to get the lock becomes the new leader and runs on_elected().
+    """
+
+    def __init__(self, filename=LEASE_FILE, retry_seconds=LEASE_RETRY_SECONDS):
+        self.filename = filename
+        self.retry_seconds = retry_seconds
+        self.handle = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @property
+    def is_leader(self):
+        return self.handle is not None
+
+    def try_acquire(self):
+        """Take the lease if nobody holds it; returns True if this process is leader"""
+        if self.handle is not None:
+            return True
+        if fcntl is None:
+            self.handle = True
+            return True
+
+        handle = open(self.filename, 'a+')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+
+        # Record the holder for anyone inspecting the file
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()}\n")
+        handle.flush()
+        self.handle = handle
+        return True
+
+    def release(self):
+        self.stopped.set()
+        if self.handle is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            self.handle.close()
+        self.handle = None
+
+    def holder_pid(self):
+        try:
+            with open(self.filename, 'r') as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    def run_when_elected(self, on_elected):
+        """Call on_elected() once this process wins the lease (now or after a failover)"""
+        def elected():
+            print(f"✓ Process {os.getpid()} is the collection leader ({self.filename})")
+            on_elected()
+
+        def campaign():
+            while not self.stopped.wait(self.retry_seconds):
+                if self.try_acquire():
+                    elected()
+                    return
+
+        if self.try_acquire():
+            elected()
+            return
+        print(f"Process {os.getpid()} is a follower; leader is pid {self.holder_pid()}")
+        self.thread = threading.Thread(target=campaign, name='leader-lease', daemon=True)
+        self.thread.start()
@@ -1,5 +1,5 @@
 
-from flask import Flask, jsonify, send_file, render_template
+from flask import Flask, jsonify, request, send_file, render_template
 
 import requests
 import pandas as pd
@@ -8,8 +8,9 @@ import time
 import os
 import random
 import concurrent.futures
-from threading import Lock
 import math
+from http_cache import VersionedResponses, data_version
+from traffic_store import CsvTrafficStore, read_tail
 
 # =========================
 # FLASK APP
@@ -20,11 +21,14 @@ app = Flask(__name__)
 # ORIGINAL CONFIGURATION
 # =========================
 CSV_FILENAME = 'abuja_traffic_data.csv'
+RECENT_RECORDS = 100  # Rows shown on /data
 MAX_WORKERS = 5
 BATCH_SIZE = 20
 OSRM_BASE_URL = "https://router.project-osrm.org/route/v1/driving/"
 
-file_lock = Lock()
+csv_store = CsvTrafficStore(CSV_FILENAME)  # Same file, layout and lock as test.py/test2.py
+file_lock = csv_store.lock  # Shared with every process appending to the CSV
+http_cache = VersionedResponses(lambda: data_version(csv_store.summary()))  # 304s and cached pages between appends
 
 
 # =========================
@@ -176,8 +180,10 @@ ABUJA_ROUTES = [
     ([7.4422, 9.0704], [7.4490, 9.0850], "Utako to Wuye", "Utako", "Wuye"),
 ]
 @app.route("/report")
+@http_cache.versioned()
 def report():
-    stats = generate_statistics()
+    # ?route=<name> or ?day=YYYY-MM-DD narrows the report to one route or day
+    stats = generate_statistics(route=request.args.get('route'), day=request.args.get('day'))
 
     if not stats:
         return "No data available yet."
@@ -192,21 +198,12 @@ def report():
 # =========================
 # ORIGINAL FUNCTIONS
 # =========================
-def generate_statistics():
+def generate_statistics(route=None, day=None):
     if not os.path.exists(CSV_FILENAME):
         return None
 
-    df = pd.read_csv("C:\\Users\\USER\\OneDrive\\Documents\\traffic model\\abuja_traffic_data.csv")
-
-    stats = {
-        "total_records": len(df),
-        "date_range": f"{df['date'].min()} to {df['date'].max()}",
-        "unique_routes": df['route_name'].nunique(),
-        "traffic_distribution": df['traffic_status'].value_counts().to_dict(),
-        "avg_delay_by_hour": df.groupby('hour')['delay_minutes'].mean().round(2).to_dict()
-    }
-
-    return stats
+    # Running aggregates updated by save_to_csv (and caught up from the CSV's tail if behind)
+    return csv_store.aggregates.statistics(csv_store, route=route, day=day)
 
 def get_route_info(origin_coords, destination_coords):
     coords = f"{origin_coords[0]},{origin_coords[1]};{destination_coords[0]},{destination_coords[1]}"
@@ -295,15 +292,9 @@ def save_to_csv(data_records):
     if not data_records:
         return 0
 
-    df = pd.DataFrame(data_records)
-
-    with file_lock:
-        if os.path.exists(CSV_FILENAME):
-            df.to_csv(CSV_FILENAME, mode='a', header=False, index=False)
-        else:
-            df.to_csv(CSV_FILENAME, index=False)
-
-    return len(data_records)
+    # The store brings the batch to the shared 17-column layout, drops rows already in the CSV
+    # (e.g. from a parallel /collect) and appends in one O_APPEND write under the file lock
+    return csv_store.append(data_records)
 
 # =========================
 # FLASK ENDPOINTS
@@ -328,13 +319,21 @@ def collect():
     })
 
 
-@app.route("/data", methods=["GET"])
+@app.route("/data")
+@http_cache.versioned()
 def data():
     if not os.path.exists(CSV_FILENAME):
-        return jsonify({"message": "No data collected yet"}), 404
+        return "No traffic data available yet."
+
+    # Show recent records only (cleaner) - read backwards from the end of the file
+    df = read_tail(CSV_FILENAME, n=RECENT_RECORDS)
+
+    return render_template(
+        "data.html",
+        tables=[df.to_html(classes="table", index=False)],
+        total_records=len(df)
+    )
 
-    df = pd.read_csv(CSV_FILENAME)
-    
 
 
 @app.route("/routes", methods=["GET"])
@@ -349,168 +348,7 @@ def routes():
 
 
 @app.route("/download", methods=["GET"])
-def download():
-    if not os.path.exists(CSV_FILENAME):
-        return jsonify({"message": "CSV file not found"}), 404
-
-    return send_file(CSV_FILENAME, as_attachment=True)
-
-# =========================
-# RUN FLASK SERVER
-# =========================
-if __name__ == "__main__":
- app.run(debug=True)
-
-# 🔹 You can paste back ALL your routes here without issues
-
-# =========================
-# ORIGINAL FUNCTIONS
-# =========================
-def get_route_info(origin_coords, destination_coords):
-    coords = f"{origin_coords[0]},{origin_coords[1]};{destination_coords[0]},{destination_coords[1]}"
-    url = f"{OSRM_BASE_URL}{coords}?overview=false"
-
-    try:
-        response = requests.get(url, timeout=15)
-        if response.status_code == 200:
-            data = response.json()
-            if data['code'] == 'Ok' and data['routes']:
-                route = data['routes'][0]
-                return route['distance'], route['duration']
-    except Exception as e:
-        print("Error fetching route:", e)
-
-    return None, None
-
-
-def simulate_traffic_conditions(hour, day_of_week, base_duration_minutes):
-    traffic_multiplier = random.uniform(0.9, 1.1)
-
-    if day_of_week not in ['Saturday', 'Sunday']:
-        if 7 <= hour <= 9:
-            traffic_multiplier = random.uniform(1.3, 1.8)
-        elif 17 <= hour <= 19:
-            traffic_multiplier = random.uniform(1.5, 2.0)
-
-    duration = base_duration_minutes * traffic_multiplier
-    return duration, traffic_multiplier
-
-
-def process_route(route, current_time):
-    origin, destination, route_name, origin_name, dest_name = route
-
-    distance_m, duration_s = get_route_info(origin, destination)
-    if not distance_m:
-        return None
-
-    base_minutes = duration_s / 60
-    traffic_minutes, multiplier = simulate_traffic_conditions(
-        current_time.hour,
-        current_time.strftime('%A'),
-        base_minutes
-    )
-
-    delay = traffic_minutes - base_minutes
-
-    if delay < 5:
-        status = "No Traffic"
-    elif delay < 15:
-        status = "Light Traffic"
-    elif delay < 30:
-        status = "Moderate Traffic"
-    else:
-        status = "Heavy Traffic"
-
-    return {
-        "timestamp": current_time.strftime('%Y-%m-%d %H:%M:%S'),
-        "route_name": route_name,
-        "origin": origin_name,
-        "destination": dest_name,
-        "distance_km": round(distance_m / 1000, 2),
-        "duration_minutes": round(base_minutes, 2),
-        "duration_in_traffic_minutes": round(traffic_minutes, 2),
-        "delay_minutes": round(delay, 2),
-        "traffic_status": status,
-        "traffic_multiplier": round(multiplier, 2)
-    }
-
-def collect_traffic_data():
-    records = []
-    now = datetime.now()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [executor.submit(process_route, r, now) for r in ABUJA_ROUTES]
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                records.append(result)
-
-    return records
-
-
-def save_to_csv(data_records):
-    if not data_records:
-        return 0
-
-    df = pd.DataFrame(data_records)
-
-    with file_lock:
-        if os.path.exists(CSV_FILENAME):
-            df.to_csv(CSV_FILENAME, mode='a', header=False, index=False)
-        else:
-            df.to_csv(CSV_FILENAME, index=False)
-
-    return len(data_records)
-
-# =========================
-# FLASK ENDPOINTS
-# =========================
-@app.route("/")
-def home():
-    return jsonify({
-       "message": "Abuja Traffic Data API (Flask Applied)",
-        "routes": len(ABUJA_ROUTES),
-        "endpoints": ["/collect", "/data", "/routes", "/download"]
-    })
-
-
-@app.route("/collect", methods=["GET"])
-def collect():
-    data = collect_traffic_data()
-    saved = save_to_csv(data)
-
-    return jsonify({
-        "status": "success",
-        "records_saved": saved
-    })
-
-
-@app.route("/data", methods=["GET"])
-def data():
-    if not os.path.exists(CSV_FILENAME):
-        return jsonify({"message": "No data collected yet"}), 404
-
-    df = pd.read_csv(CSV_FILENAME)
-    return df.tail(100).to_json(orient="records")
-
-
-@app.route("/data")
-def data():
-    if not os.path.exists(CSV_FILENAME):
-        return "No traffic data available yet."
-
-    df = pd.read_csv(CSV_FILENAME)
-
-    # Show recent records only (cleaner)
-    df = df.tail(100)
-
-    return render_template(
-        "data.html",
-        tables=[df.to_html(classes="table", index=False)],
-        total_records=len(df)
-    )
-
-
-@app.route("/download", methods=["GET"])
+@http_cache.versioned(cache=False, max_age=0)
 def download():
     if not os.path.exists(CSV_FILENAME):
         return jsonify({"message": "CSV file not found"}), 404
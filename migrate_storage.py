@@ -0,0 +1,83 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from traffic_schema import TRAFFIC_COLUMNS
+from traffic_store import CSV_FILENAME, STORAGE_BACKENDS, open_store
+
+# =========================
+# CONFIGURATION
+# =========================
+DEFAULT_CHUNK_ROWS = 200000  # CSV rows converted per step (bounds memory)
+
+# Rows written by an older 10-column collector landed left-aligned under the 17-column header
+SHIFTED_COLUMNS = [
+    'timestamp', 'route_name', 'origin', 'destination', 'distance_km', 'duration_minutes',
+    'duration_in_traffic_minutes', 'delay_minutes', 'traffic_status', 'traffic_multiplier'
+]
+
+
+def repair_shifted_rows(chunk):
+    """Move the values of left-aligned 10-column rows back under their real headers"""
+    shifted = chunk['distance_km'].isna() & ~chunk['date'].astype(str).str.match(r'\d{4}-\d{2}-\d{2}$')
+    if not shifted.any():
+        return chunk
+
+    rows = chunk.loc[shifted, TRAFFIC_COLUMNS[:len(SHIFTED_COLUMNS)]].to_numpy()
+    repaired = pd.DataFrame(rows, columns=SHIFTED_COLUMNS, index=chunk.index[shifted])
+    for column in SHIFTED_COLUMNS[4:]:
+        if column != 'traffic_status':
+            repaired[column] = pd.to_numeric(repaired[column], errors='coerce')
+
+    chunk = chunk.astype(object)
+    chunk.loc[shifted, :] = None
+    chunk.loc[shifted, SHIFTED_COLUMNS] = repaired
+    print(f"  repaired {int(shifted.sum())} left-aligned rows")
+    return chunk
+
+
+def migrate(source, store, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Copy every record of the CSV at `source` into `store`, chunk by chunk"""
+    total_rows = 0
+    started = time.time()
+    for chunk in pd.read_csv(source, chunksize=chunk_rows):
+        chunk = repair_shifted_rows(chunk)
+        total_rows += store.append(chunk.dropna(subset=['timestamp', 'route_name']))
+        print(f"✓ {total_rows:,} rows ({time.time() - started:.1f}s)")
+
+    if hasattr(store, 'compact'):
+        store.compact(before='9999-12-31')
+    return total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the traffic CSV to another storage backend")
+    parser.add_argument('--source', default=CSV_FILENAME)
+    parser.add_argument('--backend', default='parquet', choices=[b for b in STORAGE_BACKENDS if b != 'csv'])
+    parser.add_argument('--dest', default=None, help="Destination path, default: the backend's usual location")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"{args.source} not found")
+        return
+
+    store = open_store(args.backend, args.dest)
+    if store.exists():
+        print(f"{store.path} already has data - remove it or choose another --dest")
+        return
+
+    print("=" * 80)
+    print(f"MIGRATING {args.source} -> {store.path} ({args.backend})")
+    print("=" * 80)
+
+    started = time.time()
+    rows = migrate(args.source, store, args.chunk_rows)
+    source_mb = os.path.getsize(args.source) / 1e6
+    print(f"\n✓ Migrated {rows:,} rows in {time.time() - started:.1f}s (source {source_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import requests
+
+# =========================
+# CONFIGURATION
+# =========================
+OSRM_TABLE_URL = "https://router.project-osrm.org/table/v1/driving/"
+MAX_TABLE_COORDINATES = 100  # Public OSRM rejects larger tables (max-table-size)
+REQUEST_TIMEOUT_SECONDS = 15
+
+
+def coord_key(coords):
+    """Hashable key for a [lon, lat] pair"""
+    return (round(float(coords[0]), 6), round(float(coords[1]), 6))
+
+
+def unique_in_order(items):
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
+
+
+def plan_table_requests(routes, max_coordinates=MAX_TABLE_COORDINATES):
+    """
+    Group the unique origins and destinations of an ABUJA_ROUTES style list
+    into (origin_block, destination_block) pairs that each fit in one table call.
+    Blocks that contain none of the requested pairs are skipped.
+    """
+    pairs = {(coord_key(route[0]), coord_key(route[1])) for route in routes}
+    origins = unique_in_order(coord_key(route[0]) for route in routes)
+    destinations = unique_in_order(coord_key(route[1]) for route in routes)
+
+    if len(unique_in_order(origins + destinations)) <= max_coordinates:
+        return [(origins, destinations)]
+
+    block_size = max(1, max_coordinates // 2)
+    blocks = []
+    for o_start in range(0, len(origins), block_size):
+        origin_block = origins[o_start:o_start + block_size]
+        for d_start in range(0, len(destinations), block_size):
+            destination_block = destinations[d_start:d_start + block_size]
+            if any((o, d) in pairs for o in origin_block for d in destination_block):
+                blocks.append((origin_block, destination_block))
+    return blocks
+
+
+def fetch_table_block(session, origin_block, destination_block,
+                      table_url=OSRM_TABLE_URL, timeout=REQUEST_TIMEOUT_SECONDS):
+    """Fetch one distance/duration matrix - returns {(origin, destination): (distance_m, duration_s)}"""
+    coordinates = unique_in_order(origin_block + destination_block)
+    index = {coord: i for i, coord in enumerate(coordinates)}
+
+    coords = ";".join(f"{lon},{lat}" for lon, lat in coordinates)
+    params = {
+        "sources": ";".join(str(index[o]) for o in origin_block),
+        "destinations": ";".join(str(index[d]) for d in destination_block),
+        "annotations": "duration,distance"
+    }
+
+    results = {}
+    try:
+        response = session.get(f"{table_url}{coords}", params=params, timeout=timeout)
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('code') == 'Ok':
+                for i, origin in enumerate(origin_block):
+                    for j, destination in enumerate(destination_block):
+                        distance = data['distances'][i][j]
+                        duration = data['durations'][i][j]
+                        if distance is not None and duration is not None:
+                            results[(origin, destination)] = (distance, duration)
+    except Exception as e:
+        print("Error fetching route table:", e)
+
+    return results
+
+
+def collect_route_info_table(routes, table_url=OSRM_TABLE_URL,
+                             timeout=REQUEST_TIMEOUT_SECONDS,
+                             max_coordinates=MAX_TABLE_COORDINATES):
+    """
+    Look up every route through the OSRM table service.
+    Returns a list of (route, (distance_m, duration_s)) in input order,
+    with (None, None) for pairs OSRM could not route.
+    """
+    matrix = {}
+    with requests.Session() as session:
+        for origin_block, destination_block in plan_table_requests(routes, max_coordinates):
+            matrix.update(fetch_table_block(session, origin_block, destination_block, table_url, timeout))
+
+    return [
+        (route, matrix.get((coord_key(route[0]), coord_key(route[1])), (None, None)))
+        for route in routes
+    ]
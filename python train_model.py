@@ -9,6 +9,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 from datetime import datetime
+from retention import read_history
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -22,7 +23,7 @@ class TrafficPredictor:
     def load_and_prepare_data(self, filename='abuja_traffic_data.csv'):
         """Load and prepare the traffic data for training"""
         print("Loading data...")
-        df = pd.read_csv(filename)
+        df = read_history(filename)
         
         # Convert timestamp to datetime
         df['timestamp'] = pd.to_datetime(df['timestamp'])
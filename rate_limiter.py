@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+# =========================
+# CONFIGURATION
+# =========================
+MAX_REQUESTS_PER_SECOND = 10  # Sustained OSRM request rate
+BURST_SIZE = 10  # Requests allowed back to back after an idle period
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 32
+LATENCY_TARGET_SECONDS = 2.0  # Above this the backend is treated as overloaded
+BACKOFF_FACTOR = 0.5  # Multiplicative decrease on 429/5xx/timeouts
+POLL_INTERVAL_SECONDS = 0.01  # Async waiters re-check the limiter this often
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all collector workers"""
+
+    def __init__(self, rate=MAX_REQUESTS_PER_SECOND, capacity=BURST_SIZE):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AimdConcurrencyLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+    Fast successful responses grow the limit by about one per round trip;
+    429/5xx responses, errors or latency above the target cut it by BACKOFF_FACTOR.
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, min_limit=MIN_CONCURRENCY,
+                 max_limit=MAX_CONCURRENCY, latency_target=LATENCY_TARGET_SECONDS,
+                 backoff=BACKOFF_FACTOR):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.condition:
+            self.started_at = time.monotonic()
+            self.completed = 0
+            self.throttled = 0
+
+    def try_acquire(self):
+        with self.condition:
+            if self.in_flight < max(self.min_limit, int(self.limit)):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= max(self.min_limit, int(self.limit)):
+                self.condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        while not self.try_acquire():
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    def release(self, latency, status_code=None, error=False):
+        """Free a slot and adjust the limit from the observed outcome"""
+        overloaded = error or status_code == 429 or (status_code is not None and status_code >= 500)
+        with self.condition:
+            self.in_flight -= 1
+            self.completed += 1
+            if overloaded or latency > self.latency_target:
+                self.throttled += 1
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+            self.condition.notify_all()
+
+    @contextmanager
+    def request(self):
+        """
+        Hold a slot for one request. Set outcome['status_code'] inside the block;
+        an exception counts as an error.
+        """
+        self.acquire()
+        outcome = {'status_code': None}
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            self.release(time.monotonic() - start, error=True)
+            raise
+        else:
+            self.release(time.monotonic() - start, outcome['status_code'])
+
+    def stats(self):
+        """Requests completed since the last reset_stats() and the achieved rate"""
+        with self.condition:
+            elapsed = time.monotonic() - self.started_at
+            return {
+                'requests': self.completed,
+                'throttled': self.throttled,
+                'elapsed_seconds': round(elapsed, 2),
+                'requests_per_second': round(self.completed / elapsed, 2) if elapsed > 0 else 0.0,
+                'concurrency_limit': round(self.limit, 2)
+            }
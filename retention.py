@@ -0,0 +1,236 @@
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from store_lock import replace_file
+from traffic_schema import apply_schema, normalize_records
+from traffic_simulation import status_levels
+from traffic_store import CSV_FILENAME, pa, open_store, store_for_path, to_timestamp
+
+# =========================
+# CONFIGURATION
+# =========================
+RAW_RETENTION_DAYS = 30  # Days of raw 15-minute rows kept in the hot store
+COLD_SUFFIX = '_cold'  # <store>_cold/: zstd parquet date partitions of older raw rows
+HOURLY_SUFFIX = '_hourly.csv'  # <store>_hourly.csv: per-route hourly rollups of older rows
+STATUS_LEVELS = status_levels() + ['other']  # 'other': any label the simulation doesn't emit
+
+
+def status_column(status):
+    return 'status_' + status.lower().replace(' ', '_')
+
+
+ROLLUP_COLUMNS = [
+    'hour_start', 'route_name', 'origin', 'destination', 'count', 'delay_mean', 'delay_p50', 'delay_p90',
+    'speed_mean', 'duration_in_traffic_mean'
+] + [status_column(status) for status in STATUS_LEVELS]
+
+
+def tier_paths(path):
+    """(cold parquet directory, hourly rollup CSV) belonging to the hot store at path"""
+    stem = os.path.splitext(path.rstrip(os.sep))[0]
+    return f"{stem}{COLD_SUFFIX}", f"{stem}{HOURLY_SUFFIX}"
+
+
+def hourly_rollup(df):
+    """Per-route hourly aggregates (ROLLUP_COLUMNS) of raw records"""
+    if len(df) == 0:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    status = df['traffic_status'].astype(object)
+    status = status.where(status.isin(STATUS_LEVELS[:-1]), 'other')
+    df = pd.DataFrame({
+        'hour_start': pd.to_datetime(df['timestamp'], errors='coerce').dt.floor('h'),
+        'route_name': df['route_name'].astype(object),
+        'origin': df['origin'].astype(object),
+        'destination': df['destination'].astype(object),
+        'delay': pd.to_numeric(df['delay_minutes'], errors='coerce').astype(float),
+        'speed': pd.to_numeric(df['avg_speed_kmh'], errors='coerce').astype(float),
+        'in_traffic': pd.to_numeric(df['duration_in_traffic_minutes'], errors='coerce').astype(float),
+        # Status histogram as one 0/1 column per level, summed in the same groupby
+        **{status_column(level): (status == level).astype(int) for level in STATUS_LEVELS}
+    }).dropna(subset=['hour_start', 'route_name'])
+
+    grouped = df.groupby(['hour_start', 'route_name'], sort=True)
+    rollup = grouped.agg(
+        origin=('origin', 'first'), destination=('destination', 'first'), count=('delay', 'size'),
+        delay_mean=('delay', 'mean'), delay_p50=('delay', 'median'),
+        speed_mean=('speed', 'mean'), duration_in_traffic_mean=('in_traffic', 'mean'),
+        **{status_column(level): (status_column(level), 'sum') for level in STATUS_LEVELS}
+    )
+    rollup['delay_p90'] = grouped['delay'].quantile(0.9)
+    rollup = rollup.reset_index()
+    for column in ['delay_mean', 'delay_p50', 'delay_p90', 'speed_mean', 'duration_in_traffic_mean']:
+        rollup[column] = rollup[column].round(2)
+    return rollup[ROLLUP_COLUMNS]
+
+
+def read_rollups(filename, start=None, end=None):
+    """Stored hourly rollups with hour_start in [start, end)"""
+    if not os.path.exists(filename):
+        return pd.DataFrame(columns=ROLLUP_COLUMNS).astype({'hour_start': 'datetime64[s]'})
+    # Files written before a status level was added lack its column: those hours had none
+    rollups = pd.read_csv(filename, parse_dates=['hour_start']).reindex(columns=ROLLUP_COLUMNS, fill_value=0)
+    if start is not None:
+        rollups = rollups[rollups['hour_start'] >= to_timestamp(start)]
+    if end is not None:
+        rollups = rollups[rollups['hour_start'] < to_timestamp(end)]
+    return rollups.reset_index(drop=True)
+
+
+def write_rollups(filename, rollups):
+    """Atomically replace the hourly CSV with rollups, in (hour_start, route_name) order"""
+    rollups = rollups.sort_values(['hour_start', 'route_name'], kind='stable')[ROLLUP_COLUMNS]
+    replace_file(filename, lambda path: rollups.to_csv(path, index=False, date_format='%Y-%m-%d %H:%M:%S'),
+                 suffix='.csv')
+
+
+def read_hourly(path=CSV_FILENAME, start=None, end=None, route=None):
+    """
+    Per-route hourly aggregates (ROLLUP_COLUMNS) over [start, end) from
+    every tier: the stored rollups for compacted history, plus rollups of
+    the hot store's raw rows computed on the fly. Long ranges are ~4x
+    fewer rows than read_history and need no cold-tier reads.
+    """
+    store = store_for_path(path)
+    _, hourly_filename = tier_paths(path)
+    stored = read_rollups(hourly_filename, start, end)
+    columns = ['timestamp', 'route_name', 'origin', 'destination', 'delay_minutes', 'avg_speed_kmh',
+               'duration_in_traffic_minutes', 'traffic_status']
+    hot = hourly_rollup(store.read(columns=columns, start=start, end=end))
+    if len(stored) and len(hot):
+        # Late rows not compacted yet: keep the stored rollup of any hour both tiers have
+        keys = pd.MultiIndex.from_frame(stored[['hour_start', 'route_name']])
+        hot = hot[~pd.MultiIndex.from_frame(hot[['hour_start', 'route_name']]).isin(keys)]
+    frames = [frame for frame in (stored, hot) if len(frame)] or [stored]
+    hourly = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if route is not None:
+        hourly = hourly[hourly['route_name'] == route]
+    return hourly.sort_values(['hour_start', 'route_name'], kind='stable').reset_index(drop=True)
+
+
+def days_before(store, cutoff):
+    """(date, records) for each day before cutoff, one day in memory at a time (store.iter_chunks)"""
+    pending = {}
+    for chunk in store.iter_chunks(end=cutoff):
+        chunk = normalize_records(chunk.dropna(subset=['timestamp', 'route_name']))
+        for date, day in chunk.groupby('date', sort=True):
+            pending.setdefault(date, []).append(day)
+        # Stores are in time order, so days before this chunk's first one are complete
+        first = chunk['date'].min() if len(chunk) else None
+        for date in sorted(pending):
+            if first is not None and date < first:
+                yield date, pd.concat(pending.pop(date), ignore_index=True)
+    for date in sorted(pending):
+        yield date, pd.concat(pending.pop(date), ignore_index=True)
+
+
+def compact_history(store, retention_days=RAW_RETENTION_DAYS, now=None):
+    """
+    Move raw records older than retention_days (whole days) out of the hot
+    store, a day at a time: copy them unchanged to the compressed cold
+    parquet tier, roll them up per route and hour into the hourly CSV,
+    then drop them from the hot store. Every row is kept, so the running
+    statistics still match read_history(). A day that already has rollups
+    (late rows, or a re-run after a crash) is rolled up again from its
+    whole cold copy and replaces its old rollups, so every (hour_start,
+    route_name) has exactly one rollup row.
+    """
+    if pa is None:
+        print("✗ Retention needs pyarrow for the cold tier (pip install pyarrow); raw data kept")
+        return None
+    cutoff = pd.Timestamp((now or datetime.now()).date() - timedelta(days=retention_days))
+    summary = store.summary()
+    if summary['min_timestamp'] is None or pd.Timestamp(summary['min_timestamp']) >= cutoff:
+        return {'rolled_rows': 0, 'rollup_rows': 0, 'kept_rows': summary['rows'], 'cutoff': str(cutoff)}
+
+    started = time.time()
+    cold_dir, hourly_filename = tier_paths(store.path)
+    cold = open_store('parquet', cold_dir)
+    existing = read_rollups(hourly_filename)
+    if len(existing) and list(pd.read_csv(hourly_filename, nrows=0).columns) != ROLLUP_COLUMNS:
+        write_rollups(hourly_filename, existing)  # Upgrade the header
+    rolled_days = set(existing['hour_start'].dt.strftime('%Y-%m-%d'))
+    redone = {}
+    moved = rollup_rows = 0
+
+    for date, day in days_before(store, cutoff):
+        moved += cold.import_day(date, day)
+        if date in rolled_days:
+            next_day = pd.Timestamp(date) + pd.Timedelta(days=1)
+            redone[date] = hourly_rollup(cold.read(start=date, end=next_day))
+            continue
+        rollups = hourly_rollup(day)
+        if len(rollups):
+            rollups.to_csv(hourly_filename, mode='a', header=not os.path.exists(hourly_filename), index=False,
+                           date_format='%Y-%m-%d %H:%M:%S')
+            rollup_rows += len(rollups)
+    cold.rebuild_summary()
+
+    if redone:
+        current = read_rollups(hourly_filename)
+        current = current[~current['hour_start'].dt.strftime('%Y-%m-%d').isin(redone)]
+        write_rollups(hourly_filename, pd.concat([current, *redone.values()], ignore_index=True))
+        rollup_rows += sum(len(rollups) for rollups in redone.values())
+
+    kept = store.drop_before(cutoff)
+    print(f"✓ Retention: {moved:,} rows before {cutoff:%Y-%m-%d} -> {rollup_rows:,} hourly rollups "
+          f"and {cold_dir}, {kept:,} raw rows kept ({time.time() - started:.1f}s)")
+    return {'rolled_rows': moved, 'rollup_rows': rollup_rows, 'kept_rows': kept, 'cutoff': str(cutoff)}
+
+
+def read_history(path=CSV_FILENAME, columns=None, start=None, end=None, typed=True):
+    """
+    Raw records in [start, end) from every tier that has them: the cold
+    parquet tier for history that left the hot store, then the hot store.
+    Like read_traffic, typed=True returns the compact schema.
+    """
+    store = store_for_path(path)
+    cold_dir, _ = tier_paths(path)
+    frames = []
+    raw_start = store.summary()['min_timestamp']
+    if os.path.isdir(cold_dir) and (start is None or raw_start is None or to_timestamp(start) < pd.Timestamp(raw_start)):
+        frames.append(open_store('parquet', cold_dir).read(columns=columns, start=start, end=end, typed=typed))
+    frames.append(store.read(columns=columns, start=start, end=end, typed=typed))
+    frames = [frame for frame in frames if len(frame)] or frames[-1:]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return apply_schema(df) if typed else df
+
+
+def iter_history(path=CSV_FILENAME, columns=None, start=None, end=None, filters=None, chunk_rows=None):
+    """
+    Like read_history, but yields chunks (store.iter_chunks) so a whole
+    export never has to fit in memory: the cold tier first, then the hot
+    store.
+    """
+    store = store_for_path(path)
+    cold_dir, _ = tier_paths(path)
+    options = {} if chunk_rows is None else {'chunk_rows': chunk_rows}
+    raw_start = store.summary()['min_timestamp']
+    if os.path.isdir(cold_dir) and (start is None or raw_start is None or to_timestamp(start) < pd.Timestamp(raw_start)):
+        yield from open_store('parquet', cold_dir).iter_chunks(columns, start, end, filters, **options)
+    yield from store.iter_chunks(columns, start, end, filters, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up and move traffic history older than the raw window")
+    parser.add_argument('--path', default=CSV_FILENAME, help="Hot store: CSV file, parquet directory or .db")
+    parser.add_argument('--days', type=int, default=RAW_RETENTION_DAYS, help="Days of raw rows to keep")
+    args = parser.parse_args()
+
+    store = store_for_path(args.path)
+    if not store.exists():
+        print(f"{args.path} not found")
+        return
+    print("=" * 80)
+    print(f"RETENTION {args.path}: keep {args.days} days raw")
+    print("=" * 80)
+    result = compact_history(store, args.days)
+    if result is not None and result['rolled_rows'] == 0:
+        print(f"✓ Nothing older than {result['cutoff'][:10]}")
+
+
+if __name__ == "__main__":
+    main()
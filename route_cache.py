@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from store_lock import replace_text
+
+# =========================
+# CONFIGURATION
+# =========================
+ROUTE_CACHE_FILE = 'route_cache.json'
+ROUTE_CACHE_TTL_SECONDS = 7 * 24 * 3600  # OSRM base geometry barely changes week to week
+ROUTE_CACHE_MAX_ENTRIES = 10000
+
+
+def route_key(origin_coords, destination_coords):
+    """Content address for a coordinate pair - identical pairs share one entry"""
+    coords = f"{float(origin_coords[0]):.6f},{float(origin_coords[1]):.6f};" \
+             f"{float(destination_coords[0]):.6f},{float(destination_coords[1]):.6f}"
+    return hashlib.sha1(coords.encode('utf-8')).hexdigest()
+
+
+class RouteInfoCache:
+    """
+    Persistent (distance_m, duration_s) cache keyed by coordinate pair.
+    Entries older than ttl_seconds are still served, but get refreshed in
+    a background thread. The least recently used entries are evicted once
+    max_entries is reached.
+    """
+
+    def __init__(self, filename=ROUTE_CACHE_FILE, ttl_seconds=ROUTE_CACHE_TTL_SECONDS,
+                 max_entries=ROUTE_CACHE_MAX_ENTRIES):
+        self.filename = filename
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.refreshing = set()
+        self.load()
+
+    def load(self):
+        if not self.filename or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable route cache {self.filename}: {e}")
+            return
+
+        # Stored oldest-used first so the LRU order survives restarts
+        with self.lock:
+            for key, entry in data.get('entries', []):
+                self.entries[key] = entry
+            self.evict()
+
+    def save(self):
+        """Atomically write the cache to disk if anything changed"""
+        if not self.filename:
+            return
+        # Under the lock, so two saving threads can't land an older snapshot last;
+        # the unique temp file keeps other processes' saves apart
+        with self.lock:
+            if not self.dirty:
+                return
+            replace_text(self.filename, json.dumps({'entries': list(self.entries.items())}))
+            self.dirty = False
+
+    def evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.dirty = True
+
+    def get(self, origin_coords, destination_coords):
+        """Return (distance_m, duration_s, is_fresh) or None if the pair is unknown"""
+        key = route_key(origin_coords, destination_coords)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        is_fresh = time.time() - entry['fetched_at'] < self.ttl_seconds
+        return entry['distance'], entry['duration'], is_fresh
+
+    def put(self, origin_coords, destination_coords, distance_m, duration_s):
+        if distance_m is None or duration_s is None:
+            return
+        key = route_key(origin_coords, destination_coords)
+        with self.lock:
+            self.entries[key] = {
+                'distance': distance_m,
+                'duration': duration_s,
+                'fetched_at': time.time()
+            }
+            self.entries.move_to_end(key)
+            self.dirty = True
+            self.evict()
+
+    def lookup_routes(self, routes, fetch_many):
+        """
+        Resolve route info for an ABUJA_ROUTES style list.
+        fetch_many(routes) must return [(route, (distance_m, duration_s)), ...]
+        like async_collector.collect_route_info. Only unknown pairs are fetched
+        inline; stale ones are served from cache and refreshed in the background.
+        """
+        results = {}
+        missing = []
+        stale = []
+
+        for i, route in enumerate(routes):
+            cached = self.get(route[0], route[1])
+            if cached is None:
+                missing.append(i)
+                continue
+            distance_m, duration_s, is_fresh = cached
+            results[i] = (distance_m, duration_s)
+            if not is_fresh:
+                stale.append(route)
+
+        if missing:
+            fetched = fetch_many([routes[i] for i in missing])
+            for i, (route, (distance_m, duration_s)) in zip(missing, fetched):
+                self.put(route[0], route[1], distance_m, duration_s)
+                results[i] = (distance_m, duration_s)
+
+        if stale:
+            self.refresh_in_background(stale, fetch_many)
+
+        return [(route, results[i]) for i, route in enumerate(routes)]
+
+    def iter_routes(self, routes, iter_fetch):
+        """
+        Streaming lookup_routes: cached pairs are yielded straight away and
+        unknown ones as iter_fetch(routes) produces them (completion order).
+        """
+        missing = []
+        stale = []
+
+        for route in routes:
+            cached = self.get(route[0], route[1])
+            if cached is None:
+                missing.append(route)
+                continue
+            distance_m, duration_s, is_fresh = cached
+            if not is_fresh:
+                stale.append(route)
+            yield route, (distance_m, duration_s)
+
+        if stale:
+            self.refresh_in_background(stale, lambda batch: list(iter_fetch(batch)))
+
+        if missing:
+            for route, (distance_m, duration_s) in iter_fetch(missing):
+                self.put(route[0], route[1], distance_m, duration_s)
+                yield route, (distance_m, duration_s)
+
+    def with_fallback(self, route_infos):
+        """
+        Pass (route, (distance_m, duration_s)) lookups through, filling in
+        routes OSRM couldn't answer with their last cached route info.
+        """
+        for route, (distance_m, duration_s) in route_infos:
+            if distance_m is None or duration_s is None:
+                cached = self.get(route[0], route[1])
+                if cached:
+                    distance_m, duration_s = cached[0], cached[1]
+            yield route, (distance_m, duration_s)
+
+    def refresh_in_background(self, routes, fetch_many):
+        keys = {route_key(route[0], route[1]) for route in routes}
+        with self.lock:
+            keys -= self.refreshing
+            if not keys:
+                return
+            self.refreshing |= keys
+        routes = [route for route in routes if route_key(route[0], route[1]) in keys]
+
+        def refresh():
+            try:
+                for route, (distance_m, duration_s) in fetch_many(routes):
+                    self.put(route[0], route[1], distance_m, duration_s)
+                self.save()
+            except Exception as e:
+                print(f"Error refreshing route cache: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing -= keys
+
+        threading.Thread(target=refresh, name='route-cache-refresh', daemon=True).start()
@@ -0,0 +1,97 @@
+import math
+import threading
+import time
+
+# =========================
+# CONFIGURATION
+# =========================
+VOLATILITY_HALF_LIFE = 8  # Samples until an old delay observation counts half as much
+MIN_DELAY_STD = 0.5  # Minutes; floor so a perfectly flat route is still sampled
+MAX_STRETCH = 4  # A stable route is sampled at least once every MAX_STRETCH intervals
+REPLAN_SECONDS = 60  # How often the schedule is rebalanced
+
+
+class AdaptiveSamplingPlanner:
+    """
+    Shares a fixed sampling budget between routes by how volatile they are.
+    Keeps an exponentially weighted mean/variance of delay_minutes per route
+    and gives each route a share of the budget proportional to its delay
+    standard deviation: congested or fast-changing routes are polled more
+    often, stable ones less. The budget is one sample per route per interval,
+    i.e. the same number of OSRM requests as uniform sampling.
+    """
+
+    def __init__(self, route_names, half_life=VOLATILITY_HALF_LIFE, min_std=MIN_DELAY_STD,
+                 max_stretch=MAX_STRETCH, replan_seconds=REPLAN_SECONDS):
+        self.route_names = list(route_names)
+        self.alpha = 1 - 0.5 ** (1 / half_life)
+        self.min_std = min_std
+        self.max_stretch = max_stretch
+        self.replan_seconds = replan_seconds
+        self.lock = threading.Lock()
+        self.mean = {}
+        self.variance = {}
+        self.samples = {}
+        self.planned_at = 0
+
+    def observe(self, records):
+        """Update volatility from freshly collected records (dicts with route_name, delay_minutes)"""
+        with self.lock:
+            for record in records:
+                name = record.get('route_name')
+                delay = record.get('delay_minutes')
+                if name is None or delay is None:
+                    continue
+                if name not in self.mean:
+                    self.mean[name] = delay
+                    self.variance[name] = 0.0
+                    self.samples[name] = 1
+                    continue
+                # Exponentially weighted Welford update
+                diff = delay - self.mean[name]
+                increment = self.alpha * diff
+                self.mean[name] += increment
+                self.variance[name] = (1 - self.alpha) * (self.variance[name] + diff * increment)
+                self.samples[name] += 1
+
+    def delay_std(self, name):
+        if self.samples.get(name, 0) < 2:
+            return None
+        return max(math.sqrt(self.variance[name]), self.min_std)
+
+    def periods(self, n_slots):
+        """{route_name: period in slots} for a schedule with n_slots per interval"""
+        with self.lock:
+            known = [s for s in (self.delay_std(name) for name in self.route_names) if s is not None]
+            # Routes without history yet get the average weight
+            default = sum(known) / len(known) if known else 1.0
+            weights = {name: self.delay_std(name) or default for name in self.route_names}
+
+        total = sum(weights.values())
+        budget = len(self.route_names)  # Samples per interval
+        max_period = n_slots * self.max_stretch
+        periods = {}
+        for name, weight in weights.items():
+            samples_per_interval = budget * weight / total
+            periods[name] = int(min(max_period, max(1, round(n_slots / samples_per_interval))))
+        return periods
+
+    def apply(self, schedule, force=False):
+        """Rebalance schedule (a StaggeredSchedule) at most once every replan_seconds"""
+        now = time.time()
+        if not force and now - self.planned_at < self.replan_seconds:
+            return False
+        self.planned_at = now
+        schedule.set_periods(self.periods(schedule.n_slots))
+        return True
+
+    def stats(self):
+        with self.lock:
+            return {
+                name: {
+                    'samples': self.samples.get(name, 0),
+                    'mean_delay_minutes': round(self.mean[name], 2) if name in self.mean else None,
+                    'delay_std_minutes': round(self.delay_std(name), 2) if self.delay_std(name) else None
+                }
+                for name in self.route_names
+            }
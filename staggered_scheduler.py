@@ -0,0 +1,106 @@
+import threading
+import time
+from datetime import datetime
+
+from traffic_simulation import route_id
+
+# =========================
+# CONFIGURATION
+# =========================
+MIN_SLOT_SECONDS = 5  # Finest spacing between two sampling slots
+
+
+def can_stagger(n_routes, interval_seconds, min_slot_seconds=MIN_SLOT_SECONDS):
+    """True if the interval leaves every route a slot of at least min_slot_seconds"""
+    return interval_seconds >= n_routes * min_slot_seconds
+
+
+class StaggeredSchedule:
+    """
+    Spreads route sampling over the collection interval instead of a burst.
+    The interval is cut into slots and every route gets a fixed phase slot,
+    spaced evenly in route_id order so it survives restarts. A route is due
+    in every global slot k where k % period == phase % period; the period is
+    one full interval unless set_periods() says otherwise.
+    Slots are aligned to the wall clock, so any process computes the same plan.
+    """
+
+    def __init__(self, routes, interval_seconds, min_slot_seconds=MIN_SLOT_SECONDS):
+        if interval_seconds <= 0:
+            raise ValueError(f"Staggered collection needs a positive interval, got {interval_seconds}s")
+        self.routes = list(routes)
+        self.interval_seconds = max(interval_seconds, min_slot_seconds)
+        self.n_slots = max(1, min(len(self.routes), int(self.interval_seconds // min_slot_seconds)))
+        self.slot_seconds = self.interval_seconds / self.n_slots
+        self.lock = threading.Lock()
+        self.next_slot = None
+
+        ranked = sorted(self.routes, key=lambda route: (route_id(route[2]), route[2]))
+        self.phases = {
+            route[2]: rank * self.n_slots // len(ranked)
+            for rank, route in enumerate(ranked)
+        }
+        self.periods = {route[2]: self.n_slots for route in self.routes}
+
+    def set_periods(self, periods):
+        """Sample some routes more or less often: {route_name: period in slots}"""
+        with self.lock:
+            for route_name, period in periods.items():
+                if route_name in self.periods:
+                    self.periods[route_name] = max(1, int(period))
+
+    def slot_index(self, timestamp):
+        return int(timestamp // self.slot_seconds)
+
+    def slot_time(self, index):
+        return datetime.fromtimestamp(index * self.slot_seconds)
+
+    def due_routes(self, index):
+        with self.lock:
+            return [
+                route for route in self.routes
+                if index % self.periods[route[2]] == self.phases[route[2]] % self.periods[route[2]]
+            ]
+
+    def take_due(self, now=None):
+        """
+        Routes due since the previous call, with the current slot's start time.
+        Slots missed because a collection overran (or a timer fired late) are
+        folded into this call, so no route is skipped and none piles up.
+        """
+        current = self.slot_index(time.time() if now is None else now)
+        with self.lock:
+            first = current if self.next_slot is None else self.next_slot
+            self.next_slot = current + 1
+        if first > current:
+            return [], self.slot_time(current)
+
+        due = {}
+        for index in range(max(first, current - self.n_slots + 1), current + 1):
+            for route in self.due_routes(index):
+                due[route[2]] = route
+        return list(due.values()), self.slot_time(current)
+
+    def plan(self):
+        """Per-route phase and sampling interval, for display"""
+        with self.lock:
+            return [
+                {
+                    'route_name': route[2],
+                    'phase_seconds': round(self.phases[route[2]] * self.slot_seconds, 1),
+                    'interval_seconds': round(self.periods[route[2]] * self.slot_seconds, 1)
+                }
+                for route in self.routes
+            ]
+
+    def run(self, collect_slot, stop_event=None):
+        """Call collect_slot(routes, slot_time) at the start of every slot until stop_event is set"""
+        stop_event = stop_event or threading.Event()
+        self.take_due()  # Start with the next slot rather than mid-slot
+        while not stop_event.is_set():
+            wait = self.next_slot * self.slot_seconds - time.time()
+            if wait > 0 and stop_event.wait(wait):
+                break
+            routes, slot_time = self.take_due()
+            if routes:
+                collect_slot(routes, slot_time)
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): there is no multi-worker gunicorn there either
+    fcntl = None
+
+# =========================
+# CONFIGURATION
+# =========================
+LOCK_SUFFIX = '.lock'  # Sidecar lock file next to the data it guards
+
+
+class StoreLock:
+    """
+    Writer lock that holds across threads and processes: a reentrant
+    thread lock for this process plus an exclusive flock on a sidecar
+    file for everyone else (gunicorn workers, the scheduler process,
+    /collect requests). Each acquire opens its own file descriptor, so a
+    forked worker never shares a lock with its parent, and the kernel
+    drops the flock if a writer dies mid-append. Without fcntl it is
+    just the thread lock.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth == 0 and fcntl is not None:
+            try:
+                directory = os.path.dirname(self.filename)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.handle = open(self.filename, 'a+')
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self.handle is not None:
+                    self.handle.close()
+                    self.handle = None
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0 and self.handle is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+        self.thread_lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def append_text(filename, text):
+    """Append text with a single write on an O_APPEND descriptor, so a row is never split"""
+    data = text.encode('utf-8')
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return len(data)
+
+
+def replace_file(filename, write, suffix='.tmp'):
+    """
+    Atomically replace filename with what write(path) writes: a temp file
+    with a unique name in the same directory, then a rename, so concurrent
+    savers never write into each other's temp file.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.", suffix=suffix)
+    os.close(fd)
+    try:
+        os.chmod(tmp_filename, 0o644)
+        write(tmp_filename)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+
+def replace_text(filename, text):
+    """Atomically replace filename's contents with text (replace_file)"""
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    replace_file(filename, write)
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from store_lock import replace_text
+
+# =========================
+# CONFIGURATION
+# =========================
+MANIFEST_SUFFIX = '.manifest.json'
+
+
+def summarize(df):
+    """(rows, min timestamp, max timestamp, per-route counts) of a batch with timestamp/route_name"""
+    if len(df) == 0:
+        return 0, None, None, {}
+    timestamps = pd.to_datetime(df['timestamp'], errors='coerce').dropna().dt.strftime('%Y-%m-%d %H:%M:%S')
+    route_counts = df['route_name'].dropna().astype(str).value_counts()
+    if len(timestamps) == 0:
+        return len(df), None, None, {k: int(v) for k, v in route_counts.items()}
+    return len(df), timestamps.min(), timestamps.max(), {k: int(v) for k, v in route_counts.items()}
+
+
+class StoreManifest:
+    """
+    Sidecar JSON summary of a traffic store: row count, byte offset (how
+    much of an append-only file it covers), min/max timestamp and
+    per-route counts. Updated from each appended batch and replaced
+    atomically, so totals and date ranges never need a scan of the data.
+    Readers in other processes pick up changes by the file's mtime. Every
+    save bumps a version counter, which HTTP caching uses as the data
+    version.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.state = None
+        self.stamp = None
+        self.carried_version = 0
+
+    @staticmethod
+    def empty():
+        return {'rows': 0, 'bytes': 0, 'min_timestamp': None, 'max_timestamp': None,
+                'route_counts': {}, 'updated_at': None, 'version': 0}
+
+    def load(self):
+        """Current manifest (cached until the file changes), or None if there is none"""
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if stamp != self.stamp:
+                try:
+                    with open(self.filename, 'r', encoding='utf-8') as f:
+                        self.state = json.load(f)
+                except (OSError, ValueError):
+                    return None
+                self.stamp = stamp
+            return dict(self.state)
+
+    def save(self, state):
+        state['updated_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        state['version'] = max(state.get('version', 0), self.carried_version) + 1
+        replace_text(self.filename, json.dumps(state))
+
+    def reset(self):
+        """Remove the manifest so it is rebuilt from the data; the version counter carries on"""
+        state = self.load()
+        self.carried_version = max(self.carried_version, state.get('version', 0) if state else 0)
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def record(self, df, byte_offset=None, base=None):
+        """Fold an appended batch into the manifest; byte_offset is the data file size after the append"""
+        state = base or self.load() or self.empty()
+        rows, min_ts, max_ts, route_counts = summarize(df)
+        state['rows'] += rows
+        if min_ts is not None:
+            state['min_timestamp'] = min(filter(None, [state['min_timestamp'], min_ts]))
+            state['max_timestamp'] = max(filter(None, [state['max_timestamp'], max_ts]))
+        counts = state['route_counts'] = dict(state['route_counts'])
+        for route_name, count in route_counts.items():
+            counts[route_name] = counts.get(route_name, 0) + count
+        if byte_offset is not None:
+            state['bytes'] = byte_offset
+        self.save(state)
+        return state
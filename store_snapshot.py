@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+
+from store_lock import replace_text
+
+
+class StoreSnapshot:
+    """
+    State derived from a store's rows, kept in memory and in a sidecar
+    JSON file next to the store. Appends fold each written batch in
+    (fold()), so readers never scan history. The snapshot notes how many
+    store rows it covers: a reader in another process reloads it by mtime,
+    catches up from the rows appended since (store.appended(), append
+    order rather than timestamp order) if a writer bypassed it, and rebuilds
+    it (rebuild()) if the snapshot is missing or the store was replaced.
+    Large snapshots can be checkpointed every checkpoint_rows rows or
+    checkpoint_seconds seconds instead of every batch; in between, other
+    processes catch up from the appended rows as they would after a crash.
+    """
+
+    checkpoint_rows = 0  # Rows folded in before the file is rewritten (0: every batch)
+    checkpoint_seconds = 0  # ...or seconds since the last save
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.state = None
+        self.stamp = None
+        self.saved_rows = 0
+        self.saved_at = 0.0
+
+    def empty(self):
+        return {'rows': 0}
+
+    def fold(self, state, df):
+        """New state with a batch of records folded in (must not modify state)"""
+        raise NotImplementedError
+
+    def rebuild(self, store):
+        """State covering everything in the store, from scratch"""
+        return self.fold(self.empty(), store.read())
+
+    def load(self):
+        """Current snapshot (cached until the file changes), or None if there is none"""
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if stamp != self.stamp:
+                try:
+                    with open(self.filename, 'r', encoding='utf-8') as f:
+                        self.state = json.load(f)
+                except (OSError, ValueError):
+                    return None
+                self.stamp = stamp
+            return self.state
+
+    def save(self, state):
+        replace_text(self.filename, json.dumps(state))  # dumps() has the C encoder; dump() streams through Python
+        with self.lock:
+            self.state = state
+            stat = os.stat(self.filename)
+            self.stamp = (stat.st_mtime_ns, stat.st_size)
+            self.saved_rows, self.saved_at = state['rows'], time.time()
+
+    def checkpoint_due(self, state):
+        if self.stamp is None or state['rows'] < self.saved_rows:
+            return True
+        return (state['rows'] - self.saved_rows >= self.checkpoint_rows
+                or time.time() - self.saved_at >= self.checkpoint_seconds)
+
+    def record(self, df, rows, base=None):
+        """Fold an appended batch in; rows is the store's row count after the append"""
+        state = base if base is not None else self.load()
+        if state is None and rows == len(df):
+            state = self.empty()  # First batch of a new store
+        if state is None or state['rows'] != rows - len(df):
+            # Not in step with the store: current() rebuilds or catches up when next read
+            return state
+        state = dict(self.fold(state, df), rows=rows)
+        if self.checkpoint_due(state):
+            self.save(state)
+        else:
+            with self.lock:
+                self.state = state  # load() returns it until the file changes
+        return state
+
+    def current(self, store):
+        """The state, brought up to date with the store first"""
+        state = self.load()
+        rows = store.summary()['rows']
+        if state is not None and state['rows'] == rows:
+            return state
+
+        with store.lock:
+            rows = store.summary()['rows']
+            state = self.load()
+            if state is None or state['rows'] > rows:
+                # No snapshot yet, or the store was replaced: one full pass
+                state = dict(self.rebuild(store), rows=rows)
+                self.save(state)
+            elif state['rows'] < rows:
+                state = self.record(store.appended(rows - state['rows']), rows, base=state)
+        return state
+
+
+def keep_through_drop(store, snapshots, drop):
+    """
+    Run drop(), which removes old rows from the store (moved to another
+    tier) and returns the rows left, keeping the snapshots as they are:
+    they are brought up to date first and then re-pointed at the new row
+    count instead of being rebuilt. Call with the store's write lock held.
+    """
+    states = [snapshot.current(store) for snapshot in snapshots]
+    rows = drop()
+    for snapshot, state in zip(snapshots, states):
+        snapshot.save(dict(state, rows=rows))
+    return rows
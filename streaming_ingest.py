@@ -0,0 +1,121 @@
+import concurrent.futures
+import queue
+import threading
+import time
+
+# =========================
+# CONFIGURATION
+# =========================
+MICRO_BATCH_SIZE = 25  # Records per append to storage
+MAX_QUEUE_SIZE = 200  # Records buffered between fetchers and the writer (backpressure beyond this)
+FLUSH_INTERVAL_SECONDS = 1.0  # Write a partial batch if nothing else arrives for this long
+
+_DONE = object()
+
+
+class StreamingWriter:
+    """
+    Background writer fed through a bounded queue.
+    put() blocks once MAX_QUEUE_SIZE records are waiting, so fetchers can
+    never run ahead of storage; records are handed to write_batch(records)
+    in micro-batches as soon as a batch fills up or the flush interval passes.
+    """
+
+    def __init__(self, write_batch, batch_size=MICRO_BATCH_SIZE, max_queue=MAX_QUEUE_SIZE,
+                 flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.batches = 0
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name='streaming-writer', daemon=True)
+        self.thread.start()
+
+    def put(self, record):
+        if self.error:
+            raise self.error
+        self.queue.put(record)
+
+    def put_many(self, records):
+        for record in records:
+            self.put(record)
+
+    def flush(self, batch):
+        if not batch:
+            return
+        try:
+            # write_batch may return how many it kept (duplicates are dropped); None means all
+            written = self.write_batch(batch)
+            self.written += len(batch) if written is None else written
+            self.batches += 1
+        except Exception as e:
+            # Keep draining so producers never block forever; surface on next put()/close()
+            print(f"✗ Error writing micro-batch of {len(batch)} records: {e}")
+            self.error = e
+
+    def run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _DONE:
+                self.flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self.flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def close(self):
+        """Write whatever is left and wait for the writer; returns records written"""
+        self.queue.put(_DONE)
+        self.thread.join()
+        if self.error:
+            raise self.error
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_route_infos_threaded(routes, fetch_one, max_workers):
+    """Yield (route, (distance_m, duration_s)) in completion order from a thread pool"""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(fetch_one, route) for route in routes]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def stream_records(route_infos, build_records, writer, batch_size=MICRO_BATCH_SIZE):
+    """
+    Turn completed route lookups into records micro-batch by micro-batch
+    (so build_records can stay vectorized) and hand them to the writer.
+    Returns the number of records produced.
+    """
+    produced = 0
+    pending = []
+    for route_info in route_infos:
+        pending.append(route_info)
+        if len(pending) >= batch_size:
+            records = build_records(pending)
+            writer.put_many(records)
+            produced += len(records)
+            pending = []
+
+    if pending:
+        records = build_records(pending)
+        writer.put_many(records)
+        produced += len(records)
+    return produced
@@ -6,18 +6,43 @@ import time
 import os
 import schedule
 import random
-import concurrent.futures
-from threading import Lock
-import math
+from async_collector import collect_route_info, iter_route_info
+from osrm_table import collect_route_info_table
+from route_cache import RouteInfoCache
+from rate_limiter import TokenBucket, AimdConcurrencyLimiter
+from resilience import CircuitBreaker, backoff_delay, is_retryable_status
+from traffic_simulation import simulate_cycle
+from retention import compact_history
+from traffic_store import open_store
+from sampling_planner import AdaptiveSamplingPlanner
+from staggered_scheduler import MIN_SLOT_SECONDS, StaggeredSchedule, can_stagger
+from streaming_ingest import StreamingWriter, iter_route_infos_threaded, stream_records
 
 # Configuration
-COLLECTION_INTERVAL_MINUTES = 0  # How often to collect data
+COLLECTION_INTERVAL_MINUTES = 15  # How often to collect data
 CSV_FILENAME = 'abuja_traffic_data.csv'
-MAX_WORKERS = 5  # Number of parallel threads for route collection
-BATCH_SIZE = 20  # Process routes in batches to manage memory and API load
+PARQUET_DIR = 'abuja_traffic_parquet'
+SQLITE_FILENAME = 'abuja_traffic.db'
+STORAGE_BACKEND = 'csv'  # 'csv', 'parquet' (date-partitioned) or 'sqlite' (indexed, WAL); see migrate_storage.py
+STORAGE_PATHS = {'csv': CSV_FILENAME, 'parquet': PARQUET_DIR, 'sqlite': SQLITE_FILENAME}
+MAX_WORKERS = 16  # Upper bound on parallel threads; the adaptive limiter decides how many are active
+MAX_REQUESTS_PER_SECOND = 10  # Shared token-bucket rate for all OSRM requests
+COLLECTION_MODE = 'async'  # 'async' (pooled asyncio client), 'table' (batched matrix calls) or 'threads'
+MAX_IN_FLIGHT = 32  # Concurrent OSRM requests in async mode
+REQUEST_TIMEOUT = 15  # Seconds per OSRM request
+MAX_RETRIES = 2  # Jittered exponential-backoff retries on timeouts, 429 and 5xx
+USE_ROUTE_CACHE = True  # Serve base distance/duration from disk, refresh in background
+ROUTE_CACHE_FILE = 'route_cache.json'
+VECTORIZED_SIMULATION = True  # Simulate every route of a cycle in one NumPy call
+SIMULATION_SEED = None  # Set an int for reproducible per-route traffic draws
+STREAMING_INGEST = True  # Append records in micro-batches as routes complete instead of once per sweep
+STAGGERED_COLLECTION = True  # Sample each route at its own offset within the interval instead of all at once
+ADAPTIVE_SAMPLING = True  # Poll volatile routes more often and stable ones less, same request budget
+RAW_RETENTION_DAYS = 30  # Older raw rows are rolled up hourly and moved to the compressed cold tier (None: keep all)
 
-# OSRM API endpoint (free, no API key needed)
+# OSRM API endpoints (free, no API key needed)
 OSRM_BASE_URL = "http://router.project-osrm.org/route/v1/driving/"
+OSRM_TABLE_URL = "http://router.project-osrm.org/table/v1/driving/"
 
 # Define comprehensive Abuja routes with coordinates (lat, lon)
 # Format: (origin_coords, destination_coords, route_name, origin_name, destination_name)
@@ -161,147 +186,275 @@ ABUJA_ROUTES = [
     ([7.4950, 9.0450], [7.5010, 9.0420], "Area 2 to Area 3", "Area 2", "Area 3"),
     ([7.4422, 9.0704], [7.4490, 9.0850], "Utako to Wuye", "Utako", "Wuye"),
 ]
-@app.route("/report")
-def report():
-    stats = generate_statistics()
+traffic_store = open_store(STORAGE_BACKEND, STORAGE_PATHS[STORAGE_BACKEND])
+# Store writer lock: held across threads and processes (flock on a sidecar .lock file)
+file_lock = traffic_store.lock
 
-    if not stats:
-        return "No data available yet."
+# Persistent cache of static OSRM distance/duration per coordinate pair
+route_cache = RouteInfoCache(ROUTE_CACHE_FILE)
 
-    return render_template(
-        "report.html",
-        stats=stats
-    )
-
-# Thread-safe lock for file operations
-file_lock = Lock()
-def generate_statistics():
-    if not os.path.exists(CSV_FILENAME):
-        return None
+# Shared request rate and AIMD concurrency limits (replace the fixed sleeps between batches)
+rate_limiter = TokenBucket(MAX_REQUESTS_PER_SECOND)
+concurrency_limiter = AimdConcurrencyLimiter(max_limit=max(MAX_WORKERS, MAX_IN_FLIGHT))
 
-    df = pd.read_csv(CSV_FILENAME)
+# Fails fast once OSRM is unhealthy so routes fall back to cached info instead of timing out
+osrm_breaker = CircuitBreaker()
+if COLLECTION_INTERVAL_MINUTES <= 0:
+    raise ValueError(f"COLLECTION_INTERVAL_MINUTES must be positive, got {COLLECTION_INTERVAL_MINUTES}")
+collection_schedule = StaggeredSchedule(ABUJA_ROUTES, COLLECTION_INTERVAL_MINUTES * 60)
+# Staggering needs a slot per route; shorter intervals collect all routes in one burst
+staggered_collection = STAGGERED_COLLECTION and can_stagger(len(ABUJA_ROUTES), COLLECTION_INTERVAL_MINUTES * 60)
+sampling_planner = AdaptiveSamplingPlanner([route[2] for route in ABUJA_ROUTES])
+last_retention_date = None
 
-    stats = {
-        "total_records": len(df),
-        "date_range": f"{df['date'].min()} to {df['date'].max()}",
-        "unique_routes": df['route_name'].nunique(),
-        "traffic_distribution": df['traffic_status'].value_counts().to_dict(),
-        "avg_delay_by_hour": df.groupby('hour')['delay_minutes'].mean().round(2).to_dict()
-    }
+def generate_statistics(route=None, day=None):
+    if not traffic_store.exists():
+        return None
 
-    return stats
+    # Running aggregates kept up to date by every append (all tiers, no data is read)
+    return traffic_store.aggregates.statistics(traffic_store, route=route, day=day)
 
 def get_route_info(origin_coords, destination_coords):
-    """Get route information from OSRM"""
+    """
+    Get route information from OSRM.
+    Timeouts, 429 and 5xx responses are retried with jittered backoff; while
+    the circuit breaker is open no request is made at all. Returns None when
+    OSRM can't answer; callers fall back through route_cache.with_fallback.
+    """
     
     # Format: lon,lat;lon,lat
     coords_str = f"{origin_coords[0]},{origin_coords[1]};{destination_coords[0]},{destination_coords[1]}"
     url = f"{OSRM_BASE_URL}{coords_str}?overview=false"
     
-    try:
-        response = requests.get(url, timeout=15)
+    for attempt in range(MAX_RETRIES + 1):
+        if not osrm_breaker.allow_request():
+            break
         
-        if response.status_code == 200:
-            data = response.json()
+        try:
+            rate_limiter.acquire()
+            with concurrency_limiter.request() as outcome:
+                response = requests.get(url, timeout=REQUEST_TIMEOUT)
+                outcome['status_code'] = response.status_code
             
-            if data['code'] == 'Ok' and len(data['routes']) > 0:
-                route = data['routes'][0]
-                
-                distance_meters = route['distance']
-                duration_seconds = route['duration']
+            if response.status_code == 200:
+                osrm_breaker.record_success()
+                data = response.json()
                 
-                return {
-                    'distance_meters': distance_meters,
-                    'duration_seconds': duration_seconds
-                }
-        
-        return None
+                if data['code'] == 'Ok' and len(data['routes']) > 0:
+                    route = data['routes'][0]
+                    
+                    distance_meters = route['distance']
+                    duration_seconds = route['duration']
+                    
+                    return {
+                        'distance_meters': distance_meters,
+                        'duration_seconds': duration_seconds
+                    }
+                return None
+            
+            if not is_retryable_status(response.status_code):
+                osrm_breaker.record_success()
+                return None
+            
+            print(f"OSRM returned {response.status_code} (attempt {attempt + 1})")
+            
+        except requests.RequestException as e:
+            print(f"Error fetching route (attempt {attempt + 1}): {str(e)}")
+        except Exception as e:
+            print(f"Error fetching route: {str(e)}")
+            return None
         
+        osrm_breaker.record_failure()
+        if attempt < MAX_RETRIES:
+            time.sleep(backoff_delay(attempt))
+    
+    return None
+
+def fetch_single_route(route_data):
+    """(route, (distance_m, duration_s)) for one route via get_route_info"""
+    try:
+        route_info = get_route_info(route_data[0], route_data[1])
     except Exception as e:
-        print(f"Error fetching route: {str(e)}")
+        print(f"✗ Error collecting data for {route_data[2]}: {str(e)}")
+        route_info = None
+    
+    if route_info:
+        return route_data, (route_info['distance_meters'], route_info['duration_seconds'])
+    return route_data, (None, None)
+
+def build_route_record(route_data, current_time, route_info):
+    """Turn OSRM route info for one route into a traffic record (None if no route)"""
+    origin_coords, dest_coords, route_name, origin_name, dest_name = route_data
+    
+    if route_info:
+        distance_meters = route_info['distance_meters']
+        distance_km = distance_meters / 1000
+        
+        base_duration_seconds = route_info['duration_seconds']
+        base_duration_minutes = base_duration_seconds / 60
+        
+        # Simulate traffic conditions
+        day_of_week = current_time.strftime('%A')
+        duration_in_traffic_minutes, traffic_multiplier = simulate_traffic_conditions(
+            current_time.hour, 
+            day_of_week, 
+            base_duration_minutes
+        )
+        
+        # Calculate delay
+        delay_minutes = duration_in_traffic_minutes - base_duration_minutes
+        
+        # Determine traffic status
+        if delay_minutes < 5:
+            traffic_status = "No Traffic"
+        elif delay_minutes < 15:
+            traffic_status = "Light Traffic"
+        elif delay_minutes < 30:
+            traffic_status = "Moderate Traffic"
+        else:
+            traffic_status = "Heavy Traffic"
+        
+        # Calculate average speed
+        avg_speed_kmh = (distance_km / duration_in_traffic_minutes) * 60 if duration_in_traffic_minutes > 0 else 0
+        
+        # Record data
+        record = make_record(
+            route_data, current_time, distance_km, base_duration_minutes,
+            duration_in_traffic_minutes, delay_minutes, avg_speed_kmh,
+            traffic_status, traffic_multiplier
+        )
+        
+        print(f"✓ {route_name}: {traffic_status} (Delay: {delay_minutes:.1f} min)")
+        return record
+    else:
+        print(f"✗ No route found for {route_name}")
         return None
 
+def make_record(route_data, current_time, distance_km, base_duration_minutes,
+                duration_in_traffic_minutes, delay_minutes, avg_speed_kmh,
+                traffic_status, traffic_multiplier):
+    """Assemble one CSV row"""
+    return {
+        'timestamp': current_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'date': current_time.strftime('%Y-%m-%d'),
+        'time': current_time.strftime('%H:%M:%S'),
+        'day_of_week': current_time.strftime('%A'),
+        'hour': current_time.hour,
+        'is_weekend': 1 if current_time.weekday() >= 5 else 0,
+        'is_rush_hour': 1 if (7 <= current_time.hour <= 9) or (17 <= current_time.hour <= 19) else 0,
+        'route_name': route_data[2],
+        'origin': route_data[3],
+        'destination': route_data[4],
+        'distance_km': round(float(distance_km), 2),
+        'duration_minutes': round(float(base_duration_minutes), 2),
+        'duration_in_traffic_minutes': round(float(duration_in_traffic_minutes), 2),
+        'delay_minutes': round(float(delay_minutes), 2),
+        'avg_speed_kmh': round(float(avg_speed_kmh), 2),
+        'traffic_status': str(traffic_status),
+        'traffic_multiplier': round(float(traffic_multiplier), 2)
+    }
+
 def process_route_batch(route_batch, current_time):
-    """Process a batch of routes in parallel"""
+    """Process a batch of routes in parallel (pacing is left to the shared limiters)"""
+    def fetch_many(batch):
+        return list(iter_route_infos_threaded(batch, fetch_single_route, MAX_WORKERS))
+    
+    # Fetch routes in parallel (through the route cache), then simulate the whole batch at once
+    return build_route_records(fetch_route_infos(route_batch, fetch_many), current_time)
+
+def fetch_route_infos(routes, fetch_many):
+    """Run a batch fetcher, going through the route cache when it is enabled"""
+    if USE_ROUTE_CACHE:
+        return route_cache.lookup_routes(routes, fetch_many)
+    
+    # Routes OSRM couldn't answer fall back to their last cached route info
+    return list(route_cache.with_fallback(fetch_many(routes)))
+
+def process_routes_async(routes, current_time):
+    """Process routes on one pooled asyncio HTTP client instead of worker threads"""
+    def fetch_many(batch):
+        return collect_route_info(
+            batch,
+            max_in_flight=MAX_IN_FLIGHT,
+            timeout=REQUEST_TIMEOUT,
+            base_url=OSRM_BASE_URL,
+            bucket=rate_limiter,
+            limiter=concurrency_limiter,
+            breaker=osrm_breaker,
+            max_retries=MAX_RETRIES
+        )
+    return build_route_records(fetch_route_infos(routes, fetch_many), current_time)
+
+def process_routes_table(routes, current_time):
+    """Process routes with a handful of OSRM table calls over the unique coordinates"""
+    def fetch_many(batch):
+        return collect_route_info_table(
+            batch,
+            table_url=OSRM_TABLE_URL,
+            timeout=REQUEST_TIMEOUT
+        )
+    return build_route_records(fetch_route_infos(routes, fetch_many), current_time)
+
+def build_route_records(route_infos, current_time):
+    """Fan (route, (distance_m, duration_s)) lookups back out to per-route records"""
+    if VECTORIZED_SIMULATION:
+        return build_route_records_vectorized(route_infos, current_time)
+    
     data_records = []
     
-    def process_single_route(route_data):
-        origin_coords, dest_coords, route_name, origin_name, dest_name = route_data
+    for route_data, (distance_meters, duration_seconds) in route_infos:
+        route_info = None
+        if distance_meters is not None and duration_seconds is not None:
+            route_info = {
+                'distance_meters': distance_meters,
+                'duration_seconds': duration_seconds
+            }
         
         try:
-            # Get route information from OSRM
-            route_info = get_route_info(origin_coords, dest_coords)
-            
-            if route_info:
-                distance_meters = route_info['distance_meters']
-                distance_km = distance_meters / 1000
-                
-                base_duration_seconds = route_info['duration_seconds']
-                base_duration_minutes = base_duration_seconds / 60
-                
-                # Simulate traffic conditions
-                day_of_week = current_time.strftime('%A')
-                duration_in_traffic_minutes, traffic_multiplier = simulate_traffic_conditions(
-                    current_time.hour, 
-                    day_of_week, 
-                    base_duration_minutes
-                )
-                
-                # Calculate delay
-                delay_minutes = duration_in_traffic_minutes - base_duration_minutes
-                
-                # Determine traffic status
-                if delay_minutes < 5:
-                    traffic_status = "No Traffic"
-                elif delay_minutes < 15:
-                    traffic_status = "Light Traffic"
-                elif delay_minutes < 30:
-                    traffic_status = "Moderate Traffic"
-                else:
-                    traffic_status = "Heavy Traffic"
-                
-                # Calculate average speed
-                avg_speed_kmh = (distance_km / duration_in_traffic_minutes) * 60 if duration_in_traffic_minutes > 0 else 0
-                
-                # Record data
-                record = {
-                    'timestamp': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'date': current_time.strftime('%Y-%m-%d'),
-                    'time': current_time.strftime('%H:%M:%S'),
-                    'day_of_week': day_of_week,
-                    'hour': current_time.hour,
-                    'is_weekend': 1 if current_time.weekday() >= 5 else 0,
-                    'is_rush_hour': 1 if (7 <= current_time.hour <= 9) or (17 <= current_time.hour <= 19) else 0,
-                    'route_name': route_name,
-                    'origin': origin_name,
-                    'destination': dest_name,
-                    'distance_km': round(distance_km, 2),
-                    'duration_minutes': round(base_duration_minutes, 2),
-                    'duration_in_traffic_minutes': round(duration_in_traffic_minutes, 2),
-                    'delay_minutes': round(delay_minutes, 2),
-                    'avg_speed_kmh': round(avg_speed_kmh, 2),
-                    'traffic_status': traffic_status,
-                    'traffic_multiplier': round(traffic_multiplier, 2)
-                }
-                
-                print(f"✓ {route_name}: {traffic_status} (Delay: {delay_minutes:.1f} min)")
-                return record
-            else:
-                print(f"✗ No route found for {route_name}")
-                return None
-                
+            record = build_route_record(route_data, current_time, route_info)
         except Exception as e:
-            print(f"✗ Error collecting data for {route_name}: {str(e)}")
-            return None
-    
-    # Process routes in parallel
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [executor.submit(process_single_route, route) for route in route_batch]
+            print(f"✗ Error collecting data for {route_data[2]}: {str(e)}")
+            record = None
         
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                data_records.append(result)
+        if record:
+            data_records.append(record)
+    
+    return data_records
+
+def build_route_records_vectorized(route_infos, current_time):
+    """Same records as build_route_records, with one simulate_cycle call for all routes"""
+    found = []
+    for route_data, (distance_meters, duration_seconds) in route_infos:
+        if distance_meters is None or duration_seconds is None:
+            print(f"✗ No route found for {route_data[2]}")
+        else:
+            found.append((route_data, distance_meters, duration_seconds))
+    
+    if not found:
+        return []
+    
+    distance_km = [distance_meters / 1000 for _, distance_meters, _ in found]
+    base_duration_minutes = [duration_seconds / 60 for _, _, duration_seconds in found]
+    simulated = simulate_cycle(
+        [route_data[2] for route_data, _, _ in found],
+        base_duration_minutes,
+        distance_km,
+        current_time,
+        seed=SIMULATION_SEED
+    )
+    
+    data_records = []
+    for i, (route_data, _, _) in enumerate(found):
+        record = make_record(
+            route_data, current_time, distance_km[i], base_duration_minutes[i],
+            simulated['duration_in_traffic_minutes'][i],
+            simulated['delay_minutes'][i],
+            simulated['avg_speed_kmh'][i],
+            simulated['traffic_status'][i],
+            simulated['traffic_multiplier'][i]
+        )
+        print(f"✓ {record['route_name']}: {record['traffic_status']} (Delay: {record['delay_minutes']:.1f} min)")
+        data_records.append(record)
     
     return data_records
 
@@ -358,65 +511,178 @@ def collect_traffic_data():
     print(f"\n{'='*80}")
     print(f"Collecting traffic data at {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Total routes to process: {len(ABUJA_ROUTES)}")
-    print(f"Using {MAX_WORKERS} parallel workers")
-    print(f"{'='*80}")
     
-    # Split routes into batches
-    total_routes = len(ABUJA_ROUTES)
-    num_batches = math.ceil(total_routes / BATCH_SIZE)
+    concurrency_limiter.reset_stats()
     
-    for batch_num in range(num_batches):
-        start_idx = batch_num * BATCH_SIZE
-        end_idx = min((batch_num + 1) * BATCH_SIZE, total_routes)
-        route_batch = ABUJA_ROUTES[start_idx:end_idx]
-        
-        print(f"\nProcessing batch {batch_num + 1}/{num_batches} ({len(route_batch)} routes)...")
-        
-        batch_records = process_route_batch(route_batch, current_time)
-        all_data_records.extend(batch_records)
+    if COLLECTION_MODE in ('async', 'table'):
+        if COLLECTION_MODE == 'async':
+            print(f"Using async collector ({MAX_IN_FLIGHT} requests in flight)")
+            print(f"{'='*80}")
+            all_data_records = process_routes_async(ABUJA_ROUTES, current_time)
+        else:
+            print("Using OSRM table service")
+            print(f"{'='*80}")
+            all_data_records = process_routes_table(ABUJA_ROUTES, current_time)
         
-        # Small delay between batches to be respectful to free API
-        if batch_num < num_batches - 1:  # Don't delay after last batch
-            time.sleep(1)
+        route_cache.save()
+        print(f"\n✓ Completed processing all {len(ABUJA_ROUTES)} routes")
+        print(f"✓ Successfully collected {len(all_data_records)} records")
+        print_request_rate()
+        return all_data_records
+    
+    print(f"Using up to {MAX_WORKERS} parallel workers at {MAX_REQUESTS_PER_SECOND} requests/sec")
+    print(f"{'='*80}")
+    
+    all_data_records = process_route_batch(ABUJA_ROUTES, current_time)
+    
+    route_cache.save()
     
     print(f"\n✓ Completed processing all {len(ABUJA_ROUTES)} routes")
     print(f"✓ Successfully collected {len(all_data_records)} records")
+    print_request_rate()
     
     return all_data_records
 
-def save_to_csv(data_records, filename=CSV_FILENAME):
-    """Save collected data to CSV file with thread safety"""
+def print_request_rate():
+    """Report the OSRM request rate achieved during the current cycle"""
+    stats = concurrency_limiter.stats()
+    print(f"✓ OSRM requests: {stats['requests']} in {stats['elapsed_seconds']}s "
+          f"({stats['requests_per_second']} req/s, {stats['throttled']} throttled, "
+          f"concurrency limit {stats['concurrency_limit']})")
+
+def append_records(data_records):
+    """Append records to the configured storage backend under the file lock; returns the number written"""
+    # Use lock to ensure thread-safe file operations (duplicates already stored are dropped)
+    with file_lock:
+        written = traffic_store.append(data_records)
+    
+    sampling_planner.observe(data_records)
+    return written
+
+def save_to_csv(data_records):
+    """Save collected data to the configured storage backend with thread safety"""
     
     if not data_records:
         print("No data to save.")
         return
     
-    df = pd.DataFrame(data_records)
+    created = not traffic_store.exists()
+    written = append_records(data_records)
+    if created:
+        print(f"✓ Created {traffic_store.path} with {written} records")
+    else:
+        print(f"✓ Appended {written} records to {traffic_store.path}")
     
-    # Use lock to ensure thread-safe file operations
-    with file_lock:
-        # Check if file exists to append or create new
-        if os.path.exists(filename):
-            # Append to existing file
-            df.to_csv(filename, mode='a', header=False, index=False)
-            print(f"✓ Appended {len(data_records)} records to {filename}")
-        else:
-            # Create new file
-            df.to_csv(filename, index=False)
-            print(f"✓ Created {filename} with {len(data_records)} records")
-        
-        # Show total records
-        total_records = len(pd.read_csv(filename))
-        print(f"Total records in file: {total_records}")
+    # Show total records (kept in the store manifest, no re-read)
+    print(f"Total records in storage: {traffic_store.summary()['rows']}")
+    
+    print(f"{'='*80}\n")
+
+def iter_route_infos(routes):
+    """Yield (route, (distance_m, duration_s)) as lookups complete, for the configured COLLECTION_MODE"""
+    if COLLECTION_MODE == 'async':
+        def iter_fetch(batch):
+            return iter_route_info(
+                batch,
+                max_in_flight=MAX_IN_FLIGHT,
+                timeout=REQUEST_TIMEOUT,
+                base_url=OSRM_BASE_URL,
+                bucket=rate_limiter,
+                limiter=concurrency_limiter,
+                breaker=osrm_breaker,
+                max_retries=MAX_RETRIES
+            )
+    elif COLLECTION_MODE == 'table':
+        def iter_fetch(batch):
+            # A handful of matrix calls - nothing to gain from streaming inside them
+            return iter(collect_route_info_table(batch, table_url=OSRM_TABLE_URL, timeout=REQUEST_TIMEOUT))
+    else:
+        def iter_fetch(batch):
+            return iter_route_infos_threaded(batch, fetch_single_route, MAX_WORKERS)
+    
+    if USE_ROUTE_CACHE:
+        yield from route_cache.iter_routes(routes, iter_fetch)
+        return
+    
+    # Routes OSRM couldn't answer fall back to their last cached route info
+    yield from route_cache.with_fallback(iter_fetch(routes))
+
+def collect_and_save_streaming():
+    """Collect all routes and append records in micro-batches as they complete"""
+    current_time = datetime.now()
     
+    print(f"\n{'='*80}")
+    print(f"Streaming traffic data at {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Total routes to process: {len(ABUJA_ROUTES)} ({COLLECTION_MODE} mode)")
+    print(f"{'='*80}")
+    
+    concurrency_limiter.reset_stats()
+    
+    writer = stream_routes(ABUJA_ROUTES, current_time)
+    
+    print(f"\n✓ Streamed {writer.written} records to {traffic_store.path} in {writer.batches} micro-batches")
+    print_request_rate()
     print(f"{'='*80}\n")
+    return writer.written
+
+def stream_routes(routes, current_time):
+    """Fetch routes and append their records through a StreamingWriter; returns the closed writer"""
+    writer = StreamingWriter(append_records)
+    try:
+        stream_records(
+            iter_route_infos(routes),
+            lambda route_infos: build_route_records(route_infos, current_time),
+            writer
+        )
+    finally:
+        writer.close()
+        route_cache.save()
+    return writer
+
+def run_retention(now=None):
+    """Once per calendar day: roll up and move raw rows older than RAW_RETENTION_DAYS"""
+    global last_retention_date
+    today = (now or datetime.now()).date()
+    if RAW_RETENTION_DAYS is None or last_retention_date == today:
+        return
+    last_retention_date = today
+    try:
+        compact_history(traffic_store, RAW_RETENTION_DAYS)
+    except Exception as e:
+        print(f"✗ Error in retention: {str(e)}")
+
+def collect_slot(routes, slot_time):
+    """Staggered job - sample only the routes whose phase falls in this slot"""
+    run_retention(slot_time)
+    try:
+        start_time = time.time()
+        if ADAPTIVE_SAMPLING and sampling_planner.apply(collection_schedule):
+            print_schedule_summary()
+        writer = stream_routes(routes, slot_time)
+        print(f"✓ {slot_time.strftime('%H:%M:%S')} {len(routes)} routes -> {writer.written} records "
+              f"({time.time() - start_time:.2f}s)")
+    except Exception as e:
+        print(f"✗ Error in staggered collection: {str(e)}")
+
+def print_schedule_summary():
+    """Show which routes the adaptive planner currently polls most and least often"""
+    plan = sorted(collection_schedule.plan(), key=lambda entry: entry['interval_seconds'])
+    if len(plan) < 2 or plan[0]['interval_seconds'] == plan[-1]['interval_seconds']:
+        return
+    fastest = ", ".join(f"{e['route_name']} ({e['interval_seconds']:.0f}s)" for e in plan[:3])
+    slowest = ", ".join(f"{e['route_name']} ({e['interval_seconds']:.0f}s)" for e in plan[-3:])
+    print(f"Sampling plan - most often: {fastest}; least often: {slowest}")
 
 def collection_job():
     """Job to be scheduled - collects and saves data"""
+    run_retention()
     try:
         start_time = time.time()
-        data_records = collect_traffic_data()
-        save_to_csv(data_records)
+        if STREAMING_INGEST:
+            collect_and_save_streaming()
+        else:
+            data_records = collect_traffic_data()
+            save_to_csv(data_records)
         end_time = time.time()
         
         print(f"Collection completed in {end_time - start_time:.2f} seconds")
@@ -426,19 +692,21 @@ def collection_job():
 
 def display_statistics():
     """Display current dataset statistics"""
-    if os.path.exists(CSV_FILENAME):
+    if traffic_store.exists():
         try:
-            df = pd.read_csv(CSV_FILENAME)
+            stats = generate_statistics()
             print("\n" + "="*80)
             print("CURRENT DATASET STATISTICS")
             print("="*80)
-            print(f"Total Records: {len(df)}")
-            print(f"Date Range: {df['date'].min()} to {df['date'].max()}")
-            print(f"Unique Routes: {df['route_name'].nunique()}")
+            print(f"Total Records: {stats['total_records']}")
+            print(f"Date Range: {stats['date_range']}")
+            print(f"Unique Routes: {stats['unique_routes']}")
             print(f"\nTraffic Status Distribution:")
-            print(df['traffic_status'].value_counts())
+            for status, count in stats['traffic_distribution'].items():
+                print(f"  {status}: {count}")
             print("\nAverage Delay by Hour:")
-            print(df.groupby('hour')['delay_minutes'].mean().round(2))
+            for hour, delay in stats['avg_delay_by_hour'].items():
+                print(f"  {hour:02d}:00  {delay}")
             print("="*80 + "\n")
         except Exception as e:
             print(f"Error reading statistics: {e}")
@@ -451,9 +719,10 @@ def main():
     print("="*80)
     print(f"Collection Interval: Every {COLLECTION_INTERVAL_MINUTES} minutes")
     print(f"Total Routes: {len(ABUJA_ROUTES)}")
+    print(f"Collection Mode: {COLLECTION_MODE}")
     print(f"Parallel Workers: {MAX_WORKERS}")
-    print(f"Batch Size: {BATCH_SIZE}")
-    print(f"Output File: {CSV_FILENAME}")
+    print(f"Request Rate Limit: {MAX_REQUESTS_PER_SECOND} requests/sec")
+    print(f"Output: {traffic_store.path} ({STORAGE_BACKEND})")
     print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Data Source: OpenStreetMap + Simulated Traffic")
     print("="*80)
@@ -461,9 +730,21 @@ def main():
     print("Press Ctrl+C to stop the collector\n")
     
     # Show existing statistics if file exists
-    if os.path.exists(CSV_FILENAME):
+    if traffic_store.exists():
         display_statistics()
     
+    if STAGGERED_COLLECTION and not staggered_collection:
+        print(f"Staggering off: {COLLECTION_INTERVAL_MINUTES} minutes is less than one "
+              f"{MIN_SLOT_SECONDS}s slot per route\n")
+    if staggered_collection:
+        print(f"Staggered over {collection_schedule.n_slots} slots of {collection_schedule.slot_seconds:.1f}s "
+              f"(each route once every {COLLECTION_INTERVAL_MINUTES} minutes)\n")
+        try:
+            collection_schedule.run(collect_slot)
+        except KeyboardInterrupt:
+            print_goodbye()
+        return
+    
     # Run first collection immediately
     print("Running initial data collection...")
     collection_job()
@@ -480,15 +761,18 @@ def main():
             schedule.run_pending()
             time.sleep(1)
     except KeyboardInterrupt:
-        print("\n" + "="*80)
-        print("Data collection stopped by user")
-        print("="*80)
-        
-        # Show final statistics
-        if os.path.exists(CSV_FILENAME):
-            display_statistics()
-        
-        print("Goodbye!")
+        print_goodbye()
+
+def print_goodbye():
+    print("\n" + "="*80)
+    print("Data collection stopped by user")
+    print("="*80)
+    
+    # Show final statistics
+    if traffic_store.exists():
+        display_statistics()
+    
+    print("Goodbye!")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
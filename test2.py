@@ -1,13 +1,30 @@
 
-from flask import Flask, jsonify, send_file, render_template
+from flask import Flask, Response, jsonify, request, render_template
+import json
 import requests
 import pandas as pd
 from datetime import datetime
 import os
+import time
 import random
 import concurrent.futures
-from threading import Lock
 from flask_apscheduler import APScheduler
+from async_collector import collect_route_info, iter_route_info
+from osrm_table import collect_route_info_table
+from route_cache import RouteInfoCache
+from resilience import CircuitBreaker, backoff_delay, is_retryable_status
+from traffic_simulation import simulate_cycle
+from retention import compact_history, read_hourly
+from traffic_store import open_store
+from collector_metrics import CollectorMetrics
+from http_cache import VersionedResponses, data_version
+from traffic_export import (EXPORT_FORMATS, ExportLengths, available_encodings, choose_encoding, export_stream,
+                            parse_export_args)
+from leader_lease import LeaderLease
+from store_lock import replace_text
+from sampling_planner import AdaptiveSamplingPlanner
+from staggered_scheduler import StaggeredSchedule, can_stagger
+from streaming_ingest import StreamingWriter, iter_route_infos_threaded, stream_records
 
 scheduler = APScheduler()
 
@@ -15,11 +32,40 @@ scheduler = APScheduler()
 # CONFIGURATION
 # =========================
 CSV_FILENAME = 'abuja_traffic_data.csv'
+PARQUET_DIR = 'abuja_traffic_parquet'
+SQLITE_FILENAME = 'abuja_traffic.db'
+STORAGE_BACKEND = 'csv'  # 'csv', 'parquet' (date-partitioned) or 'sqlite' (indexed, WAL); see migrate_storage.py
+STORAGE_PATHS = {'csv': CSV_FILENAME, 'parquet': PARQUET_DIR, 'sqlite': SQLITE_FILENAME}
 MAX_WORKERS = 5
 OSRM_BASE_URL = "https://router.project-osrm.org/route/v1/driving/"
-
-file_lock = Lock()
+OSRM_TABLE_URL = "https://router.project-osrm.org/table/v1/driving/"
+COLLECTION_MODE = 'async'  # 'async' (pooled asyncio client), 'table' (batched matrix calls) or 'threads'
+MAX_IN_FLIGHT = 32  # Concurrent OSRM requests in async mode
+REQUEST_TIMEOUT = 15  # Seconds per OSRM request
+MAX_RETRIES = 2  # Jittered exponential-backoff retries on timeouts, 429 and 5xx
+USE_ROUTE_CACHE = True  # Serve base distance/duration from disk, refresh in background
+ROUTE_CACHE_FILE = 'route_cache.json'
+VECTORIZED_SIMULATION = True  # Simulate every route of a cycle in one NumPy call
+SIMULATION_SEED = None  # Set an int for reproducible per-route traffic draws
+STREAMING_INGEST = True  # Append records in micro-batches as routes complete
+COLLECTION_INTERVAL_MINUTES = 15
+STAGGERED_COLLECTION = True  # Sample each route at its own offset within the interval, not all at once
+ADAPTIVE_SAMPLING = True  # Poll volatile routes more often and stable ones less, same request budget
+LEASE_FILE = 'collector.lease'  # Only the worker holding this lock runs the scheduler
+METRICS_SNAPSHOT_FILE = 'collector_metrics.prom'  # The leader's metrics, served by every worker's /metrics
+SCHEDULE_SNAPSHOT_FILE = 'collection_schedule.json'  # The leader's sampling plan, served by every worker's /schedule
+RAW_RETENTION_DAYS = 30  # Older raw rows are rolled up hourly and moved to the compressed cold tier (None: keep all)
+RETENTION_HOUR = 3  # Local hour of the daily retention job
+
+traffic_store = open_store(STORAGE_BACKEND, STORAGE_PATHS[STORAGE_BACKEND])
+file_lock = traffic_store.lock  # Serializes appends across threads and gunicorn workers
+route_cache = RouteInfoCache(ROUTE_CACHE_FILE)
+osrm_breaker = CircuitBreaker()
+collector_metrics = CollectorMetrics()
 app = Flask(__name__)
+# Data views are versioned by the store manifest, which every ingest bumps: repeat polls get a 304 or a cached body
+http_cache = VersionedResponses(lambda: data_version(traffic_store.summary()))
+export_lengths = ExportLengths()  # Export sizes for resumed (Range) downloads
 
 # =========================
 # ROUTES DATA
@@ -94,45 +140,118 @@ ABUJA_ROUTES = [
 # HELPER FUNCTIONS
 # =========================
 
+def publish_collector_state():
+    """Leader: snapshot what only the collecting process knows, for every worker to serve"""
+    try:
+        replace_text(METRICS_SNAPSHOT_FILE, collector_metrics.render())
+        replace_text(SCHEDULE_SNAPSHOT_FILE, json.dumps(schedule_plan()))
+    except OSError as e:
+        print(f"✗ Could not publish collector state: {e}")
+
 def scheduled_collection():
-    with app.app_context():
-        print(f"Auto-collecting traffic at {datetime.now()}")
-        data = collect_traffic_data()
-        saved = save_to_csv(data)
-        print(f"Saved {saved} records automatically.")
+    if not collector_lease.is_leader:
+        return
+    try:
+        with app.app_context():
+            print(f"Auto-collecting traffic at {datetime.now()}")
+            if STREAMING_INGEST:
+                saved = collect_and_save_streaming()
+            else:
+                saved = save_to_csv(collect_traffic_data())
+            print(f"Saved {saved} records automatically.")
+    finally:
+        publish_collector_state()
+
+def scheduled_slot_collection():
+    """Staggered job: runs every slot and samples only the routes due in it"""
+    if not collector_lease.is_leader:
+        return
+    try:
+        if ADAPTIVE_SAMPLING:
+            sampling_planner.apply(collection_schedule)
+        routes, slot_time = collection_schedule.take_due()
+        if not routes:
+            return
+        with app.app_context():
+            saved = collect_and_save_streaming(routes, slot_time)
+            print(f"Saved {saved} records for {len(routes)} staggered routes at {slot_time:%H:%M:%S}.")
+    finally:
+        publish_collector_state()
+
+def scheduled_retention():
+    """Daily job: roll up and move raw rows older than RAW_RETENTION_DAYS"""
+    if not collector_lease.is_leader:
+        return
+    compact_history(traffic_store, RAW_RETENTION_DAYS)
 
 # Configure the scheduler
 app.config['SCHEDULER_API_ENABLED'] = True
 scheduler.init_app(app)
-scheduler.add_job(id='traffic_job', func=scheduled_collection, trigger='interval', minutes=15)
-scheduler.start()
-
-def generate_statistics():
-    if not os.path.exists(CSV_FILENAME):
+if COLLECTION_INTERVAL_MINUTES <= 0:
+    raise ValueError(f"COLLECTION_INTERVAL_MINUTES must be positive, got {COLLECTION_INTERVAL_MINUTES}")
+collection_schedule = StaggeredSchedule(ABUJA_ROUTES, COLLECTION_INTERVAL_MINUTES * 60)
+sampling_planner = AdaptiveSamplingPlanner([route[2] for route in ABUJA_ROUTES])
+# Staggering needs a slot per route; shorter intervals collect all routes in one burst
+staggered_collection = STAGGERED_COLLECTION and can_stagger(len(ABUJA_ROUTES), COLLECTION_INTERVAL_MINUTES * 60)
+if staggered_collection:
+    scheduler.add_job(id='traffic_slot_job', func=scheduled_slot_collection, trigger='interval',
+                      seconds=collection_schedule.slot_seconds)
+else:
+    scheduler.add_job(id='traffic_job', func=scheduled_collection, trigger='interval',
+                      minutes=COLLECTION_INTERVAL_MINUTES)
+if RAW_RETENTION_DAYS is not None:
+    scheduler.add_job(id='retention_job', func=scheduled_retention, trigger='cron', hour=RETENTION_HOUR)
+
+# Under gunicorn every worker runs start_collector() (gunicorn.conf.py); only the lease
+# holder runs the jobs, and a follower takes over if the leader dies. Importing this
+# module (benchmarks, scripts) starts nothing.
+collector_lease = LeaderLease(LEASE_FILE)
+
+def on_elected():
+    scheduler.start()
+    publish_collector_state()
+
+def start_collector():
+    """Join the collector election; the scheduler starts in this process once it holds the lease"""
+    if collector_lease.thread is None and not collector_lease.is_leader:
+        collector_lease.run_when_elected(on_elected)
+    return collector_lease
+
+def generate_statistics(route=None, day=None):
+    if not traffic_store.exists():
         return None
 
-    df = pd.read_csv(CSV_FILENAME)
-    stats = {
-        "total_records": len(df),
-        "date_range": f"{df['timestamp'].min()} to {df['timestamp'].max()}",
-        "unique_routes": df['route_name'].nunique(),
-        "traffic_distribution": df['traffic_status'].value_counts().to_dict(),
-        "avg_delay_by_hour": df.groupby(pd.to_datetime(df['timestamp']).dt.hour)['delay_minutes'].mean().round(2).to_dict()
-    }
-    return stats
+    # Running aggregates kept up to date by every append (all tiers, no data is read)
+    return traffic_store.aggregates.statistics(traffic_store, route=route, day=day)
 
 def get_route_info(origin_coords, destination_coords):
     coords = f"{origin_coords[0]},{origin_coords[1]};{destination_coords[0]},{destination_coords[1]}"
     url = f"{OSRM_BASE_URL}{coords}?overview=false"
-    try:
-        response = requests.get(url, timeout=15)
-        if response.status_code == 200:
-            data = response.json()
-            if data['code'] == 'Ok' and data['routes']:
-                route = data['routes'][0]
-                return route['distance'], route['duration']
-    except Exception as e:
-        print("Error fetching route:", e)
+    for attempt in range(MAX_RETRIES + 1):
+        # Open breaker: skip OSRM entirely and fall back to the cached route info
+        if not osrm_breaker.allow_request():
+            break
+        try:
+            response = requests.get(url, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                osrm_breaker.record_success()
+                data = response.json()
+                if data['code'] == 'Ok' and data['routes']:
+                    route = data['routes'][0]
+                    return route['distance'], route['duration']
+                return None, None
+            if not is_retryable_status(response.status_code):
+                osrm_breaker.record_success()
+                return None, None
+            print(f"OSRM returned {response.status_code} (attempt {attempt + 1})")
+        except requests.RequestException as e:
+            print(f"Error fetching route (attempt {attempt + 1}):", e)
+        except Exception as e:
+            print("Error fetching route:", e)
+            return None, None
+        osrm_breaker.record_failure()
+        if attempt < MAX_RETRIES:
+            time.sleep(backoff_delay(attempt))
     return None, None
 
 def simulate_traffic_conditions(hour, day_of_week, base_duration_minutes):
@@ -142,15 +261,18 @@ def simulate_traffic_conditions(hour, day_of_week, base_duration_minutes):
         elif 17 <= hour <= 19: traffic_multiplier = random.uniform(1.5, 2.0)
     return base_duration_minutes * traffic_multiplier, traffic_multiplier
 
+def has_route_name(route):
+    """Routes without a proper name (3+ characters) are skipped"""
+    return isinstance(route[2], str) and len(route[2]) >= 3
+
 def process_route(route, current_time):
-    origin, destination, route_name, origin_name, dest_name = route
+    (_, (distance_m, duration_s)), = route_cache.with_fallback([(route, get_route_info(route[0], route[1]))])
+    return build_record(route, current_time, distance_m, duration_s)
 
-    if not isinstance(route_name, str) or len(route_name) < 3:
-        return None
+def build_record(route, current_time, distance_m, duration_s):
+    origin, destination, route_name, origin_name, dest_name = route
 
-    distance_m, duration_s = get_route_info(origin, destination)
-    
-    if distance_m is None or duration_s is None:
+    if not has_route_name(route) or distance_m is None or duration_s is None:
         return None
 
     # Calculate final traffic data
@@ -176,35 +298,159 @@ def process_route(route, current_time):
         "origin": origin_name,
         "destination": dest_name,
         "distance_km": distance_km,
+        "duration_minutes": round(base_duration_min, 2),
         "duration_in_traffic_minutes": round(actual_duration, 2),
         "delay_minutes": round(delay, 2),
-        "traffic_status": status
+        "traffic_status": status,
+        "traffic_multiplier": round(multiplier, 2)
     }
 
+def fetch_route_infos(routes):
+    """Look up (distance_m, duration_s) for each route with the configured COLLECTION_MODE"""
+    if COLLECTION_MODE == 'async':
+        return list(route_cache.with_fallback(collect_route_info(
+            routes,
+            max_in_flight=MAX_IN_FLIGHT,
+            timeout=REQUEST_TIMEOUT,
+            base_url=OSRM_BASE_URL,
+            breaker=osrm_breaker,
+            max_retries=MAX_RETRIES,
+            observe=observe_lookup
+        )))
+    if COLLECTION_MODE == 'table':
+        return list(route_cache.with_fallback(collect_route_info_table_observed(routes)))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        return list(route_cache.with_fallback(executor.map(fetch_route_timed, routes)))
+
+def observe_lookup(route, seconds, route_info):
+    """Record one OSRM lookup in the collector metrics"""
+    ok = route_info is not None and route_info[0] is not None
+    collector_metrics.observe_lookup(route[2], seconds, ok)
+
+def fetch_route_timed(route):
+    """(route, (distance_m, duration_s)) via get_route_info, with its latency recorded"""
+    start = time.perf_counter()
+    route_info = get_route_info(route[0], route[1])
+    observe_lookup(route, time.perf_counter() - start, route_info)
+    return route, route_info
+
+def collect_route_info_table_observed(routes):
+    """Table lookups are batched, so only per-route outcomes are recorded (no per-route latency)"""
+    route_infos = collect_route_info_table(routes, table_url=OSRM_TABLE_URL, timeout=REQUEST_TIMEOUT)
+    for route, route_info in route_infos:
+        observe_lookup(route, None, route_info)
+    return route_infos
+
 def collect_traffic_data():
-    records = []
     now = datetime.now()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [executor.submit(process_route, r, now) for r in ABUJA_ROUTES]
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result: records.append(result)
+    with collector_metrics.run_duration.time('cycle'):
+        if USE_ROUTE_CACHE:
+            route_infos = route_cache.lookup_routes(ABUJA_ROUTES, fetch_route_infos)
+            route_cache.save()
+        else:
+            route_infos = fetch_route_infos(ABUJA_ROUTES)
+        return build_records(route_infos, now)
+
+def iter_route_infos(routes):
+    """fetch_route_infos, yielding each route as soon as its lookup completes"""
+    if COLLECTION_MODE == 'async':
+        def iter_fetch(batch):
+            return iter_route_info(
+                batch,
+                max_in_flight=MAX_IN_FLIGHT,
+                timeout=REQUEST_TIMEOUT,
+                base_url=OSRM_BASE_URL,
+                breaker=osrm_breaker,
+                max_retries=MAX_RETRIES,
+                observe=observe_lookup
+            )
+    elif COLLECTION_MODE == 'table':
+        def iter_fetch(batch):
+            return iter(collect_route_info_table_observed(batch))
+    else:
+        def iter_fetch(batch):
+            return iter_route_infos_threaded(batch, fetch_route_timed, MAX_WORKERS)
+
+    if USE_ROUTE_CACHE:
+        yield from route_cache.iter_routes(routes, iter_fetch)
+        return
+    yield from route_cache.with_fallback(iter_fetch(routes))
+
+def collect_and_save_streaming(routes=None, now=None):
+    """Collect routes (default: all) and append records in micro-batches; returns records saved"""
+    kind = 'cycle' if routes is None else 'slot'
+    routes = ABUJA_ROUTES if routes is None else routes
+    now = now or datetime.now()
+    with collector_metrics.run_duration.time(kind):
+        writer = StreamingWriter(save_to_csv)
+        collector_metrics.queue_depth.set_function(writer.queue.qsize)
+        try:
+            stream_records(iter_route_infos(routes), lambda infos: build_records(infos, now), writer)
+        finally:
+            saved = writer.close()
+            collector_metrics.queue_depth.set_function(None)
+            route_cache.save()
+    return saved
+
+def build_records(route_infos, current_time):
+    if VECTORIZED_SIMULATION:
+        return build_records_vectorized(route_infos, current_time)
+
+    records = []
+    for route, (distance_m, duration_s) in route_infos:
+        record = build_record(route, current_time, distance_m, duration_s)
+        if record: records.append(record)
     return records
 
+def build_records_vectorized(route_infos, current_time):
+    """build_records with the traffic for all routes simulated in one call (test2 rules)"""
+    found = [
+        (route, distance_m, duration_s)
+        for route, (distance_m, duration_s) in route_infos
+        if distance_m is not None and duration_s is not None and has_route_name(route)
+    ]
+    if not found:
+        return []
+
+    base_duration_min = [duration_s / 60 for _, _, duration_s in found]
+    simulated = simulate_cycle(
+        [route[2] for route, _, _ in found],
+        base_duration_min,
+        [distance_m / 1000 for _, distance_m, _ in found],
+        current_time,
+        seed=SIMULATION_SEED,
+        profile='basic'
+    )
+
+    timestamp = current_time.strftime('%Y-%m-%d %H:%M:%S')
+    return [
+        {
+            "timestamp": timestamp,
+            "route_name": route[2],
+            "origin": route[3],
+            "destination": route[4],
+            "distance_km": round(distance_m / 1000, 2),
+            "duration_minutes": round(base_duration_min[i], 2),
+            "duration_in_traffic_minutes": round(float(simulated['duration_in_traffic_minutes'][i]), 2),
+            "delay_minutes": round(float(simulated['delay_minutes'][i]), 2),
+            "traffic_status": str(simulated['traffic_status'][i]),
+            "traffic_multiplier": round(float(simulated['traffic_multiplier'][i]), 2)
+        }
+        for i, (route, distance_m, _) in enumerate(found)
+    ]
+
 def save_to_csv(data_records):
     if not data_records:
         return 0
 
-    df_new = pd.DataFrame(data_records)
-
-    with file_lock:
-        if os.path.exists(CSV_FILENAME):
-            # FIX: Use append mode 'a' to save all history
-            df_new.to_csv(CSV_FILENAME, mode='a', index=False, header=False)
-        else:
-            df_new.to_csv(CSV_FILENAME, index=False)
+    with file_lock, collector_metrics.write_latency.time():
+        # Appends (never rewrites) so all history is kept; rows already stored are dropped
+        written = traffic_store.append(data_records)
 
-    return len(data_records)
+    collector_metrics.records_written.inc(written)
+    sampling_planner.observe(data_records)
+    return written
 
 # =========================
 # FLASK ENDPOINTS
@@ -215,63 +461,147 @@ def home():
     return render_template("index.html", routes=len(ABUJA_ROUTES))
 
 @app.route("/report")
+@http_cache.versioned()
 def report():
-    stats = generate_statistics()
+    # ?route=<name> or ?day=YYYY-MM-DD narrows the report to one route or day
+    stats = generate_statistics(route=request.args.get('route'), day=request.args.get('day'))
     if not stats: return "No data available yet."
     return render_template("report.html", stats=stats)
 
+@app.route("/hourly", methods=["GET"])
+@http_cache.versioned()
+def hourly():
+    """Per-route hourly aggregates over ?start= and ?end= (optionally one ?route=) from every tier"""
+    try:
+        rollups = read_hourly(STORAGE_PATHS[STORAGE_BACKEND], start=request.args.get('start'),
+                              end=request.args.get('end'), route=request.args.get('route'))
+    except ValueError as e:
+        return jsonify({"message": f"Bad start/end: {e}"}), 400
+    rollups['hour_start'] = rollups['hour_start'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return Response(rollups.to_json(orient='records'), mimetype="application/json")
+
 @app.route("/collect")
 def collect():
-    data = collect_traffic_data()
-    saved = save_to_csv(data)
+    if STREAMING_INGEST:
+        saved = collect_and_save_streaming()
+    else:
+        saved = save_to_csv(collect_traffic_data())
     return jsonify({"status": "success", "records_saved": saved})
 
+ROUTE_NAMES = [route[2] for route in ABUJA_ROUTES]
+VIEW_COLUMNS = ['timestamp', 'route_name', 'origin', 'destination', 'distance_km',
+                'duration_in_traffic_minutes', 'delay_minutes', 'traffic_status']
+
 @app.route("/data", methods=["GET"])
+@http_cache.versioned()
 def data():
-    if not os.path.exists(CSV_FILENAME):
+    if not traffic_store.exists():
         return "<h3>No data yet.</h3>", 404
 
-    df = pd.read_csv(CSV_FILENAME)
-    df['timestamp'] = pd.to_datetime(df['timestamp']) # Ensure timestamp is datetime
-    df = df.dropna(subset=['route_name'])
-    df = df.sort_values(by='timestamp', ascending=False)
-    
-    # Keep only the latest record per route for the live view
-    df_unique = df.drop_duplicates(subset=['route_name'], keep='first')
-    
-    route_names = sorted(df_unique['route_name'].unique().tolist())
-    records = df_unique.to_dict(orient="records")
+    # Latest record per route from the live state kept by ingest; history is never read
+    records = traffic_store.latest.records(traffic_store, columns=VIEW_COLUMNS, route_names=ROUTE_NAMES)
+    route_names = sorted(record['route_name'] for record in records)
     
     return render_template("traffic_view.html", records=records, route_names=route_names)
 
 @app.route("/routes", methods=["GET"])
+@http_cache.versioned(vary=lambda: datetime.now().date())  # Statuses are today's only
 def routes():
     base_routes = [{"name": r[2], "origin": r[3], "destination": r[4]} for r in ABUJA_ROUTES]
     current_status = {}
     
-    if os.path.exists(CSV_FILENAME):
-        df = pd.read_csv(CSV_FILENAME)
-        df['timestamp'] = pd.to_datetime(df['timestamp']) # Convert to datetime objects
-        
+    if traffic_store.exists():
         today = datetime.now().date()
-        # FIX: Compare date objects correctly to avoid "No Data Today"
-        df_today = df[df['timestamp'].dt.date == today]
-        
-        df_today = df_today.sort_values(by='timestamp', ascending=False)
-        status_data = df_today.drop_duplicates(subset=['route_name'], keep='first')
-        
-        for _, row in status_data.iterrows():
-            current_status[row['route_name']] = row['traffic_status']
+        # Routes whose latest record is from today, straight from the live state
+        for record in traffic_store.latest.records(traffic_store, start=today, route_names=ROUTE_NAMES):
+            current_status[record['route_name']] = record['traffic_status']
 
     return render_template("routes_directory.html", 
                            routes=base_routes, 
                            status_map=current_status)
 
+def schedule_plan():
+    """The sampling plan and per-route volatility as this process sees them"""
+    volatility = sampling_planner.stats()
+    plan = [dict(entry, **volatility[entry['route_name']]) for entry in collection_schedule.plan()]
+    return {
+        "staggered": staggered_collection,
+        "adaptive": ADAPTIVE_SAMPLING,
+        "slot_seconds": round(collection_schedule.slot_seconds, 1),
+        "routes": sorted(plan, key=lambda entry: entry['interval_seconds'])
+    }
+
+@app.route("/schedule", methods=["GET"])
+def schedule():
+    """The plan is adapted in the collection leader only: other workers serve its last snapshot"""
+    if collector_lease.is_leader:
+        return jsonify(schedule_plan())
+    try:
+        with open(SCHEDULE_SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+            return Response(f.read(), mimetype="application/json")
+    except OSError:
+        return jsonify({"message": "No collection leader has published a schedule yet"}), 503
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Collector metrics: live in the leader, the leader's last snapshot in every other worker"""
+    mimetype = "text/plain; version=0.0.4"
+    if collector_lease.is_leader:
+        return Response(collector_metrics.render(), mimetype=mimetype)
+    try:
+        with open(METRICS_SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+            return Response(f.read(), mimetype=mimetype)
+    except OSError:
+        return Response("# No collection leader has published metrics yet\n", status=503, mimetype=mimetype)
+
+def download_encoding():
+    """Content-Encoding for /download (None if ?compression= asks for one we can't do)"""
+    try:
+        return choose_encoding(request.accept_encodings, request.args.get('compression'))
+    except ValueError:
+        return None
+
 @app.route("/download", methods=["GET"])
+@http_cache.versioned(cache=False, max_age=0, vary=download_encoding)
 def download():
-    if not os.path.exists(CSV_FILENAME):
+    """
+    Streamed export of every tier: ?format=csv|ndjson|parquet, ?start= and
+    ?end=, ?route=, ?origin=, ?destination=, ?status= (repeatable),
+    ?compression=gzip|zstd|identity (default: from Accept-Encoding).
+    Range requests resume an export of the same data version.
+    """
+    if not traffic_store.exists():
         return jsonify({"message": "CSV file not found"}), 404
-    return send_file(CSV_FILENAME, as_attachment=True)
+    try:
+        options = parse_export_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    encoding = download_encoding()
+    if encoding is None:
+        return jsonify({"message": f"Compression must be one of identity, {', '.join(available_encodings())}"}), 400
+
+    mimetype, extension = EXPORT_FORMATS[options['format']]
+    path = STORAGE_PATHS[STORAGE_BACKEND]
+    response = Response(export_stream(path, options, encoding), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename={os.path.splitext(CSV_FILENAME)[0]}.{extension}",
+        "Vary": "Accept-Encoding"
+    })
+    if encoding != 'identity':
+        response.headers["Content-Encoding"] = encoding
+
+    # The byte ranges only hold for one data version, which If-Range checks against this ETag
+    etag, last_modified = http_cache.current(vary=download_encoding)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Never buffered to work out a Content-Length: the body goes out chunk by chunk
+    response.direct_passthrough = True
+    if request.range is None:
+        response.accept_ranges = 'bytes'
+        return response
+    complete_length = export_lengths.length((etag, request.full_path),
+                                            lambda: export_stream(path, options, encoding))
+    return response.make_conditional(request, accept_ranges=True, complete_length=complete_length)
 
 if __name__ == "__main__":
+    start_collector()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+ROUTES = [("Kubwa to CBD", "Kubwa", "CBD"), ("Nyanya to Wuse", "Nyanya", "Wuse 2"), ("Jabi to CBD", "Jabi", "CBD")]
+STATUSES = ["No Traffic", "Light Traffic", "Moderate Traffic", "Heavy Traffic", "Smooth Traffic"]
+
+
+def traffic_records(start, periods, freq='15min'):
+    """Collector-style records (the 10 columns main_test2 writes) for every route at each time"""
+    records = []
+    for i, timestamp in enumerate(pd.date_range(start, periods=periods, freq=freq)):
+        for j, (route_name, origin, destination) in enumerate(ROUTES):
+            delay = float((i * 7 + j * 3) % 40)
+            records.append({
+                'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                'route_name': route_name,
+                'origin': origin,
+                'destination': destination,
+                'distance_km': 10.0 + j,
+                'duration_minutes': 20.0,
+                'duration_in_traffic_minutes': 20.0 + delay,
+                'delay_minutes': delay,
+                'traffic_status': STATUSES[(i + j) % len(STATUSES)],
+                'traffic_multiplier': round((20.0 + delay) / 20.0, 2)
+            })
+    return records
+
+
+@pytest.fixture
+def records():
+    return traffic_records
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from async_collector import build_route_url, collect_route_info
+from fake_osrm import fake_leg, start_fake_osrm
+
+ROUTES = [([7.40 + i / 100, 9.00], [7.45, 9.05 + i / 100], f"Route {i}", "A", "B") for i in range(40)]
+
+
+@pytest.fixture
+def osrm():
+    server = start_fake_osrm(latency_ms=50, jitter_ms=0)
+    yield server
+    server.shutdown()
+
+
+def route_url(server):
+    return f"{server.base_url}/route/v1/driving/"
+
+
+def test_build_route_url_uses_lon_lat_order():
+    assert build_route_url([7.1, 9.2], [7.3, 9.4], 'http://osrm/') == 'http://osrm/7.1,9.2;7.3,9.4?overview=false'
+
+
+def test_sweep_returns_every_route_in_input_order(osrm):
+    route_infos = collect_route_info(ROUTES, max_in_flight=8, base_url=route_url(osrm))
+    assert [route for route, _ in route_infos] == ROUTES
+    assert [info for _, info in route_infos] == [fake_leg(route[0], route[1]) for route in ROUTES]
+    assert osrm.request_count == len(ROUTES)
+
+
+def test_requests_overlap_up_to_max_in_flight(osrm):
+    start = time.monotonic()
+    collect_route_info(ROUTES, max_in_flight=20, base_url=route_url(osrm))
+    # 40 requests of 50 ms: two waves in flight, not 2 s one after another
+    assert time.monotonic() - start < 1.0
+
+
+def test_failed_routes_are_retried_then_reported_missing(osrm):
+    osrm.settings.update(latency_ms=0, error_rate=1.0)
+    route_infos = collect_route_info(ROUTES[:5], base_url=route_url(osrm), max_retries=1)
+    assert [info for _, info in route_infos] == [(None, None)] * 5
+    assert osrm.request_count == 10
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import backfill_history
+from backfill_history import base_route_info, simulate_days
+from fake_osrm import fake_leg
+from route_cache import RouteInfoCache
+from traffic_schema import TRAFFIC_COLUMNS
+
+ROUTES = [([7.40 + i / 100, 9.00], [7.45, 9.05], f"Route {i}", f"O{i}", f"D{i}") for i in range(5)]
+DISTANCE = np.array([5.0, 6.0, 7.0, 8.0, 9.0])
+DURATION = DISTANCE * 2
+FIRST_DAY = datetime(2026, 3, 1)
+
+
+def test_output_does_not_depend_on_the_chunk_size():
+    whole = simulate_days(ROUTES, DISTANCE, DURATION, FIRST_DAY, 4, 60, seed=3)
+    halves = pd.concat([simulate_days(ROUTES, DISTANCE, DURATION, FIRST_DAY, 2, 60, seed=3),
+                        simulate_days(ROUTES, DISTANCE, DURATION, datetime(2026, 3, 3), 2, 60, seed=3)],
+                       ignore_index=True)
+    assert list(whole.columns) == TRAFFIC_COLUMNS
+    assert len(whole) == 4 * 24 * len(ROUTES)
+    pd.testing.assert_frame_equal(whole.astype(str), halves.astype(str))
+    other_seed = simulate_days(ROUTES, DISTANCE, DURATION, FIRST_DAY, 4, 60, seed=4)
+    assert not whole['traffic_multiplier'].equals(other_seed['traffic_multiplier'])
+
+
+def test_rows_are_time_major_like_a_collection_run():
+    df = simulate_days(ROUTES, DISTANCE, DURATION, FIRST_DAY, 1, 30, seed=0)
+    assert df['timestamp'].astype(str).is_monotonic_increasing
+    assert df['route_name'].astype(str).tolist()[:5] == [route[2] for route in ROUTES]
+    assert (df['duration_minutes'] == np.tile(DURATION, 48)).all()
+
+
+def test_base_info_prefers_the_route_cache(tmp_path):
+    cache_file = str(tmp_path / 'route_cache.json')
+    cache = RouteInfoCache(cache_file)
+    cache.put(ROUTES[0][0], ROUTES[0][1], 4200.0, 600.0)
+    cache.save()
+    distance_km, duration_min = base_route_info(ROUTES[:2], cache_file)
+    assert (distance_km[0], duration_min[0]) == (4.2, 10.0)
+    estimate = fake_leg(ROUTES[1][0], ROUTES[1][1])
+    assert (distance_km[1], duration_min[1]) == (estimate[0] / 1000, estimate[1] / 60)
+
+
+def test_backfill_is_reproducible(tmp_path, monkeypatch):
+    monkeypatch.setattr(backfill_history, 'load_routes', lambda: ROUTES)
+    first, second = str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv')
+    rows = backfill_history.backfill(FIRST_DAY, 3, first, interval_minutes=60, chunk_days=2, seed=5)
+    backfill_history.backfill(FIRST_DAY, 3, second, interval_minutes=60, chunk_days=1, seed=5)
+    assert rows == 3 * 24 * len(ROUTES)
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,46 @@
+import pytest
+
+import test2
+from collector_metrics import CollectorMetrics, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('lookup_seconds', 'Lookup latency', labels=('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, 'Jabi to CBD')
+    lines = histogram.render()
+    assert 'lookup_seconds_bucket{route="Jabi to CBD",le="0.1"} 1' in lines
+    assert 'lookup_seconds_bucket{route="Jabi to CBD",le="1.0"} 3' in lines
+    assert 'lookup_seconds_bucket{route="Jabi to CBD",le="+Inf"} 4' in lines
+    assert 'lookup_seconds_count{route="Jabi to CBD"} 4' in lines
+
+
+def test_collector_metrics_count_lookup_outcomes():
+    metrics = CollectorMetrics()
+    metrics.observe_lookup('Kubwa to CBD', 0.2, True)
+    metrics.observe_lookup('Kubwa to CBD', None, False)  # Table lookups have no per-route latency
+    text = metrics.render()
+    assert 'abuja_osrm_lookups_total{route="Kubwa to CBD",outcome="success"} 1' in text
+    assert 'abuja_osrm_lookups_total{route="Kubwa to CBD",outcome="failure"} 1' in text
+    assert 'abuja_osrm_lookup_seconds_count{route="Kubwa to CBD"} 1' in text
+
+
+@pytest.fixture
+def follower(tmp_path, monkeypatch):
+    monkeypatch.setattr(test2, 'METRICS_SNAPSHOT_FILE', str(tmp_path / 'collector_metrics.prom'))
+    monkeypatch.setattr(test2, 'SCHEDULE_SNAPSHOT_FILE', str(tmp_path / 'collection_schedule.json'))
+    monkeypatch.setattr(test2, 'collector_metrics', CollectorMetrics())
+    assert not test2.collector_lease.is_leader
+    return test2.app.test_client()
+
+
+def test_metrics_on_a_follower_serve_the_leaders_snapshot(follower, monkeypatch):
+    assert follower.get('/metrics').status_code == 503  # No leader has published yet
+
+    test2.collector_metrics.observe_lookup('Jabi to CBD', 0.3, True)
+    test2.publish_collector_state()  # What the leader does after every run
+    monkeypatch.setattr(test2, 'collector_metrics', CollectorMetrics())  # This worker collected nothing
+
+    response = follower.get('/metrics')
+    assert response.status_code == 200
+    assert 'abuja_osrm_lookups_total{route="Jabi to CBD",outcome="success"} 1' in response.get_data(as_text=True)
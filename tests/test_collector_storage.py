@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+import test
+from traffic_store import CsvTrafficStore
+
+
+def refuse_full_read(*args, **kwargs):
+    raise AssertionError("history was re-read")
+
+
+@pytest.fixture
+def collector_store(tmp_path, monkeypatch):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    monkeypatch.setattr(test, 'traffic_store', store)
+    return store
+
+
+def test_save_to_csv_reports_totals_from_the_manifest(collector_store, records, monkeypatch, capsys):
+    test.save_to_csv(records('2026-10-01 07:00', 4))
+    assert f"Created {collector_store.path} with 12 records" in capsys.readouterr().out
+
+    # Appending and reporting the total never reads the history back
+    monkeypatch.setattr(pd, 'read_csv', refuse_full_read)
+    test.save_to_csv(records('2026-10-01 08:00', 2))
+    out = capsys.readouterr().out
+    assert "Appended 6 records" in out and "Total records in storage: 18" in out
+
+    manifest = collector_store.summary()
+    assert manifest['bytes'] == len(open(collector_store.path, 'rb').read())
+    assert (manifest['min_timestamp'], manifest['max_timestamp']) == ('2026-10-01 07:00:00', '2026-10-01 08:15:00')
+    assert manifest['route_counts'] == {'Kubwa to CBD': 6, 'Nyanya to Wuse': 6, 'Jabi to CBD': 6}
+
+    test.display_statistics()
+    out = capsys.readouterr().out
+    assert "Total Records: 18" in out and "Date Range: 2026-10-01 to 2026-10-01" in out
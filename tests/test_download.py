@@ -0,0 +1,82 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+import test2
+from store_lock import append_text
+from traffic_store import CsvTrafficStore, pa
+
+
+@pytest.fixture
+def client(tmp_path, records, monkeypatch):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    store.append(records('2026-10-01 00:00', 4 * 24 * 3))
+    monkeypatch.setattr(test2, 'traffic_store', store)
+    monkeypatch.setitem(test2.STORAGE_PATHS, test2.STORAGE_BACKEND, store.path)
+    return test2.app.test_client()
+
+
+@pytest.mark.parametrize('query', ['format=csv&compression=identity', 'format=ndjson&compression=gzip',
+                                   'format=csv&route=Jabi+to+CBD&compression=identity'])
+def test_download_ranges_match_full_body(client, query):
+    full = client.get(f'/download?{query}')
+    assert full.status_code == 200
+    body = full.get_data()
+    etag = full.headers['ETag']
+
+    pieces = []
+    for start in range(0, len(body), 1000):
+        end = min(start + 999, len(body) - 1)
+        part = client.get(f'/download?{query}', headers={'Range': f'bytes={start}-{end}', 'If-Range': etag})
+        assert part.status_code == 206
+        assert part.headers['Content-Range'] == f'bytes {start}-{end}/{len(body)}'
+        pieces.append(part.get_data())
+    assert b''.join(pieces) == body
+
+    tail = client.get(f'/download?{query}', headers={'Range': 'bytes=-100'})
+    assert tail.get_data() == body[-100:]
+
+
+def test_download_resume_restarts_on_new_data(client, records):
+    full = client.get('/download?compression=gzip')
+    rows = gzip.decompress(full.get_data()).decode('utf-8').splitlines()
+    assert len(rows) == 1 + 4 * 24 * 3 * 3
+
+    test2.traffic_store.append(records('2026-10-04 00:00', 1))
+    stale = client.get('/download?compression=gzip',
+                       headers={'Range': 'bytes=100-', 'If-Range': full.headers['ETag']})
+    assert stale.status_code == 200  # The data changed: the whole export, not a range of it
+
+
+def test_full_download_is_streamed(client):
+    response = client.get('/download?compression=identity', buffered=False)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'Content-Length' not in response.headers  # Not buffered to measure it
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    first = next(iter(response.response))
+    assert first.startswith(b'timestamp,')
+    response.close()
+
+
+@pytest.mark.skipif(pa is None, reason="parquet export needs pyarrow")
+def test_parquet_download_coerces_dirty_rows(client):
+    import pyarrow.parquet as pq
+
+    store = test2.traffic_store
+    # A legacy left-aligned row (10 values under the 17-column header) and one with unparsable numbers
+    append_text(store.path, '2026-10-04 08:00:00,Jabi to CBD,Jabi,CBD,41.36,30.0,45.5,15.5,Light Traffic,1.52'
+                            ',,,,,,,\n'
+                            '2026-10-04 08:15:00,2026-10-04,08:15:00,Sunday,n/a,0,1,Jabi to CBD,Jabi,CBD,'
+                            '12.0,20.0,oops,3.0,,No Traffic,1.1\n')
+    response = client.get('/download?format=parquet&compression=identity')
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.get_data())).to_pandas()
+    assert len(table) == store.summary()['rows']
+
+    legacy = table[table['timestamp'] == pd.Timestamp('2026-10-04 08:00:00')].iloc[0]
+    assert (legacy['route_name'], legacy['distance_km'], legacy['hour']) == ('Jabi to CBD', 41.36, 8)
+    dirty = table[table['timestamp'] == pd.Timestamp('2026-10-04 08:15:00')].iloc[0]
+    assert dirty['hour'] == 8 and pd.isna(dirty['duration_in_traffic_minutes'])
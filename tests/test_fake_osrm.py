@@ -0,0 +1,47 @@
+import pytest
+import requests
+
+import test2
+from benchmark_collectors import benchmark_variant, configure_module
+from fake_osrm import fake_leg, start_fake_osrm
+
+ROUTES = [([7.40 + i / 100, 9.00], [7.45, 9.05 + i / 100], f"Route {i}", "A", "B") for i in range(12)]
+
+
+@pytest.fixture
+def osrm():
+    server = start_fake_osrm(latency_ms=5, jitter_ms=0)
+    yield server
+    server.shutdown()
+
+
+def test_route_and_table_answer_like_osrm(osrm):
+    route = requests.get(f"{osrm.base_url}/route/v1/driving/7.4,9.0;7.5,9.1?overview=false").json()
+    assert route['code'] == 'Ok'
+    assert (route['routes'][0]['distance'], route['routes'][0]['duration']) == fake_leg((7.4, 9.0), (7.5, 9.1))
+
+    table = requests.get(f"{osrm.base_url}/table/v1/driving/7.4,9.0;7.5,9.1;7.6,9.2",
+                         params={'sources': '0', 'destinations': '1;2'}).json()
+    assert table['durations'] == [[fake_leg((7.4, 9.0), (7.5, 9.1))[1], fake_leg((7.4, 9.0), (7.6, 9.2))[1]]]
+    assert requests.get(f"{osrm.base_url}/nearest").status_code == 404
+    assert osrm.request_count == 3
+
+
+def test_injected_failures_are_503s(osrm):
+    osrm.settings['error_rate'] = 1.0
+    response = requests.get(f"{osrm.base_url}/route/v1/driving/7.4,9.0;7.5,9.1")
+    assert response.status_code == 503
+
+
+@pytest.mark.parametrize('mode', ['threads', 'async', 'table'])
+def test_benchmark_runs_a_collector_against_the_fake_server(osrm, monkeypatch, mode):
+    # configure_module rewrites the module's settings: put them back afterwards
+    for name in ['OSRM_BASE_URL', 'OSRM_TABLE_URL', 'USE_ROUTE_CACHE', 'COLLECTION_MODE', 'MAX_WORKERS',
+                 'MAX_IN_FLIGHT', 'ABUJA_ROUTES']:
+        monkeypatch.setattr(test2, name, getattr(test2, name))
+    configure_module(test2, mode, osrm.base_url, ROUTES)
+
+    result = benchmark_variant(test2, cycles=1)
+    assert result['records'] == len(ROUTES)
+    assert result['requests'] == (1 if mode == 'table' else len(ROUTES))
+    assert result['routes_per_second'] > 0
@@ -0,0 +1,44 @@
+import pytest
+
+import test2
+from http_cache import VersionedResponses
+from traffic_store import CsvTrafficStore
+
+
+@pytest.fixture
+def client(tmp_path, records, monkeypatch):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    store.append(records('2026-10-01 07:00', 8))
+    monkeypatch.setattr(test2, 'traffic_store', store)
+    fresh = VersionedResponses(test2.http_cache.version)  # Empty cache and counters
+    for attribute in ['entries', 'hits', 'misses', 'not_modified']:
+        monkeypatch.setattr(test2.http_cache, attribute, getattr(fresh, attribute))
+    return test2.app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/report', '/data', '/routes'])
+def test_polls_between_collections_are_answered_from_the_version(client, path, monkeypatch):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers['ETag'].strip('"')
+    assert 'must-revalidate' in first.headers['Cache-Control'] and 'Last-Modified' in first.headers
+
+    # Neither a 304 nor a cached body runs the view again
+    monkeypatch.setattr(test2, 'generate_statistics', lambda **kwargs: pytest.fail("view re-ran"))
+    monkeypatch.setattr(test2.traffic_store.latest, 'records', lambda *args, **kwargs: pytest.fail("view re-ran"))
+    revalidated = client.get(path, headers={'If-None-Match': f'"{etag}"'})
+    assert revalidated.status_code == 304 and revalidated.data == b''
+    assert client.get(path).data == first.data
+    stats = test2.http_cache.stats()
+    assert (stats['not_modified'], stats['hits'], stats['misses']) == (1, 1, 1)
+
+
+def test_ingest_changes_the_version(client, records):
+    first = client.get('/report')
+    test2.traffic_store.append(records('2026-10-01 09:00', 1))
+    after = client.get('/report', headers={'If-None-Match': first.headers['ETag']})
+    assert after.status_code == 200 and after.headers['ETag'] != first.headers['ETag']
+    assert b'27' in after.data  # The new total, not the cached page
+    # A duplicate batch writes nothing, so the version stands
+    test2.traffic_store.append(records('2026-10-01 09:00', 1))
+    assert client.get('/report', headers={'If-None-Match': after.headers['ETag']}).status_code == 304
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+import pytest
+
+import test2
+import traffic_store
+from traffic_store import CsvTrafficStore
+
+
+def refuse_history(*args, **kwargs):
+    raise AssertionError("history was read")
+
+
+@pytest.fixture
+def store(tmp_path, records):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    store.append(records('2026-10-01 07:00', 8))
+    store.append(records('2026-09-30 07:00', 2))  # Late rows never replace newer ones
+    return store
+
+
+def test_latest_record_per_route_survives_a_restart(store, records, monkeypatch):
+    latest = store.latest.records(store)
+    assert [record['timestamp'] for record in latest] == ['2026-10-01 08:45:00'] * 3
+    assert {record['route_name'] for record in latest} == {'Kubwa to CBD', 'Nyanya to Wuse', 'Jabi to CBD'}
+    assert store.latest.records(store, route_names={'Jabi to CBD'}, columns=['route_name', 'delay_minutes']) == [
+        {'route_name': 'Jabi to CBD', 'delay_minutes': latest[2]['delay_minutes']}]
+    assert store.latest.records(store, start='2026-10-02') == []
+
+    # A new process starts from the snapshot on disk and follows later appends without a scan
+    monkeypatch.setattr(traffic_store, 'latest_per_route', refuse_history)
+    monkeypatch.setattr(CsvTrafficStore, 'read', refuse_history)
+    restarted = CsvTrafficStore(store.path)
+    assert restarted.latest.records(restarted) == latest
+    store.append(records('2026-10-01 09:00', 1))
+    assert {record['timestamp'] for record in restarted.latest.records(restarted)} == {'2026-10-01 09:00:00'}
+
+
+def test_live_views_render_from_the_latest_state(store, monkeypatch):
+    monkeypatch.setattr(test2, 'traffic_store', store)
+    monkeypatch.setattr(test2.http_cache, 'entries', OrderedDict())  # Rendered, not served from the cache
+    monkeypatch.setattr(CsvTrafficStore, 'read', refuse_history)
+    monkeypatch.setattr(CsvTrafficStore, 'iter_chunks', refuse_history)
+    client = test2.app.test_client()
+
+    page = client.get('/data')
+    assert page.status_code == 200
+    assert b'Jabi to CBD' in page.data and b'2026-10-01 08:45:00' in page.data
+    assert client.get('/routes').status_code == 200
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import test2
+from leader_lease import LeaderLease, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="leader election needs flock")
+
+HOLD_LEASE = """
+import sys, time
+from leader_lease import LeaderLease
+lease = LeaderLease(sys.argv[1])
+print(lease.try_acquire(), flush=True)
+time.sleep(60)
+"""
+
+
+def test_only_one_lease_holder_at_a_time(tmp_path):
+    filename = str(tmp_path / 'collector.lease')
+    leader, follower = LeaderLease(filename), LeaderLease(filename)
+    assert leader.try_acquire() and leader.is_leader
+    assert not follower.try_acquire() and not follower.is_leader
+    assert follower.holder_pid() == os.getpid()
+    leader.release()
+    assert follower.try_acquire()
+    follower.release()
+
+
+def test_follower_takes_over_when_the_leader_dies(tmp_path):
+    filename = str(tmp_path / 'collector.lease')
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    leader = subprocess.Popen([sys.executable, '-c', HOLD_LEASE, filename], stdout=subprocess.PIPE, text=True, env=env)
+    try:
+        assert leader.stdout.readline().strip() == 'True'
+        follower = LeaderLease(filename, retry_seconds=0.05)
+        elected = threading.Event()
+        follower.run_when_elected(elected.set)
+        assert not elected.wait(0.3) and follower.holder_pid() == leader.pid
+
+        leader.kill()  # No clean release: the kernel drops the lock with the process
+        leader.wait()
+        assert elected.wait(5) and follower.is_leader
+        follower.release()
+    finally:
+        leader.kill()
+        leader.stdout.close()
+
+
+def test_importing_test2_does_not_elect_a_leader(monkeypatch):
+    assert not test2.collector_lease.is_leader and test2.collector_lease.thread is None
+    assert not test2.scheduler.running
+    collected = []
+    monkeypatch.setattr(test2, 'collect_traffic_data', lambda: collected.append(True) or [])
+    test2.scheduled_collection()  # A follower's timer firing does nothing
+    assert collected == []
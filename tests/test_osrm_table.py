@@ -0,0 +1,46 @@
+import pytest
+
+from fake_osrm import fake_leg, start_fake_osrm
+from osrm_table import collect_route_info_table, coord_key, plan_table_requests
+
+# Several routes share origins and destinations, as ABUJA_ROUTES do
+HUBS = [[7.40 + i / 50, 9.00 + i / 80] for i in range(6)]
+ROUTES = [(HUBS[i], HUBS[j], f"Route {i}-{j}", "A", "B") for i in range(6) for j in range(6) if i != j][:20]
+
+
+@pytest.fixture
+def osrm():
+    server = start_fake_osrm(latency_ms=0, jitter_ms=0)
+    yield server
+    server.shutdown()
+
+
+def test_small_route_lists_fit_in_one_table_call():
+    blocks = plan_table_requests(ROUTES)
+    assert len(blocks) == 1
+    origins, destinations = blocks[0]
+    assert len(origins) == len({coord_key(route[0]) for route in ROUTES})
+    assert len(destinations) == len({coord_key(route[1]) for route in ROUTES})
+
+
+def test_large_route_lists_are_split_into_blocks_covering_every_pair():
+    blocks = plan_table_requests(ROUTES, max_coordinates=4)
+    assert all(len(set(origins + destinations)) <= 4 for origins, destinations in blocks)
+    covered = {(o, d) for origins, destinations in blocks for o in origins for d in destinations}
+    assert {(coord_key(route[0]), coord_key(route[1])) for route in ROUTES} <= covered
+
+
+@pytest.mark.parametrize('max_coordinates', [100, 4])
+def test_table_lookups_match_per_route_lookups(osrm, max_coordinates):
+    route_infos = collect_route_info_table(ROUTES, table_url=f"{osrm.base_url}/table/v1/driving/",
+                                           max_coordinates=max_coordinates)
+    assert [route for route, _ in route_infos] == ROUTES
+    assert [info for _, info in route_infos] == [fake_leg(route[0], route[1]) for route in ROUTES]
+    assert osrm.request_count == len(plan_table_requests(ROUTES, max_coordinates))
+    assert osrm.request_count < len(ROUTES)
+
+
+def test_failed_table_call_leaves_its_routes_missing(osrm):
+    osrm.settings['error_rate'] = 1.0
+    route_infos = collect_route_info_table(ROUTES, table_url=f"{osrm.base_url}/table/v1/driving/")
+    assert {info for _, info in route_infos} == {(None, None)}
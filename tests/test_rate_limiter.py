@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from async_collector import collect_route_info
+from fake_osrm import start_fake_osrm
+from rate_limiter import AimdConcurrencyLimiter, TokenBucket
+
+ROUTES = [([7.40 + i / 100, 9.00], [7.45, 9.05], f"Route {i}", "A", "B") for i in range(30)]
+
+
+def test_token_bucket_allows_a_burst_then_the_sustained_rate(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr('rate_limiter.time.monotonic', lambda: clock[0])
+    bucket = TokenBucket(rate=10, capacity=5)
+    assert [bucket.reserve() for _ in range(5)] == [0.0] * 5
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+    clock[0] += 10  # A long idle period refills at most `capacity` tokens
+    assert [bucket.reserve() for _ in range(5)] == [0.0] * 5
+    assert bucket.reserve() > 0
+
+
+def test_aimd_grows_slowly_and_halves_on_overload():
+    limiter = AimdConcurrencyLimiter(initial=4, max_limit=8, latency_target=1.0)
+    for _ in range(4):
+        with limiter.request() as outcome:
+            outcome['status_code'] = 200
+    assert 4.9 < limiter.limit < 5.1  # About one per round trip of 4 requests
+
+    with limiter.request() as outcome:
+        outcome['status_code'] = 429
+    assert 2.4 < limiter.limit < 2.6
+    with pytest.raises(RuntimeError):
+        with limiter.request():
+            raise RuntimeError("connection reset")
+    assert limiter.limit < 1.3 and limiter.stats()['throttled'] == 2
+
+
+def test_in_flight_never_exceeds_the_limit():
+    limiter = AimdConcurrencyLimiter(initial=3, max_limit=3)
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with limiter.request() as outcome:
+            with lock:
+                peak.append(limiter.in_flight)
+            time.sleep(0.01)
+            outcome['status_code'] = 200
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 3 and limiter.in_flight == 0
+
+
+def test_shared_bucket_paces_the_async_collector():
+    server = start_fake_osrm(latency_ms=0, jitter_ms=0)
+    try:
+        start = time.monotonic()
+        collect_route_info(ROUTES, base_url=f"{server.base_url}/route/v1/driving/",
+                           bucket=TokenBucket(rate=50, capacity=10),
+                           limiter=AimdConcurrencyLimiter(initial=4))
+        # 10 in the burst, the other 20 at 50/s
+        assert time.monotonic() - start >= 0.35
+        assert server.request_count == len(ROUTES)
+    finally:
+        server.shutdown()
@@ -0,0 +1,80 @@
+import pytest
+
+import test2
+from fake_osrm import fake_leg, start_fake_osrm
+from resilience import CircuitBreaker
+from route_cache import RouteInfoCache
+
+ROUTES = [([7.49, 9.05], [7.40, 9.08], "Cached Route", "A", "B"),
+          ([7.45, 9.00], [7.42, 9.10], "Unknown Route", "C", "D")]
+
+
+def test_breaker_opens_after_consecutive_failures_and_lets_one_trial_through(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('resilience.time.monotonic', lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert not breaker.allow_request()
+
+    clock[0] += 30
+    assert breaker.allow_request()  # Half-open trial
+    assert not breaker.allow_request()  # Only one at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+
+def test_failed_trial_reopens_the_breaker(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('resilience.time.monotonic', lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+
+
+@pytest.fixture
+def failing_osrm(tmp_path, monkeypatch):
+    server = start_fake_osrm(latency_ms=0, jitter_ms=0, error_rate=1.0)
+    cache = RouteInfoCache(str(tmp_path / 'route_cache.json'))
+    cache.put(ROUTES[0][0], ROUTES[0][1], 1234.0, 321.0)
+    monkeypatch.setattr(test2, 'OSRM_BASE_URL', f"{server.base_url}/route/v1/driving/")
+    monkeypatch.setattr(test2, 'MAX_RETRIES', 0)
+    monkeypatch.setattr(test2, 'osrm_breaker', CircuitBreaker(failure_threshold=1, reset_timeout=3600))
+    monkeypatch.setattr(test2, 'route_cache', cache)
+    yield server
+    server.shutdown()
+
+
+@pytest.mark.parametrize('mode', ['threads', 'async'])
+def test_routes_osrm_cannot_answer_fall_back_to_the_cache(failing_osrm, monkeypatch, mode):
+    monkeypatch.setattr(test2, 'COLLECTION_MODE', mode)
+    assert test2.get_route_info(ROUTES[0][0], ROUTES[0][1]) == (None, None)  # No fallback of its own
+
+    route_infos = dict((route[2], info) for route, info in test2.fetch_route_infos(ROUTES))
+    assert route_infos == {"Cached Route": (1234.0, 321.0), "Unknown Route": (None, None)}
+
+
+def test_open_breaker_skips_osrm_entirely(failing_osrm):
+    test2.get_route_info(ROUTES[0][0], ROUTES[0][1])  # Opens the breaker
+    requests_before = failing_osrm.request_count
+    record = test2.process_route(ROUTES[0], test2.datetime(2026, 3, 2, 12, 0))
+    assert failing_osrm.request_count == requests_before
+    assert record['distance_km'] == 1.23
+
+
+def test_recovered_osrm_answers_again(failing_osrm):
+    failing_osrm.settings['error_rate'] = 0.0
+    assert test2.get_route_info(ROUTES[1][0], ROUTES[1][1]) == fake_leg(ROUTES[1][0], ROUTES[1][1])
+
+
+def test_unnamed_routes_are_skipped_on_both_simulation_paths(monkeypatch):
+    route = ([7.49, 9.05], [7.40, 9.08], "AB", "A", "B")
+    now = test2.datetime(2026, 3, 2, 12, 0)
+    for vectorized in (False, True):
+        monkeypatch.setattr(test2, 'VECTORIZED_SIMULATION', vectorized)
+        assert test2.build_records([(route, (1000.0, 60.0)), (ROUTES[0], (1000.0, 60.0))], now)[0]['route_name'] == "Cached Route"
+        assert len(test2.build_records([(route, (1000.0, 60.0))], now)) == 0
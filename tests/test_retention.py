@@ -0,0 +1,109 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from retention import compact_history, hourly_rollup, read_history, read_hourly, read_rollups, tier_paths
+from store_lock import append_text
+from traffic_schema import normalize_records
+from traffic_store import CsvTrafficStore, pa
+
+pytestmark = pytest.mark.skipif(pa is None, reason="the cold tier needs pyarrow")
+
+NOW = datetime(2026, 10, 10, 12, 0)
+
+
+def history_store(tmp_path, records):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    store.append(records('2026-10-01 00:00', 4 * 24 * 6))  # Six days, 15-minute slots
+    # Exact duplicates written around the duplicate index, as in older CSVs: they still count
+    duplicates = normalize_records(pd.DataFrame(records('2026-10-02 08:00', 4)))
+    append_text(store.path, duplicates.to_csv(header=False, index=False))
+    return store
+
+
+def test_compact_history_keeps_every_row(tmp_path, records):
+    store = history_store(tmp_path, records)
+    before = read_history(store.path)
+    total = store.aggregates.statistics(store)['total_records']
+    assert total == len(before) == store.summary()['rows']
+
+    result = compact_history(store, retention_days=5, now=NOW)
+    assert result['rolled_rows'] + result['kept_rows'] == len(before)
+    assert store.read()['timestamp'].min() >= '2026-10-05'
+
+    after = read_history(store.path)
+    assert len(after) == len(before)
+    assert store.aggregates.statistics(store)['total_records'] == total
+    _, hourly_filename = tier_paths(store.path)
+    assert read_rollups(hourly_filename)['count'].sum() == result['rolled_rows']
+
+    # Re-running moves nothing and duplicates nothing
+    assert compact_history(store, retention_days=5, now=NOW)['rolled_rows'] == 0
+    assert len(read_history(store.path)) == len(before)
+
+
+def test_compact_history_rerun_after_interrupted_move(tmp_path, records, monkeypatch):
+    store = history_store(tmp_path, records)
+    rows = len(read_history(store.path))
+    # The cold copy is written but the hot rows are never dropped (crash before drop_before)
+    monkeypatch.setattr(store, 'drop_before', lambda cutoff: store.summary()['rows'])
+    compact_history(store, retention_days=5, now=NOW)
+    monkeypatch.undo()
+
+    compact_history(store, retention_days=5, now=NOW)
+    cold_dir, _ = tier_paths(store.path)
+    assert os.path.isdir(cold_dir)
+    assert len(read_history(store.path)) == rows
+
+
+def test_late_rows_replace_their_day_of_rollups(tmp_path, records):
+    store = history_store(tmp_path, records)
+    compact_history(store, retention_days=5, now=NOW)
+    _, hourly_filename = tier_paths(store.path)
+    before = read_rollups(hourly_filename)
+
+    # A row for an hour that is already rolled up, and one for an hour with no data yet
+    late = pd.DataFrame(records('2026-10-02 08:05', 1) + records('2026-09-30 23:00', 1))
+    append_text(store.path, normalize_records(late).to_csv(header=False, index=False))
+    store.rebuild_summary()
+    compact_history(store, retention_days=5, now=NOW)
+
+    after = read_rollups(hourly_filename)
+    assert not after.duplicated(['hour_start', 'route_name']).any()
+    assert after['count'].sum() == before['count'].sum() + len(late)
+    cold = read_history(store.path, end='2026-10-05')
+    assert after['count'].sum() == len(cold)
+    kubwa_8am = after[(after['hour_start'] == '2026-10-02 08:00') & (after['route_name'] == 'Kubwa to CBD')]
+    assert kubwa_8am['count'].item() == 4 + 4 + 1  # Four slots, their old duplicates, one late row
+
+
+def test_read_hourly_spans_rollups_and_hot_rows(tmp_path, records):
+    store = history_store(tmp_path, records)
+    expected = hourly_rollup(read_history(store.path, typed=False))
+    compact_history(store, retention_days=5, now=NOW)
+
+    hourly = read_hourly(store.path)
+    assert hourly['hour_start'].min() < pd.Timestamp('2026-10-05') <= hourly['hour_start'].max()
+    assert len(hourly) == len(expected)
+    assert hourly['count'].sum() == len(read_history(store.path))
+    assert (hourly['delay_mean'].to_numpy() == expected['delay_mean'].to_numpy()).all()
+
+    one_route = read_hourly(store.path, start='2026-10-04', end='2026-10-06', route='Jabi to CBD')
+    assert set(one_route['route_name']) == {'Jabi to CBD'} and len(one_route) == 48
+
+
+def test_hourly_endpoint_serves_every_tier(tmp_path, records, monkeypatch):
+    import test2
+
+    store = history_store(tmp_path, records)
+    compact_history(store, retention_days=5, now=NOW)
+    monkeypatch.setitem(test2.STORAGE_PATHS, test2.STORAGE_BACKEND, store.path)
+    monkeypatch.setattr(test2, 'traffic_store', store)
+    client = test2.app.test_client()
+
+    hours = client.get('/hourly?start=2026-10-04 22:00&end=2026-10-05 02:00&route=Kubwa to CBD').get_json()
+    assert [hour['hour_start'][11:13] for hour in hours] == ['22', '23', '00', '01']
+    assert all(hour['count'] == 4 for hour in hours)
+    assert client.get('/hourly?start=yesterday-ish').status_code == 400
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from route_cache import RouteInfoCache, route_key
+
+A, B, C = [7.49, 9.05], [7.40, 9.08], [7.45, 9.00]
+
+
+def fetcher(answers, calls):
+    def fetch_many(routes):
+        calls.append([route[2] for route in routes])
+        return [(route, answers[route[2]]) for route in routes]
+    return fetch_many
+
+
+def test_entries_survive_a_restart_in_lru_order(tmp_path):
+    filename = str(tmp_path / 'route_cache.json')
+    cache = RouteInfoCache(filename, max_entries=2)
+    cache.put(A, B, 1000.0, 100.0)
+    cache.put(A, C, 2000.0, 200.0)
+    cache.get(A, B)  # A->B is now the most recently used
+    cache.save()
+
+    reloaded = RouteInfoCache(filename, max_entries=2)
+    reloaded.put(B, C, 3000.0, 300.0)  # Evicts the least recently used pair, A->C
+    assert reloaded.get(A, C) is None
+    assert reloaded.get(A, B)[:2] == (1000.0, 100.0)
+    assert route_key(A, B) == route_key([7.490000001, 9.05], B)  # Same pair, same entry
+
+
+def test_only_unknown_pairs_are_fetched_inline(tmp_path):
+    cache = RouteInfoCache(str(tmp_path / 'route_cache.json'))
+    routes = [(A, B, "AB", "A", "B"), (A, C, "AC", "A", "C")]
+    calls = []
+    fetch_many = fetcher({"AB": (1000.0, 100.0), "AC": (2000.0, 200.0)}, calls)
+
+    assert cache.lookup_routes(routes, fetch_many) == [(routes[0], (1000.0, 100.0)), (routes[1], (2000.0, 200.0))]
+    assert cache.lookup_routes(routes, fetch_many)[1] == (routes[1], (2000.0, 200.0))
+    assert calls == [["AB", "AC"]]
+
+
+def test_stale_entries_are_served_and_refreshed_in_the_background(tmp_path):
+    cache = RouteInfoCache(str(tmp_path / 'route_cache.json'), ttl_seconds=60)
+    cache.put(A, B, 1000.0, 100.0)
+    cache.entries[route_key(A, B)]['fetched_at'] = time.time() - 120
+    routes = [(A, B, "AB", "A", "B")]
+    refreshed = threading.Event()
+    calls = []
+
+    def fetch_many(batch):
+        result = fetcher({"AB": (1100.0, 110.0)}, calls)(batch)
+        refreshed.set()
+        return result
+
+    assert cache.lookup_routes(routes, fetch_many) == [(routes[0], (1000.0, 100.0))]  # Stale, not blocking
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if cache.get(A, B)[2]:
+            break
+        time.sleep(0.01)
+    assert cache.get(A, B) == (1100.0, 110.0, True)
+
+
+def test_missing_pairs_are_not_cached(tmp_path):
+    cache = RouteInfoCache(str(tmp_path / 'route_cache.json'))
+    routes = [(A, B, "AB", "A", "B")]
+    cache.lookup_routes(routes, fetcher({"AB": (None, None)}, []))
+    assert cache.get(A, B) is None
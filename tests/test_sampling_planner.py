@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import test2
+from sampling_planner import AdaptiveSamplingPlanner
+from staggered_scheduler import StaggeredSchedule
+
+ROUTES = [([7.0, 9.0], [7.1, 9.1], f"Route {i}", "A", "B") for i in range(8)]
+
+
+def observe(planner, name, delays):
+    for delay in delays:
+        planner.observe([{'route_name': name, 'delay_minutes': delay}])
+
+
+def test_volatile_routes_are_sampled_more_often_within_the_same_budget():
+    planner = AdaptiveSamplingPlanner([route[2] for route in ROUTES])
+    observe(planner, 'Route 0', [0, 30, 2, 25, 5, 40, 1, 35])  # Volatile
+    for route in ROUTES[1:]:
+        observe(planner, route[2], [5, 5.2, 5.1, 5, 5.1, 5, 5.2, 5])  # Flat
+    periods = planner.periods(n_slots=8)
+    assert periods['Route 0'] == 1
+    assert all(periods[route[2]] > 1 for route in ROUTES[1:])
+    assert all(period <= 8 * planner.max_stretch for period in periods.values())
+
+
+def test_apply_rebalances_at_most_once_per_replan_interval():
+    planner = AdaptiveSamplingPlanner([route[2] for route in ROUTES], replan_seconds=3600)
+    schedule = StaggeredSchedule(ROUTES, 8 * 60)
+    assert planner.apply(schedule)
+    assert not planner.apply(schedule)
+    assert planner.apply(schedule, force=True)
+
+
+@pytest.fixture
+def follower(tmp_path, monkeypatch):
+    monkeypatch.setattr(test2, 'SCHEDULE_SNAPSHOT_FILE', str(tmp_path / 'collection_schedule.json'))
+    monkeypatch.setattr(test2, 'METRICS_SNAPSHOT_FILE', str(tmp_path / 'collector_metrics.prom'))
+    assert not test2.collector_lease.is_leader
+    return test2.app.test_client()
+
+
+def test_schedule_on_a_follower_serves_the_leaders_plan(follower, monkeypatch):
+    assert follower.get('/schedule').status_code == 503  # No leader has published yet
+
+    # The leader has seen one volatile route and rebalanced
+    leader_planner = AdaptiveSamplingPlanner([route[2] for route in test2.ABUJA_ROUTES])
+    observe(leader_planner, 'Kubwa to CBD', [0, 30, 2, 25, 5, 40])
+    leader_schedule = StaggeredSchedule(test2.ABUJA_ROUTES, test2.COLLECTION_INTERVAL_MINUTES * 60)
+    leader_planner.apply(leader_schedule, force=True)
+    with monkeypatch.context() as leader:
+        leader.setattr(test2, 'sampling_planner', leader_planner)
+        leader.setattr(test2, 'collection_schedule', leader_schedule)
+        test2.publish_collector_state()
+        published = test2.schedule_plan()
+
+    response = follower.get('/schedule')
+    assert response.status_code == 200
+    assert response.get_json() == json.loads(json.dumps(published))
+    kubwa = next(entry for entry in response.get_json()['routes'] if entry['route_name'] == 'Kubwa to CBD')
+    assert kubwa['samples'] == 6
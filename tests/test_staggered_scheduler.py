@@ -0,0 +1,45 @@
+import pytest
+
+from staggered_scheduler import MIN_SLOT_SECONDS, StaggeredSchedule, can_stagger
+
+ROUTES = [([7.0, 9.0], [7.1, 9.1], f"Route {i}", "A", "B") for i in range(12)]
+
+
+def test_every_route_is_due_exactly_once_per_interval():
+    schedule = StaggeredSchedule(ROUTES, 120)
+    counts = {}
+    for index in range(schedule.n_slots):
+        for route in schedule.due_routes(index):
+            counts[route[2]] = counts.get(route[2], 0) + 1
+    assert counts == {route[2]: 1 for route in ROUTES}
+    assert schedule.n_slots == len(ROUTES)
+    assert schedule.slot_seconds == 10
+
+
+def test_take_due_folds_missed_slots_without_repeats():
+    schedule = StaggeredSchedule(ROUTES, 120)
+    schedule.take_due(now=1200)
+    routes, _ = schedule.take_due(now=1200 + 3 * schedule.slot_seconds)  # Three slots late
+    names = [route[2] for route in routes]
+    assert len(names) == len(set(names)) == 3
+    routes, _ = schedule.take_due(now=1200 + 3 * schedule.slot_seconds)  # Same slot again
+    assert routes == []
+
+
+def test_set_periods_samples_a_route_more_often():
+    schedule = StaggeredSchedule(ROUTES, 120)
+    schedule.set_periods({'Route 0': 3})
+    due = sum('Route 0' in [route[2] for route in schedule.due_routes(i)] for i in range(schedule.n_slots))
+    assert due == schedule.n_slots // 3
+
+
+@pytest.mark.parametrize('interval_seconds', [0, -60])
+def test_non_positive_interval_is_rejected(interval_seconds):
+    with pytest.raises(ValueError, match='positive interval'):
+        StaggeredSchedule(ROUTES, interval_seconds)
+
+
+def test_staggering_needs_one_slot_per_route():
+    assert can_stagger(len(ROUTES), len(ROUTES) * MIN_SLOT_SECONDS)
+    assert not can_stagger(len(ROUTES), len(ROUTES) * MIN_SLOT_SECONDS - 1)
+    assert not can_stagger(len(ROUTES), 0)
@@ -0,0 +1,86 @@
+import csv
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from store_lock import StoreLock, fcntl
+from traffic_schema import TRAFFIC_COLUMNS
+from traffic_store import CsvTrafficStore
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="cross-process locking needs flock")
+
+HOLD_LOCK = """
+import sys, time
+from store_lock import StoreLock
+with StoreLock(sys.argv[1]):
+    print('locked', flush=True)
+    time.sleep(float(sys.argv[2]))
+"""
+
+APPEND_BATCHES = """
+import sys
+sys.path.insert(0, 'tests')
+from conftest import traffic_records
+from traffic_store import CsvTrafficStore
+store = CsvTrafficStore(sys.argv[1])
+for day in range(int(sys.argv[3])):
+    store.append(traffic_records(f"2026-{sys.argv[2]}-{day + 1:02d} 00:00", 48))
+"""
+
+
+def run_script(script, *args):
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    return subprocess.Popen([sys.executable, '-c', script, *map(str, args)], stdout=subprocess.PIPE, text=True, env=env)
+
+
+def test_lock_is_exclusive_across_processes_and_reentrant_within_one(tmp_path):
+    filename = str(tmp_path / 'traffic.csv.lock')
+    holder = run_script(HOLD_LOCK, filename, 0.5)
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        lock = StoreLock(filename)
+        started = time.monotonic()
+        with lock:
+            waited = time.monotonic() - started
+            with lock:  # Reentrant: the same thread doesn't deadlock on itself
+                assert lock.depth == 2
+        assert waited > 0.3
+    finally:
+        holder.kill()
+        holder.wait()
+
+    # Threads in this process take turns too
+    inside, overlaps = [0], []
+
+    def hold():
+        with lock:
+            inside[0] += 1
+            overlaps.append(inside[0])
+            time.sleep(0.01)
+            inside[0] -= 1
+
+    threads = [threading.Thread(target=hold) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == [1] * 8
+
+
+def test_concurrent_writers_never_interleave_rows(tmp_path):
+    filename = str(tmp_path / 'traffic.csv')
+    writers = [run_script(APPEND_BATCHES, filename, f"{month:02d}", 5) for month in range(1, 5)]
+    for writer in writers:
+        assert writer.wait(timeout=120) == 0
+
+    with open(filename, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == TRAFFIC_COLUMNS  # One header, written by whichever process came first
+    assert all(len(row) == len(TRAFFIC_COLUMNS) for row in rows[1:])
+    expected = 4 * 5 * 48 * 3
+    assert len(rows) - 1 == expected
+    assert CsvTrafficStore(filename).summary()['rows'] == expected
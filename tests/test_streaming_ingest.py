@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+import test2
+from async_collector import iter_route_info
+from fake_osrm import start_fake_osrm
+from streaming_ingest import StreamingWriter, iter_route_infos_threaded, stream_records
+from traffic_store import CsvTrafficStore
+
+ROUTES = [([7.40 + i / 100, 9.00], [7.45, 9.05], f"Route {i}", "A", "B") for i in range(30)]
+
+
+@pytest.fixture
+def osrm():
+    server = start_fake_osrm(latency_ms=20, jitter_ms=10)
+    yield server
+    server.shutdown()
+
+
+def test_writer_flushes_full_batches_and_the_remainder():
+    batches = []
+    writer = StreamingWriter(lambda batch: batches.append(list(batch)), batch_size=4, flush_interval=60)
+    writer.put_many(range(10))
+    assert writer.close() == 10
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_writer_flushes_a_partial_batch_after_the_interval():
+    flushed = threading.Event()
+    writer = StreamingWriter(lambda batch: flushed.set(), batch_size=100, flush_interval=0.05)
+    writer.put('record')
+    assert flushed.wait(2)
+    writer.close()
+
+
+def test_full_queue_blocks_producers_until_storage_catches_up():
+    release = threading.Event()
+    writer = StreamingWriter(lambda batch: release.wait(5), batch_size=1, max_queue=2, flush_interval=60)
+    writer.put_many(range(3))  # One being written, two queued
+    blocked = threading.Thread(target=writer.put, args=(3,))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+    release.set()
+    blocked.join(2)
+    assert not blocked.is_alive() and writer.close() == 4
+
+
+def test_write_errors_surface_on_close():
+    def fail(batch):
+        raise OSError("disk full")
+    writer = StreamingWriter(fail, batch_size=2, flush_interval=60)
+    writer.put_many(range(4))
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
+
+
+def test_records_reach_storage_in_micro_batches_as_lookups_complete(osrm, tmp_path, monkeypatch):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    monkeypatch.setattr(test2, 'OSRM_BASE_URL', f"{osrm.base_url}/route/v1/driving/")
+    batch_sizes = []
+
+    def save(records):
+        batch_sizes.append(len(records))
+        return store.append(records)
+
+    writer = StreamingWriter(save, batch_size=10)
+    now = test2.datetime(2026, 10, 12, 8, 0)
+    infos = iter_route_infos_threaded(ROUTES, test2.fetch_route_timed, max_workers=8)
+    assert stream_records(infos, lambda batch: test2.build_records(batch, now), writer, batch_size=10) == 30
+    assert writer.close() == 30
+    assert batch_sizes == [10, 10, 10] and store.summary()['rows'] == 30
+
+
+def test_stopping_iter_route_info_early_cancels_outstanding_requests(osrm):
+    osrm.settings['latency_ms'] = 200
+    base_url = f"{osrm.base_url}/route/v1/driving/"
+    stream = iter_route_info(ROUTES, max_in_flight=2, base_url=base_url)
+    assert next(stream)[1] != (None, None)
+    start = time.monotonic()
+    stream.close()
+    assert time.monotonic() - start < 1.0
+    time.sleep(0.5)
+    assert osrm.request_count < len(ROUTES)
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import test2
+from traffic_schema import normalize_records, read_csv_typed
+from traffic_store import CsvTrafficStore, read_traffic
+
+ROUTES = [([7.49, 9.05], [7.40, 9.08], f"Route {i}", "A", "B") for i in range(40)]
+SATURDAY_NOON = datetime(2026, 10, 17, 12, 0)  # Multipliers 0.9-1.1: delays below 1 are clamped to 0
+
+
+def test_duration_and_multiplier_are_only_derived_when_missing():
+    df = normalize_records(pd.DataFrame([
+        {'timestamp': '2026-10-17 12:00:00', 'route_name': 'R', 'distance_km': 10.0, 'duration_minutes': 20.0,
+         'duration_in_traffic_minutes': 18.0, 'delay_minutes': 0.0, 'traffic_multiplier': 0.9},
+        {'timestamp': '2026-10-17 12:00:00', 'route_name': 'S', 'distance_km': 10.0,
+         'duration_in_traffic_minutes': 30.0, 'delay_minutes': 10.0}
+    ]))
+    assert df['duration_minutes'].tolist() == [20.0, 20.0]
+    assert df['traffic_multiplier'].tolist() == [0.9, 1.5]
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_collected_records_keep_their_base_duration(monkeypatch, vectorized):
+    monkeypatch.setattr(test2, 'VECTORIZED_SIMULATION', vectorized)
+    route_infos = [(route, (12000.0, 1200.0)) for route in ROUTES]
+    df = normalize_records(pd.DataFrame(test2.build_records(route_infos, SATURDAY_NOON)))
+
+    assert (df['duration_minutes'] == 20.0).all()
+    assert (df['traffic_multiplier'] < 1).any()
+    implied = df['duration_in_traffic_minutes'] / df['duration_minutes']
+    assert (implied - df['traffic_multiplier']).abs().max() < 0.006  # Both rounded to 2 places
+
+
+def test_typed_loader_applies_the_compact_schema(tmp_path, records):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    store.append(records('2026-10-17 06:00', 8))
+    with open(store.path, 'a') as f:  # An older row: "0.0"-style flags and blank calendar fields
+        f.write('2026-10-17 09:00:00,,,,,,,Jabi to CBD,Jabi,CBD,12.0,20.0,30.0,10.0,24.0,Heavy Traffic,1.5\n')
+
+    df = read_csv_typed(store.path)
+    assert pd.api.types.is_datetime64_any_dtype(df['timestamp'])
+    for column in ['route_name', 'origin', 'destination', 'traffic_status', 'day_of_week']:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert {str(df[column].dtype) for column in ['hour', 'is_weekend', 'is_rush_hour']} == {'int8'}
+    assert {str(df[column].dtype) for column in ['distance_km', 'delay_minutes', 'traffic_multiplier']} == {'float32'}
+    assert df.iloc[-1][['hour', 'is_weekend', 'is_rush_hour']].tolist() == [9, 1, 1]  # Derived from the timestamp
+
+    assert df.equals(read_traffic(store.path))
+    chunks = list(read_csv_typed(store.path, chunksize=10))
+    assert sum(len(chunk) for chunk in chunks) == len(df) and chunks[0]['hour'].dtype == 'int8'
+    untyped = pd.read_csv(store.path)
+    assert df.memory_usage(deep=True).sum() < untyped.memory_usage(deep=True).sum() / 2
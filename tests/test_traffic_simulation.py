@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from traffic_simulation import simulate_batch, simulate_cycle, status_levels
+
+NAMES = [f"Route {i}" for i in range(50)]
+BASE = np.linspace(10, 60, len(NAMES))
+DISTANCE = BASE / 2
+MONDAY_8AM = datetime(2026, 10, 12, 8, 0)
+SATURDAY_8AM = datetime(2026, 10, 17, 8, 0)
+
+
+def test_seeded_cycles_do_not_depend_on_route_order():
+    forward = simulate_cycle(NAMES, BASE, DISTANCE, MONDAY_8AM, seed=7)
+    order = np.random.default_rng(0).permutation(len(NAMES))
+    shuffled = simulate_cycle([NAMES[i] for i in order], BASE[order], DISTANCE[order], MONDAY_8AM, seed=7)
+    assert np.allclose(shuffled['traffic_multiplier'], forward['traffic_multiplier'][order])
+    assert not np.allclose(simulate_cycle(NAMES, BASE, DISTANCE, MONDAY_8AM, seed=8)['traffic_multiplier'],
+                           forward['traffic_multiplier'])
+
+
+@pytest.mark.parametrize('when, low, high', [(MONDAY_8AM, 1.3, 1.8), (SATURDAY_8AM, 0.9, 1.1)])
+def test_basic_profile_follows_test2_rules(when, low, high):
+    simulated = simulate_cycle(NAMES, BASE, DISTANCE, when, seed=1, profile='basic')
+    multiplier = simulated['traffic_multiplier']
+    assert ((multiplier >= low) & (multiplier <= high)).all()
+    assert np.allclose(simulated['duration_in_traffic_minutes'], BASE * multiplier)
+    assert (simulated['delay_minutes'] >= 0).all()
+    expected = np.where(multiplier > 1.5, "Heavy Traffic", np.where(multiplier > 1.2, "Moderate Traffic", "Smooth Traffic"))
+    assert (simulated['traffic_status'] == expected).all()
+
+
+def test_standard_profile_labels_status_from_delay():
+    uniforms = np.random.default_rng(3).random((2000, 2))
+    hours = np.arange(2000) % 24
+    weekdays = np.arange(2000) % 7
+    simulated = simulate_batch(hours, weekdays, np.full(2000, 40.0), np.full(2000, 20.0), uniforms)
+    delay, status = simulated['delay_minutes'], simulated['traffic_status']
+    assert (status[delay < 5] == "No Traffic").all()
+    assert (status[(delay >= 15) & (delay < 30)] == "Moderate Traffic").all()
+    assert (status[delay >= 30] == "Heavy Traffic").all()
+    assert set(status) <= set(status_levels())
+    assert np.allclose(simulated['avg_speed_kmh'], 20.0 / simulated['duration_in_traffic_minutes'] * 60)
@@ -0,0 +1,184 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from traffic_store import CsvTrafficStore, open_store, pa, read_tail
+
+BACKENDS = ['csv', 'sqlite'] + (['parquet'] if pa is not None else [])
+
+
+def store_at(tmp_path, backend):
+    names = {'csv': 'traffic.csv', 'sqlite': 'traffic.db', 'parquet': 'traffic_parquet'}
+    return open_store(backend, str(tmp_path / names[backend]))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_append_dedup_manifest_aggregates_round_trip(tmp_path, backend, records):
+    store = store_at(tmp_path, backend)
+    first = records('2026-10-01 07:00', 8)
+    assert store.append(first) == len(first)
+    # The same batch again, plus new rows: only the new rows are written
+    second = records('2026-10-01 09:00', 4)
+    assert store.append(first + second) == len(second)
+
+    rows = len(first) + len(second)
+    summary = store.summary()
+    assert summary['rows'] == rows == len(store.read())
+    assert summary['min_timestamp'] == '2026-10-01 07:00:00'
+    assert summary['max_timestamp'] == '2026-10-01 09:45:00'
+    assert sum(summary['route_counts'].values()) == rows
+
+    stats = store.aggregates.statistics(store)
+    assert stats['total_records'] == rows
+    assert stats['date_range'] == '2026-10-01 to 2026-10-01'
+    df = store.read()
+    assert stats['traffic_distribution'] == df['traffic_status'].value_counts().to_dict()
+    assert len(store.latest.records(store)) == 3
+
+    # Sidecars rebuilt from the data agree with the ones kept up to date by append
+    rebuilt = store.rebuild_summary()
+    assert (rebuilt['rows'], rebuilt['route_counts']) == (summary['rows'], summary['route_counts'])
+    os.remove(store.aggregates.filename)
+    fresh = open_store(backend, store.path)
+    assert fresh.aggregates.statistics(fresh) == stats
+
+
+def test_csv_manifest_catches_up_with_other_writers(tmp_path, records):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    store.append(records('2026-10-01 07:00', 4))
+    other = CsvTrafficStore(store.path)  # Another process
+    other.append(records('2026-10-01 08:00', 2))
+    assert store.summary()['rows'] == 18
+    assert store.aggregates.statistics(store)['total_records'] == 18
+
+
+def test_csv_manifest_skips_malformed_tail_rows(tmp_path, records, capsys):
+    store = CsvTrafficStore(str(tmp_path / 'traffic.csv'))
+    store.append(records('2026-10-01 07:00', 2))
+    # A writer that skipped normalize_records appends rows with the wrong number of fields
+    raw = pd.DataFrame(records('2026-10-01 08:00', 2))
+    with open(store.path, 'a') as f:
+        f.write(raw.to_csv(header=False, index=False))
+    assert store.summary()['rows'] == 6
+    assert 'Skipped 6 malformed rows' in capsys.readouterr().out
+    assert store.append(records('2026-10-01 09:00', 1)) == 3
+    assert store.summary()['rows'] == 9
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_snapshots_catch_up_with_late_rows_in_append_order(tmp_path, backend, records):
+    store = store_at(tmp_path, backend)
+    store.append(records('2026-10-01 07:00', 8))
+    store.aggregates.statistics(store)
+
+    other = open_store(backend, store.path)  # Another process
+    other.append(records('2026-10-01 12:00', 2))  # Its first batch checkpoints the stats...
+    other.append(records('2026-09-28 07:00', 1))  # ...a late one only updates them in memory
+    with open(other.aggregates.filename) as f:
+        assert json.load(f)['rows'] == 30
+
+    stats = store.aggregates.statistics(store)
+    assert stats['total_records'] == 33
+    assert stats['date_range'] == '2026-09-28 to 2026-10-01'
+    assert store.aggregates.statistics(store, day='2026-09-28')['total_records'] == 3
+    assert store.aggregates.statistics(store, day='2026-10-01')['total_records'] == 30
+    # ...and the duplicate index saw the late keys too
+    assert store.append(records('2026-09-28 07:00', 1)) == 0
+
+
+@pytest.mark.skipif(pa is None, reason="needs pyarrow")
+def test_parquet_compact_keeps_snapshots_in_step(tmp_path, records):
+    store = store_at(tmp_path, 'parquet')
+    store.append(records('2026-09-30 20:00', 1) + records('2026-10-01 07:00', 4))
+    store.aggregates.statistics(store)
+    other = open_store('parquet', store.path)
+    other.append(records('2026-10-01 12:00', 1))
+    other.append(records('2026-09-30 08:00', 1))  # Late, not checkpointed, and merged away below
+
+    store.compact(before='2026-10-01')
+    assert len(os.listdir(store.partition_dir('2026-09-30'))) == 1
+    other.append(records('2026-10-02 07:00', 1))
+    fresh = open_store('parquet', store.path)
+    assert fresh.aggregates.statistics(fresh, day='2026-09-30')['total_records'] == 6
+    assert fresh.aggregates.statistics(fresh)['total_records'] == 24
+
+
+@pytest.mark.skipif(pa is None, reason="needs pyarrow")
+def test_parquet_partitions_by_date_and_prunes_reads(tmp_path, records):
+    store = store_at(tmp_path, 'parquet')
+    store.append(records('2026-10-01 22:00', 16))  # 22:00 to 01:45 next day
+    store.append(records('2026-10-02 02:00', 4))
+    assert {'date=2026-10-01', 'date=2026-10-02'} <= set(os.listdir(store.path))
+    assert len(os.listdir(store.partition_dir('2026-10-02'))) == 2  # One part per append
+
+    window = store.read(columns=['timestamp', 'route_name'], start='2026-10-02 01:00', end='2026-10-02 02:30')
+    assert list(window.columns) == ['timestamp', 'route_name'] and len(window) == 6 * 3
+    typed = store.read(typed=True)
+    assert typed['route_name'].dtype == 'category' and typed['delay_minutes'].dtype == 'float32'
+
+    chunks = list(store.iter_chunks(filters={'route_name': ['Jabi to CBD']}, chunk_rows=5))
+    assert sum(len(chunk) for chunk in chunks) == 20
+    assert pd.concat(chunks)['timestamp'].is_monotonic_increasing
+
+    store.compact(before='2026-10-03')
+    assert len(os.listdir(store.partition_dir('2026-10-02'))) == 1
+    assert len(store.read()) == 60 and store.aggregates.statistics(store)['total_records'] == 60
+
+
+def test_sqlite_store_uses_wal_and_indexed_reads(tmp_path, records):
+    store = store_at(tmp_path, 'sqlite')
+    store.append(records('2026-10-01 07:00', 8))
+    connection = store.connection()
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(traffic)")}
+    assert {'idx_traffic_route_time', 'idx_traffic_time'} <= indexes
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM traffic WHERE timestamp >= ? ORDER BY timestamp", ('2026-10-01 08:00:00',)
+    ).fetchall()
+    assert any('idx_traffic_time' in row[-1] for row in plan)
+
+    window = store.read(start='2026-10-01 08:00', end='2026-10-01 08:30')
+    assert len(window) == 6 and window['timestamp'].min() == '2026-10-01 08:00:00'
+    assert store.read(columns=['route_name'], typed=True)['route_name'].dtype == 'category'
+    with pytest.raises(ValueError):
+        store.read(columns=['no_such_column'])
+
+    # Each thread reads over its own connection while the main one stays open
+    with ThreadPoolExecutor(2) as pool:
+        assert list(pool.map(lambda _: len(store.read()), range(2))) == [24, 24]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_tail_returns_the_most_recent_records(tmp_path, backend, records, monkeypatch):
+    monkeypatch.setattr('traffic_store.TAIL_BLOCK_BYTES', 256)  # Several backward steps for the CSV
+    store = store_at(tmp_path, backend)
+    store.append(records('2026-10-01 07:00', 40))
+    everything = store.read()
+
+    last = store.tail(n=10)
+    assert len(last) == 10
+    assert last['timestamp'].astype(str).tolist() == everything['timestamp'].astype(str).tail(10).tolist()
+    recent = store.tail(since='2026-10-01 16:00', columns=['timestamp', 'route_name'])
+    assert list(recent.columns) == ['timestamp', 'route_name'] and len(recent) == 4 * 3
+    assert len(store.tail(n=2, since='2026-10-01 16:00')) == 2
+    assert len(store.tail(n=1000)) == len(everything)
+    assert len(store.tail(since='2026-10-02')) == 0
+
+
+def test_read_tail_seeks_from_the_end_of_the_csv(tmp_path, records, monkeypatch):
+    monkeypatch.setattr('traffic_store.TAIL_BLOCK_BYTES', 1024)
+    store = store_at(tmp_path, 'csv')
+    store.append(records('2026-10-01 07:00', 400))
+    parsed_bytes = []
+    read_csv = pd.read_csv
+
+    def counting_read_csv(source, **kwargs):
+        parsed_bytes.append(len(source.getvalue()))
+        return read_csv(source, **kwargs)
+
+    monkeypatch.setattr(pd, 'read_csv', counting_read_csv)
+    assert len(read_tail(store.path, n=6)) == 6
+    assert len(parsed_bytes) == 1 and parsed_bytes[0] < 4096  # Of a ~150 KB file
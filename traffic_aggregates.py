@@ -0,0 +1,167 @@
+import math
+
+import pandas as pd
+
+from store_snapshot import StoreSnapshot
+
+# =========================
+# CONFIGURATION
+# =========================
+STATS_SUFFIX = '.stats.json'
+STATS_CHECKPOINT_ROWS = 2000  # The per-day tables grow with history: rewrite the file at most
+STATS_CHECKPOINT_SECONDS = 60  # every 2000 rows or once a minute rather than every micro-batch
+AGGREGATE_COLUMNS = ['timestamp', 'route_name', 'traffic_status', 'delay_minutes']
+
+# Table name -> the keys it is grouped by; pair tables nest ({route: {hour: cell}}) so one
+# route or day is a single lookup. Every cell holds [rows, delays, sum of delay, sum of
+# squared delay] (delays: rows with a delay_minutes value)
+GROUPINGS = {
+    'hour': ['hour'],
+    'status': ['status'],
+    'route': ['route'],
+    'day': ['day'],
+    'route_hour': ['route', 'hour'],
+    'route_status': ['route', 'status'],
+    'route_day': ['route', 'day'],
+    'day_hour': ['day', 'hour'],
+    'day_status': ['day', 'status'],
+    'day_route': ['day', 'route']
+}
+
+
+def batch_cells(df):
+    """{table: {key: cell}} (or {key: {key: cell}} for pairs) for a batch of records"""
+    timestamps = pd.to_datetime(df['timestamp'], errors='coerce')
+    delay = pd.to_numeric(df['delay_minutes'], errors='coerce').astype(float)
+    frame = pd.DataFrame({
+        'day': timestamps.dt.strftime('%Y-%m-%d'),
+        'hour': timestamps.dt.hour.astype('Int64').astype(str),
+        'route': df['route_name'].astype(object),
+        'status': df['traffic_status'].astype(object),
+        'delays': delay.notna().astype(int),
+        'delay': delay.fillna(0.0),
+        'squares': delay.fillna(0.0) ** 2
+    }).dropna(subset=['day', 'route'])
+    frame['status'] = frame['status'].fillna('Unknown')
+
+    # One groupby at the finest grain, then every table is a sum over those groups
+    names = ['day', 'hour', 'route', 'status']
+    grouped = frame.groupby(names, sort=False).agg(
+        rows=('delays', 'size'), delays=('delays', 'sum'), delay=('delay', 'sum'), squares=('squares', 'sum')
+    )
+    cells = {table: {} for table in GROUPINGS}
+    for key, r, n, s, q in zip(grouped.index, grouped['rows'], grouped['delays'],
+                               grouped['delay'], grouped['squares']):
+        values = dict(zip(names, key))
+        cell = [int(r), int(n), float(s), float(q)]
+        for table, keys in GROUPINGS.items():
+            target = cells[table]
+            for name in keys[:-1]:
+                target = target.setdefault(values[name], {})
+            current = target.get(values[keys[-1]])
+            target[values[keys[-1]]] = cell if current is None else [a + b for a, b in zip(current, cell)]
+    return cells
+
+
+def merge_cells(old, new):
+    """Add new cells (or nested tables of cells) into a copy of old"""
+    merged = dict(old)
+    for key, value in new.items():
+        current = merged.get(key)
+        if current is None:
+            merged[key] = value
+        elif isinstance(value, dict):
+            merged[key] = merge_cells(current, value)
+        else:
+            merged[key] = [a + b for a, b in zip(current, value)]
+    return merged
+
+
+def date_range(first, last):
+    """'first date to last date' from two timestamps (text or Timestamp), as every report shows it"""
+    first = str(first)[:10] if first is not None else None
+    last = str(last)[:10] if last is not None else None
+    return f"{first} to {last}"
+
+
+def delay_summary(cell):
+    """Record count, mean and standard deviation of delay from one cell"""
+    rows, delays, total, squares = cell
+    if delays == 0:
+        return {'records': rows, 'avg_delay': None, 'std_delay': None}
+    mean = total / delays
+    variance = max(squares / delays - mean * mean, 0.0)
+    return {'records': rows, 'avg_delay': round(mean, 2), 'std_delay': round(math.sqrt(variance), 2)}
+
+
+class TrafficAggregates(StoreSnapshot):
+    """
+    Running counts, delay sums and sums of squares by hour, status, route
+    and day (and their pairs), folded in as each batch is appended and
+    checkpointed every STATS_CHECKPOINT_ROWS rows or STATS_CHECKPOINT_SECONDS
+    (a StoreSnapshot). The report reads a few small tables instead of
+    loading the history; a missing snapshot is rebuilt from every storage
+    tier.
+    """
+
+    checkpoint_rows = STATS_CHECKPOINT_ROWS
+    checkpoint_seconds = STATS_CHECKPOINT_SECONDS
+
+    def empty(self):
+        return {'rows': 0, 'first': None, 'last': None, 'tables': {table: {} for table in GROUPINGS}}
+
+    def fold(self, state, df):
+        df = df.dropna(subset=['timestamp', 'route_name'])
+        if len(df) == 0:
+            return state
+        timestamps = pd.to_datetime(df['timestamp'], errors='coerce').dropna().dt.strftime('%Y-%m-%d %H:%M:%S')
+        tables = dict(state['tables'])
+        for table, cells in batch_cells(df).items():
+            tables[table] = merge_cells(tables.get(table, {}), cells)
+        first = min(filter(None, [state['first'], timestamps.min()]))
+        last = max(filter(None, [state['last'], timestamps.max()]))
+        return dict(state, first=first, last=last, tables=tables)
+
+    def rebuild(self, store):
+        # History that retention moved to the cold tier still counts
+        from retention import read_history  # retention imports traffic_store, which imports this module
+        return self.fold(self.empty(), read_history(store.path, columns=AGGREGATE_COLUMNS, typed=False))
+
+    def statistics(self, store, route=None, day=None):
+        """
+        Report statistics for everything, one route or one day (route wins
+        if both are given), plus the per-route or per-day breakdown of that
+        scope. A handful of lookups in the pre-aggregated tables.
+        """
+        state = self.current(store)
+        tables = state['tables']
+        first, last = state['first'], state['last']
+        if route is not None:
+            statuses, hours = tables['route_status'].get(route, {}), tables['route_hour'].get(route, {})
+            breakdown_name, breakdown = 'by_day', tables['route_day'].get(route, {})
+            unique_routes = 1
+        elif day is not None:
+            statuses, hours = tables['day_status'].get(day, {}), tables['day_hour'].get(day, {})
+            breakdown_name, breakdown = 'by_route', tables['day_route'].get(day, {})
+            unique_routes = len(breakdown)
+            first, last = f"{day} 00:00:00", f"{day} 23:59:59"
+        else:
+            statuses, hours = tables['status'], tables['hour']
+            breakdown_name, breakdown = 'by_route', tables['route']
+            unique_routes = len(breakdown)
+
+        distribution = {status: cell[0] for status, cell in statuses.items()}
+        if not distribution:
+            return None
+        by_hour = sorted((int(hour), delay_summary(cell)['avg_delay']) for hour, cell in hours.items())
+        return {
+            'scope': route or day,
+            'total_records': sum(distribution.values()),
+            'date_range': date_range(first, last),
+            'first_timestamp': first,
+            'last_timestamp': last,
+            'unique_routes': unique_routes,
+            'traffic_distribution': dict(sorted(distribution.items(), key=lambda item: -item[1])),
+            'avg_delay_by_hour': {hour: delay for hour, delay in by_hour if delay is not None},
+            breakdown_name: {key: delay_summary(cell) for key, cell in sorted(breakdown.items())}
+        }
@@ -0,0 +1,198 @@
+import threading
+import zlib
+from collections import OrderedDict
+
+import pandas as pd
+
+from migrate_storage import repair_shifted_rows
+from retention import iter_history
+from traffic_schema import MEASURE_COLUMNS, SMALL_INT_COLUMNS, TRAFFIC_COLUMNS, normalize_records
+from traffic_store import arrow_schema, pa, to_timestamp
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+try:
+    import zstandard
+except ImportError:
+    # zstd is offered only when the zstandard package is installed; gzip always is
+    zstandard = None
+
+# =========================
+# CONFIGURATION
+# =========================
+EXPORT_CHUNK_ROWS = 50000  # Rows read, encoded and sent at a time
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')  # Columnar; one row group per chunk
+}
+FILTER_PARAMS = {'route': 'route_name', 'origin': 'origin', 'destination': 'destination', 'status': 'traffic_status'}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+LENGTH_CACHE_ENTRIES = 32  # Export sizes remembered for Range requests
+
+
+def available_encodings():
+    return ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+
+
+def parse_export_args(args):
+    """
+    Export options from query arguments: format, time range (start/end,
+    anything pandas parses) and the route/origin/destination/status
+    filters (each may repeat). Raises ValueError on anything invalid.
+    """
+    export_format = args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {export_format!r} (expected one of {', '.join(EXPORT_FORMATS)})")
+    if export_format == 'parquet' and (pa is None or pq is None):
+        raise ValueError("Parquet export needs pyarrow")
+    try:
+        start, end = to_timestamp(args.get('start')), to_timestamp(args.get('end'))
+    except ValueError as e:
+        raise ValueError(f"Bad start/end: {e}")
+    filters = {column: args.getlist(param) for param, column in FILTER_PARAMS.items() if args.getlist(param)}
+    return {'format': export_format, 'start': start, 'end': end, 'filters': filters}
+
+
+def choose_encoding(accept_encodings, requested=None):
+    """
+    Content-Encoding for an export: ?compression= if given ('identity',
+    'gzip' or 'zstd'), otherwise the best the client accepts.
+    """
+    if requested is not None:
+        if requested not in available_encodings() + ['identity']:
+            raise ValueError(f"Unsupported compression {requested!r}")
+        return requested
+    return accept_encodings.best_match(available_encodings()) or 'identity'
+
+
+def as_text_timestamps(df):
+    """Timestamps as 'YYYY-MM-DD HH:MM:SS' text whichever tier the chunk came from"""
+    if pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        df = df.assign(timestamp=df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S'))
+    return df
+
+
+def encode_csv(frames):
+    yield ','.join(TRAFFIC_COLUMNS).encode('utf-8') + b'\n'
+    for df in frames:
+        yield as_text_timestamps(df).to_csv(header=False, index=False).encode('utf-8')
+
+
+def encode_ndjson(frames):
+    for df in frames:
+        yield as_text_timestamps(df).to_json(orient='records', lines=True).encode('utf-8') + b'\n'
+
+
+class ChunkSink:
+    """Write-only file object that hands back what was written since the last drain()"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def typed_chunk(df):
+    """
+    A raw chunk in the parquet schema's types: legacy left-aligned rows
+    repaired, numbers parsed (anything unparsable becomes null) and the
+    calendar fields derived. Rows without a usable timestamp are left out.
+    """
+    df = repair_shifted_rows(df)
+    df = df[pd.to_datetime(df['timestamp'], errors='coerce').notna()].copy()
+    for column in SMALL_INT_COLUMNS + MEASURE_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return normalize_records(df)
+
+
+def encode_parquet(frames):
+    # Plain strings rather than the store's dictionary types: chunks would carry different dictionaries
+    schema = pa.schema([pa.field(f.name, f.type.value_type if pa.types.is_dictionary(f.type) else f.type)
+                        for f in arrow_schema()])
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for df in frames:
+            df = typed_chunk(df)
+            df = df.assign(timestamp=pd.to_datetime(df['timestamp']), date=df['date'].astype(str))
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def compress(chunks, encoding):
+    """Compress a stream of byte chunks as it goes (gzip or zstd); identity passes it through"""
+    if encoding == 'identity':
+        yield from chunks
+        return
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip framing, mtime 0
+    else:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(path, options, encoding='identity', chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    The export as a generator of byte chunks, from every storage tier.
+    Only one chunk of rows is in memory at a time, and the bytes are the
+    same for the same data and options, so byte ranges are stable.
+    """
+    frames = (df.reindex(columns=TRAFFIC_COLUMNS) for df in
+              iter_history(path, start=options['start'], end=options['end'],
+                           filters=options['filters'], chunk_rows=chunk_rows))
+    encoder = {'csv': encode_csv, 'ndjson': encode_ndjson, 'parquet': encode_parquet}[options['format']]
+    for chunk in compress(encoder(frames), encoding):
+        if chunk:
+            yield chunk
+
+
+class ExportLengths:
+    """
+    Sizes of exports by (data version, URL, encoding), for Range requests:
+    a resumed download needs the complete length, which a streamed export
+    only has after one counting pass.
+    """
+
+    def __init__(self, max_entries=LENGTH_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.lengths = OrderedDict()
+        self.lock = threading.Lock()
+
+    def length(self, key, stream):
+        with self.lock:
+            if key in self.lengths:
+                self.lengths.move_to_end(key)
+                return self.lengths[key]
+        length = sum(len(chunk) for chunk in stream())
+        with self.lock:
+            self.lengths[key] = length
+            while len(self.lengths) > self.max_entries:
+                self.lengths.popitem(last=False)
+        return length
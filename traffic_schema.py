@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# TRAFFIC DATA SCHEMA
+# =========================
+# Column order of abuja_traffic_data.csv (as written by test.py)
+TRAFFIC_COLUMNS = [
+    'timestamp', 'date', 'time', 'day_of_week', 'hour', 'is_weekend', 'is_rush_hour',
+    'route_name', 'origin', 'destination', 'distance_km', 'duration_minutes',
+    'duration_in_traffic_minutes', 'delay_minutes', 'avg_speed_kmh',
+    'traffic_status', 'traffic_multiplier'
+]
+TIME_COLUMNS = ['date', 'time', 'day_of_week', 'hour', 'is_weekend', 'is_rush_hour']
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Compact in-memory types: every string column repeats a handful of values
+CATEGORY_COLUMNS = ['date', 'time', 'day_of_week', 'route_name', 'origin', 'destination', 'traffic_status']
+SMALL_INT_COLUMNS = ['hour', 'is_weekend', 'is_rush_hour']
+MEASURE_COLUMNS = [
+    'distance_km', 'duration_minutes', 'duration_in_traffic_minutes',
+    'delay_minutes', 'avg_speed_kmh', 'traffic_multiplier'
+]
+
+
+def csv_dtypes(columns=None, float_dtype='float32'):
+    """read_csv dtypes for TRAFFIC_COLUMNS (flags/hours parse as floats: the CSV has "0.0" and blanks)"""
+    dtypes = {column: 'category' for column in CATEGORY_COLUMNS}
+    dtypes.update({column: 'float32' for column in SMALL_INT_COLUMNS})
+    dtypes.update({column: float_dtype for column in MEASURE_COLUMNS})
+    dtypes['timestamp'] = str
+    if columns is not None:
+        dtypes = {column: dtype for column, dtype in dtypes.items() if column in columns}
+    return dtypes
+
+
+def apply_schema(df, float_dtype='float32'):
+    """
+    Cast loaded records to the compact schema, in place where possible:
+    parsed timestamp, categoricals for repeated strings, int8 hours/flags
+    (blanks derived from the timestamp) and float_dtype measures.
+    """
+    if 'timestamp' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format=TIMESTAMP_FORMAT, errors='coerce')
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    for column in SMALL_INT_COLUMNS:
+        if column not in df.columns or df[column].dtype == np.int8:
+            continue
+        values = df[column]
+        if values.isna().any() and 'timestamp' in df.columns:
+            timestamps = df['timestamp']
+            derived = {
+                'hour': timestamps.dt.hour,
+                'is_weekend': (timestamps.dt.weekday >= 5).astype(int),
+                'is_rush_hour': timestamps.dt.hour.isin([7, 8, 9, 17, 18, 19]).astype(int)
+            }[column]
+            values = values.fillna(derived)
+        df[column] = values.fillna(0).astype(np.int8)
+    for column in MEASURE_COLUMNS:
+        if column in df.columns and df[column].dtype != float_dtype:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(float_dtype)
+    return df
+
+
+def read_csv_typed(source, columns=None, float_dtype='float32', **kwargs):
+    """pd.read_csv with the compact schema applied while parsing, not after"""
+    df = pd.read_csv(source, usecols=list(columns) if columns else None,
+                     dtype=csv_dtypes(columns, float_dtype), **kwargs)
+    if kwargs.get('chunksize'):
+        return (apply_schema(chunk, float_dtype) for chunk in df)
+    return apply_schema(df, float_dtype)
+
+
+def normalize_records(df):
+    """
+    Bring a batch of records to TRAFFIC_COLUMNS, in order.
+    test2.py only writes 8 columns and some older CSV rows have blank
+    calendar fields; everything missing is derived from the timestamp and
+    the duration/delay/distance columns that every writer provides.
+    """
+    df = df.copy()
+    for column in TRAFFIC_COLUMNS:
+        if column not in df.columns:
+            df[column] = np.nan
+
+    timestamps = pd.to_datetime(df['timestamp'])
+    derived = {
+        'date': timestamps.dt.strftime('%Y-%m-%d'),
+        'time': timestamps.dt.strftime('%H:%M:%S'),
+        'day_of_week': timestamps.dt.day_name(),
+        'hour': timestamps.dt.hour,
+        'is_weekend': (timestamps.dt.weekday >= 5).astype(int),
+        'is_rush_hour': timestamps.dt.hour.isin([7, 8, 9, 17, 18, 19]).astype(int)
+    }
+    for column in TIME_COLUMNS:
+        df[column] = df[column].where(df[column].notna(), derived[column])
+
+    in_traffic = df['duration_in_traffic_minutes'].astype(float)
+    base = df['duration_minutes'].astype(float)
+    base = base.where(base.notna(), in_traffic - df['delay_minutes'].astype(float))
+    df['duration_minutes'] = base.round(2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.where(in_traffic > 0, df['distance_km'].astype(float) / in_traffic * 60, 0.0)
+        multiplier = np.where(base > 0, in_traffic / base, np.nan)
+    df['avg_speed_kmh'] = df['avg_speed_kmh'].where(df['avg_speed_kmh'].notna(), pd.Series(speed, index=df.index).round(2))
+    df['traffic_multiplier'] = df['traffic_multiplier'].where(
+        df['traffic_multiplier'].notna(), pd.Series(multiplier, index=df.index).round(2))
+
+    df['timestamp'] = timestamps.dt.strftime('%Y-%m-%d %H:%M:%S')
+    for column in ['hour', 'is_weekend', 'is_rush_hour']:
+        df[column] = df[column].astype(float).astype(int)
+    return df[TRAFFIC_COLUMNS]
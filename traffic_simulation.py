@@ -0,0 +1,147 @@
+import zlib
+
+import numpy as np
+
+# =========================
+# CONFIGURATION
+# =========================
+# 'standard' follows simulate_traffic_conditions in test.py (lunch, weekend,
+# Friday prayers, incident noise, status from delay); 'basic' follows the
+# shorter version in test2.py (rush hours only, status from the multiplier).
+PROFILES = ('standard', 'basic')
+DRAWS_PER_SAMPLE = 2  # Base multiplier draw + incident/weather noise draw
+
+DELAY_STATUS_THRESHOLDS = [(5, "No Traffic"), (15, "Light Traffic"), (30, "Moderate Traffic")]
+DELAY_STATUS_OTHERWISE = "Heavy Traffic"
+MULTIPLIER_STATUS_THRESHOLDS = [(1.5, "Heavy Traffic"), (1.2, "Moderate Traffic")]  # 'basic': above the limit
+MULTIPLIER_STATUS_OTHERWISE = "Smooth Traffic"
+
+
+def route_id(route_name):
+    """Stable 32-bit id for a route name (same on every machine and run)"""
+    return zlib.crc32(route_name.encode('utf-8'))
+
+
+def route_generator(seed, route_name, *stream_keys):
+    """
+    Independent Generator for one route. The stream depends only on the seed,
+    the route name and the extra keys (e.g. the cycle timestamp), never on
+    the order routes are processed in.
+    """
+    spawn_key = (route_id(route_name),) + tuple(int(k) for k in stream_keys)
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=spawn_key))
+
+
+def cycle_uniforms(route_names, seed, cycle_key):
+    """(n_routes, DRAWS_PER_SAMPLE) uniforms, one substream per route for this cycle"""
+    return np.array([
+        route_generator(seed, name, cycle_key).random(DRAWS_PER_SAMPLE)
+        for name in route_names
+    ]).reshape(len(route_names), DRAWS_PER_SAMPLE)
+
+
+def traffic_multipliers(hours, weekdays, uniforms, profile='standard'):
+    """
+    Vectorized simulate_traffic_conditions multiplier.
+    hours and weekdays (Monday=0) broadcast against uniforms[:, 0].
+    """
+    hours = np.asarray(hours)
+    weekdays = np.asarray(weekdays)
+    u_base = uniforms[:, 0]
+    is_weekday = weekdays < 5
+
+    if profile == 'basic':
+        conditions = [
+            is_weekday & (hours >= 7) & (hours <= 9),
+            is_weekday & (hours >= 17) & (hours <= 19)
+        ]
+        ranges = [(1.3, 1.8), (1.5, 2.0)]
+        otherwise = (0.9, 1.1)
+    else:
+        conditions = [
+            is_weekday & (hours >= 7) & (hours <= 9),
+            is_weekday & (hours >= 17) & (hours <= 19),
+            is_weekday & (hours >= 12) & (hours <= 14),
+            is_weekday,
+            (hours >= 10) & (hours <= 18)
+        ]
+        ranges = [(1.3, 1.8), (1.5, 2.0), (1.1, 1.3), (0.9, 1.1), (1.0, 1.2)]
+        otherwise = (0.8, 1.0)
+
+    low = np.select(conditions, [r[0] for r in ranges], otherwise[0])
+    high = np.select(conditions, [r[1] for r in ranges], otherwise[1])
+    multiplier = low + (high - low) * u_base
+
+    if profile != 'basic':
+        # Friday afternoon prayers, then incidents/weather noise
+        multiplier = np.where((weekdays == 4) & (hours >= 13) & (hours <= 15), multiplier * 1.2, multiplier)
+        multiplier = multiplier * (0.95 + 0.20 * uniforms[:, 1])
+
+    return multiplier
+
+
+def status_levels():
+    """Every traffic_status label either profile emits: the 'standard' ones, then those only 'basic' has"""
+    labels = [label for _, label in DELAY_STATUS_THRESHOLDS] + [DELAY_STATUS_OTHERWISE, MULTIPLIER_STATUS_OTHERWISE]
+    return list(dict.fromkeys(labels + [label for _, label in MULTIPLIER_STATUS_THRESHOLDS]))
+
+
+def traffic_status_labels(delay_minutes, multiplier, profile='standard'):
+    if profile == 'basic':
+        return np.select(
+            [multiplier > limit for limit, _ in MULTIPLIER_STATUS_THRESHOLDS],
+            [label for _, label in MULTIPLIER_STATUS_THRESHOLDS],
+            MULTIPLIER_STATUS_OTHERWISE
+        )
+    return np.select(
+        [delay_minutes < limit for limit, _ in DELAY_STATUS_THRESHOLDS],
+        [label for _, label in DELAY_STATUS_THRESHOLDS],
+        DELAY_STATUS_OTHERWISE
+    )
+
+
+def simulate_batch(hours, weekdays, base_duration_minutes, distance_km, uniforms, profile='standard'):
+    """
+    Simulate traffic for many samples at once.
+    Returns a dict of arrays: traffic_multiplier, duration_in_traffic_minutes,
+    delay_minutes, avg_speed_kmh and traffic_status.
+    """
+    base_duration_minutes = np.asarray(base_duration_minutes, dtype=float)
+    distance_km = np.asarray(distance_km, dtype=float)
+
+    multiplier = traffic_multipliers(hours, weekdays, uniforms, profile)
+    duration_in_traffic = base_duration_minutes * multiplier
+    delay = duration_in_traffic - base_duration_minutes
+    if profile == 'basic':
+        delay = np.maximum(delay, 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.where(duration_in_traffic > 0, distance_km / duration_in_traffic * 60, 0.0)
+
+    return {
+        'traffic_multiplier': multiplier,
+        'duration_in_traffic_minutes': duration_in_traffic,
+        'delay_minutes': delay,
+        'avg_speed_kmh': speed,
+        'traffic_status': traffic_status_labels(delay, multiplier, profile)
+    }
+
+
+def simulate_cycle(route_names, base_duration_minutes, distance_km, current_time,
+                   seed=None, profile='standard'):
+    """
+    Simulate one collection cycle for every route in one vectorized call.
+    With a seed, results for a given route and timestamp are reproducible
+    no matter how the routes were fetched or ordered.
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    uniforms = cycle_uniforms(route_names, seed, int(current_time.timestamp()))
+    return simulate_batch(
+        current_time.hour,
+        current_time.weekday(),
+        base_duration_minutes,
+        distance_km,
+        uniforms,
+        profile
+    )
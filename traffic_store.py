@@ -0,0 +1,778 @@
+import csv
+import glob
+import hashlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    # Only the parquet backend needs pyarrow
+    pa = None
+
+from ingest_dedup import KEYS_SUFFIX, DedupIndex
+from latest_state import LATEST_SUFFIX, LatestState
+from store_lock import LOCK_SUFFIX, StoreLock, append_text
+from store_manifest import MANIFEST_SUFFIX, StoreManifest
+from store_snapshot import keep_through_drop
+from traffic_aggregates import STATS_SUFFIX, TrafficAggregates
+from traffic_schema import TRAFFIC_COLUMNS, apply_schema, normalize_records, read_csv_typed
+
+# =========================
+# CONFIGURATION
+# =========================
+STORAGE_BACKENDS = ('csv', 'parquet', 'sqlite')
+CSV_FILENAME = 'abuja_traffic_data.csv'
+PARQUET_DIR = 'abuja_traffic_parquet'
+PARQUET_COMPRESSION = 'zstd'
+SQLITE_FILENAME = 'abuja_traffic.db'
+SQLITE_BUSY_TIMEOUT_SECONDS = 10  # Writers from other processes wait this long for the lock
+CSV_READ_CHUNK_ROWS = 100000  # Rows per chunk when filtering a CSV by time
+TAIL_BLOCK_BYTES = 64 * 1024  # First block read backwards from the end of a CSV (doubles each step)
+LATEST_WINDOW_MINUTES = 120  # Recent window tried first when looking up the latest record per route
+
+# Repeated strings are stored dictionary-encoded and come back as categoricals
+DICTIONARY_COLUMNS = ['day_of_week', 'route_name', 'origin', 'destination', 'traffic_status']
+
+
+def arrow_schema():
+    """Arrow types for TRAFFIC_COLUMNS ('date' is the partition key)"""
+    types = {
+        'timestamp': pa.timestamp('s'),
+        'date': pa.string(),
+        'time': pa.string(),
+        'hour': pa.int8(),
+        'is_weekend': pa.int8(),
+        'is_rush_hour': pa.int8()
+    }
+    for column in DICTIONARY_COLUMNS:
+        types[column] = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([pa.field(column, types.get(column, pa.float64())) for column in TRAFFIC_COLUMNS])
+
+
+def to_timestamp(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+def append_order(part):
+    """Sort key for parquet parts in append order: by the write time in their name; merged and moved parts first"""
+    match = re.search(r'part-(\d+)-[0-9a-f]{8}\.parquet$', part)
+    return (int(match.group(1)) if match else 0, part)
+
+
+def filter_chunk(df, start=None, end=None, filters=None):
+    """Rows of a chunk with timestamp in [start, end) and every filters column in its allowed values"""
+    mask = pd.Series(True, index=df.index)
+    if start is not None or end is not None:
+        timestamps = pd.to_datetime(df['timestamp'])
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps < end
+    for column, values in (filters or {}).items():
+        mask &= df[column].isin(list(values))
+    return df[mask]
+
+
+class CsvTrafficStore:
+    """The original single append-only CSV file"""
+
+    backend = 'csv'
+
+    def __init__(self, filename=CSV_FILENAME):
+        self.path = filename
+        self.lock = StoreLock(f"{filename}{LOCK_SUFFIX}")
+        self.manifest = StoreManifest(f"{filename}{MANIFEST_SUFFIX}")
+        self.dedup = DedupIndex(f"{filename}{KEYS_SUFFIX}")
+        self.latest = LatestState(f"{filename}{LATEST_SUFFIX}")
+        self.aggregates = TrafficAggregates(f"{filename}{STATS_SUFFIX}")
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def append(self, data_records):
+        """
+        Append records (dicts) in TRAFFIC_COLUMNS order; returns the number written.
+        The batch is rendered first and written in one O_APPEND write while
+        holding the cross-process lock, so rows from different workers
+        never interleave.
+        """
+        if not data_records:
+            return 0
+        df = normalize_records(pd.DataFrame(data_records))
+        with self.lock:
+            df = self.dedup.admit(df, self)
+            if len(df) == 0:
+                return 0
+            base = self.summary()
+            header = not self.exists() or os.path.getsize(self.path) == 0
+            append_text(self.path, df.to_csv(header=header, index=False))
+            state = self.manifest.record(df, byte_offset=os.path.getsize(self.path), base=base)
+            self.dedup.committed(df)
+            self.latest.record(df, state['rows'])
+            self.aggregates.record(df, state['rows'])
+        return len(df)
+
+    def summary(self):
+        """
+        Manifest for the file. If something else appended to the CSV since,
+        only the bytes past the recorded offset are read to catch up; a
+        missing manifest or a file that shrank is rebuilt from scratch.
+        Either one happens under the store lock, so only one process
+        writes the manifest.
+        """
+        if not self.exists():
+            return StoreManifest.empty()
+        size = os.path.getsize(self.path)
+        if size == 0:
+            return StoreManifest.empty()
+        state = self.manifest.load()
+        if state is not None and state['bytes'] == size:
+            return state
+
+        with self.lock:
+            size = os.path.getsize(self.path)
+            state = self.manifest.load()
+            if state is not None and state['bytes'] == size:
+                return state  # Another process caught up first
+
+            if state is not None and 0 < state['bytes'] < size:
+                with open(self.path, 'rb') as f:
+                    f.seek(state['bytes'])
+                    tail = self.parse_tail(f.read())
+                return self.manifest.record(tail, byte_offset=size, base=state)
+
+            state = StoreManifest.empty()
+            for chunk in pd.read_csv(self.path, usecols=['timestamp', 'route_name'], chunksize=CSV_READ_CHUNK_ROWS):
+                state = self.manifest.record(chunk.dropna(subset=['timestamp']), base=state)
+            state['bytes'] = size
+            self.manifest.save(state)
+            return state
+
+    def parse_tail(self, data):
+        """
+        timestamp/route_name of rows appended past the manifest's offset.
+        Rows that don't have the store's columns (a writer that skipped
+        normalize_records) are left out and reported, not fatal to the manifest.
+        """
+        rows = list(csv.reader(io.StringIO(data.decode('utf-8', errors='replace'))))
+        good = [row for row in rows if len(row) == len(TRAFFIC_COLUMNS)]
+        skipped = sum(1 for row in rows if row) - len(good)
+        if skipped:
+            print(f"✗ Skipped {skipped} malformed rows (expected {len(TRAFFIC_COLUMNS)} fields) in {self.path}")
+        tail = pd.DataFrame(good, columns=TRAFFIC_COLUMNS)[['timestamp', 'route_name']]
+        return tail.replace('', None)
+
+    def read(self, columns=None, start=None, end=None, typed=False):
+        """
+        Load records, optionally only some columns and timestamps in [start, end).
+        A CSV can't skip rows, so time filters are applied chunk by chunk to
+        keep memory proportional to the result rather than the file.
+        typed=True parses straight into the compact schema (traffic_schema).
+        """
+        if not self.exists():
+            return pd.DataFrame(columns=columns or TRAFFIC_COLUMNS)
+
+        start, end = to_timestamp(start), to_timestamp(end)
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + (['timestamp'] if start or end else [])))
+        if start is None and end is None:
+            return read_csv_typed(self.path, usecols) if typed else pd.read_csv(self.path, usecols=usecols)
+
+        chunks = []
+        reader = read_csv_typed(self.path, usecols, chunksize=CSV_READ_CHUNK_ROWS) if typed \
+            else pd.read_csv(self.path, usecols=usecols, chunksize=CSV_READ_CHUNK_ROWS)
+        for chunk in reader:
+            timestamps = pd.to_datetime(chunk['timestamp'])
+            mask = pd.Series(True, index=chunk.index)
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps < end
+            chunks.append(chunk[mask])
+        df = pd.concat(chunks, ignore_index=True)
+        if typed:
+            # Chunks with different categories concatenate to object columns
+            df = apply_schema(df)
+        return df[list(columns)] if columns is not None else df
+
+    def iter_chunks(self, columns=None, start=None, end=None, filters=None, chunk_rows=CSV_READ_CHUNK_ROWS):
+        """
+        Records in [start, end) matching filters ({column: allowed values}),
+        as frames of at most chunk_rows rows: memory stays at one chunk
+        whatever the size of the file.
+        """
+        if not self.exists():
+            return
+        start, end = to_timestamp(start), to_timestamp(end)
+        filters = filters or {}
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + ['timestamp'] + list(filters)))
+        for chunk in pd.read_csv(self.path, usecols=usecols, chunksize=chunk_rows):
+            chunk = filter_chunk(chunk, start, end, filters)
+            if len(chunk):
+                yield chunk[list(columns)] if columns is not None else chunk
+
+    def tail(self, n=None, since=None, columns=None):
+        """
+        The last n records and/or the records at or after `since`, read
+        backwards from the end of the file so earlier rows are never parsed.
+        Assumes rows are appended in (roughly) time order, as collectors do.
+        """
+        if not self.exists():
+            return pd.DataFrame(columns=columns or TRAFFIC_COLUMNS)
+        since_text = to_timestamp(since).strftime('%Y-%m-%d %H:%M:%S') if since is not None else None
+
+        with open(self.path, 'rb') as f:
+            header = f.readline()
+            data_start = f.tell()
+            position = f.seek(0, os.SEEK_END)
+            buffer = complete = b''
+            block = TAIL_BLOCK_BYTES
+            while position > data_start:
+                read_size = min(block, position - data_start)
+                position -= read_size
+                f.seek(position)
+                buffer = f.read(read_size) + buffer
+                block *= 2
+
+                # Drop the partial first line unless we've reached the header
+                complete = buffer if position == data_start else buffer[buffer.find(b'\n') + 1:]
+                if not complete:
+                    continue
+                enough = True
+                if n is not None and complete.count(b'\n') < n:
+                    enough = False
+                first_timestamp = complete[:21].decode('utf-8', 'replace').lstrip('"')[:19]  # Quoted or not
+                if since_text is not None and first_timestamp >= since_text:
+                    enough = False
+                if enough:
+                    break
+
+        df = pd.read_csv(io.BytesIO(header + complete), usecols=list(columns) if columns else None) \
+            if complete else pd.DataFrame(columns=columns or TRAFFIC_COLUMNS)
+        if since_text is not None and len(df):
+            df = df[pd.to_datetime(df['timestamp'], errors='coerce') >= to_timestamp(since)]
+        if n is not None:
+            df = df.tail(n)
+        return df.reset_index(drop=True)
+
+    def appended(self, n, columns=None):
+        """The last n records in the order they were appended: the file's last n rows"""
+        return self.tail(n=n, columns=columns)
+
+    def drop_before(self, cutoff):
+        """
+        Remove the records before cutoff (they were moved to another tier):
+        the rows at or after cutoff are copied byte for byte, late-arriving
+        older rows further down the file included, and the copy is swapped
+        in atomically. Returns the rows kept.
+        """
+        cutoff_text = to_timestamp(cutoff).strftime('%Y-%m-%d %H:%M:%S')
+        tmp_path = f"{self.path}.tmp"
+
+        def drop():
+            with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                dst.write(src.readline())
+                dst.writelines(line for line in src
+                               if line[:21].decode('utf-8', 'replace').lstrip('"')[:19] >= cutoff_text)
+            os.replace(tmp_path, self.path)
+            return self.rebuild_summary()['rows']
+
+        with self.lock:
+            if not self.exists():
+                return 0
+            return keep_through_drop(self, [self.latest, self.aggregates], lambda: self.dedup.shrink(self, drop))
+
+    def rebuild_summary(self):
+        self.manifest.reset()
+        return self.summary()
+
+
+class ParquetTrafficStore:
+    """
+    Hive-style date partitions: PARQUET_DIR/date=YYYY-MM-DD/part-*.parquet.
+    Each append writes one small part per date it touches; compact() merges
+    a finished day into one file. Reads push column projection and the
+    time range down to pyarrow, so only the partitions and columns a query
+    needs are opened.
+    """
+
+    backend = 'parquet'
+
+    def __init__(self, root=PARQUET_DIR):
+        if pa is None:
+            raise ImportError("The parquet storage backend needs pyarrow (pip install pyarrow)")
+        self.path = root
+        self.schema = arrow_schema()
+        self.partitioning = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+        self.lock = StoreLock(f"{root.rstrip(os.sep)}{LOCK_SUFFIX}")
+        self.last_date = None
+        self.dedup = DedupIndex(os.path.join(root, f"_{KEYS_SUFFIX.lstrip('.')}"))
+        self.manifest = StoreManifest(os.path.join(root, f"_{MANIFEST_SUFFIX.lstrip('.')}"))
+        self.latest = LatestState(os.path.join(root, f"_{LATEST_SUFFIX.lstrip('.')}"))
+        self.aggregates = TrafficAggregates(os.path.join(root, f"_{STATS_SUFFIX.lstrip('.')}"))
+
+    def exists(self):
+        return bool(glob.glob(os.path.join(self.path, 'date=*', '*.parquet')))
+
+    def partition_dir(self, date):
+        return os.path.join(self.path, f"date={date}")
+
+    def to_table(self, df):
+        df = df.copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        file_schema = pa.schema([field for field in self.schema if field.name != 'date'])
+        return pa.Table.from_pandas(df.drop(columns=['date']), schema=file_schema, preserve_index=False)
+
+    def write_part(self, date, df, name=None):
+        directory = self.partition_dir(date)
+        os.makedirs(directory, exist_ok=True)
+        name = name or f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        # Write under a '_' prefix (ignored by readers), then rename into place
+        tmp_path = os.path.join(directory, f"_{name}")
+        pq.write_table(self.to_table(df), tmp_path, compression=PARQUET_COMPRESSION)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    def append(self, data_records):
+        """Append records (dicts or a DataFrame) to their date partitions; returns the number written"""
+        if data_records is None or len(data_records) == 0:
+            return 0
+        df = data_records if isinstance(data_records, pd.DataFrame) else pd.DataFrame(data_records)
+        df = normalize_records(df)
+        with self.lock:
+            df = self.dedup.admit(df, self)
+            if len(df) == 0:
+                return 0
+            base = self.summary()
+            for date, day in df.groupby('date', sort=True):
+                self.write_part(date, day)
+            state = self.manifest.record(df, base=base)
+            self.dedup.committed(df)
+            self.latest.record(df, state['rows'])
+            self.aggregates.record(df, state['rows'])
+            # A new day started: the previous ones won't grow any more
+            newest = df['date'].max()
+            if self.last_date and newest > self.last_date:
+                self.compact(before=newest)
+            self.last_date = max(self.last_date or newest, newest)
+        return len(df)
+
+    def import_day(self, date, df):
+        """
+        Write one day of records moved here from another tier as a single
+        part, as they are: no duplicate check, so the move keeps every row.
+        The part is named after its contents, so re-running an interrupted
+        move overwrites it instead of adding a second copy. Call
+        rebuild_summary() once the move is done.
+        """
+        df = normalize_records(df)
+        digest = hashlib.blake2b(pd.util.hash_pandas_object(df, index=False).values.tobytes(), digest_size=8)
+        with self.lock:
+            self.write_part(date, df, name=f"part-moved-{digest.hexdigest()}.parquet")
+        return len(df)
+
+    def summary(self):
+        """Manifest for the store (rebuilt from the timestamp/route_name columns if missing)"""
+        state = self.manifest.load()
+        if state is not None:
+            return state
+        with self.lock:
+            state = self.manifest.load()
+            if state is None:
+                state = StoreManifest.empty()
+                if self.exists():
+                    state = self.manifest.record(self.read(columns=['timestamp', 'route_name']), base=state)
+        return state
+
+    def dataset(self):
+        return ds.dataset(self.path, format='parquet', schema=self.schema, partitioning=self.partitioning)
+
+    def read(self, columns=None, start=None, end=None, typed=False):
+        """Load records, optionally only some columns and timestamps in [start, end)"""
+        if not self.exists():
+            return pd.DataFrame(columns=columns or TRAFFIC_COLUMNS)
+
+        start, end = to_timestamp(start), to_timestamp(end)
+        expression = None
+        conditions = []
+        if start is not None:
+            conditions += [ds.field('date') >= start.strftime('%Y-%m-%d'),
+                           ds.field('timestamp') >= pa.scalar(start.to_pydatetime(), pa.timestamp('s'))]
+        if end is not None:
+            conditions += [ds.field('date') <= end.strftime('%Y-%m-%d'),
+                           ds.field('timestamp') < pa.scalar(end.to_pydatetime(), pa.timestamp('s'))]
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        table = self.dataset().to_table(columns=list(columns) if columns else None, filter=expression)
+        df = table.to_pandas()
+        return apply_schema(df) if typed else df
+
+    def iter_chunks(self, columns=None, start=None, end=None, filters=None, chunk_rows=CSV_READ_CHUNK_ROWS):
+        """Records in [start, end) matching filters, partition by partition in record batches"""
+        if not self.exists():
+            return
+        start, end = to_timestamp(start), to_timestamp(end)
+        conditions = [ds.field(column).isin(list(values)) for column, values in (filters or {}).items()]
+        if start is not None:
+            conditions += [ds.field('date') >= start.strftime('%Y-%m-%d'),
+                           ds.field('timestamp') >= pa.scalar(start.to_pydatetime(), pa.timestamp('s'))]
+        if end is not None:
+            conditions += [ds.field('date') <= end.strftime('%Y-%m-%d'),
+                           ds.field('timestamp') < pa.scalar(end.to_pydatetime(), pa.timestamp('s'))]
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        dates = sorted(os.path.basename(d)[len('date='):] for d in glob.glob(os.path.join(self.path, 'date=*')))
+        for date in dates:
+            # One day at a time keeps the output in time order (fragments aren't ordered across days)
+            day = ds.field('date') == date
+            scanner = self.dataset().scanner(columns=list(columns) if columns else None,
+                                             filter=day if expression is None else day & expression,
+                                             batch_size=chunk_rows)
+            for batch in scanner.to_batches():
+                if batch.num_rows:
+                    yield batch.to_pandas()
+
+    def tail(self, n=None, since=None, columns=None):
+        """The last n records and/or those at or after `since`, opening partitions newest first"""
+        if not self.exists():
+            return pd.DataFrame(columns=columns or TRAFFIC_COLUMNS)
+        if n is None:
+            return self.read(columns=columns, start=since)
+
+        wanted = list(dict.fromkeys(list(columns) + ['timestamp'])) if columns else None
+        frames = []
+        rows = 0
+        dates = sorted((os.path.basename(d)[len('date='):] for d in glob.glob(os.path.join(self.path, 'date=*'))),
+                       reverse=True)
+        for date in dates:
+            if since is not None and date < to_timestamp(since).strftime('%Y-%m-%d'):
+                break
+            day = self.dataset().to_table(columns=wanted, filter=ds.field('date') == date).to_pandas()
+            frames.insert(0, day)
+            rows += len(day)
+            if rows >= n:
+                break
+        df = pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='stable')
+        if since is not None:
+            df = df[df['timestamp'] >= to_timestamp(since)]
+        df = df.tail(n).reset_index(drop=True)
+        return df[list(columns)] if columns else df
+
+    def appended(self, n, columns=None):
+        """
+        The last n records in the order they were appended, whatever their
+        timestamps (late rows land in old partitions): the newest parts by
+        write time, not the newest dates.
+        """
+        if n <= 0 or not self.exists():
+            return pd.DataFrame(columns=columns or TRAFFIC_COLUMNS)
+        parts = sorted(glob.glob(os.path.join(self.path, 'date=*', 'part-*.parquet')), key=append_order)
+        newest = []
+        rows = 0
+        for part in reversed(parts):
+            newest.insert(0, part)
+            rows += pq.ParquetFile(part).metadata.num_rows
+            if rows >= n:
+                break
+        dataset = ds.dataset(newest, format='parquet', schema=self.schema, partitioning=self.partitioning,
+                             partition_base_dir=self.path)
+        return dataset.to_table(columns=columns).to_pandas().tail(n).reset_index(drop=True)
+
+    def compact(self, before=None):
+        """Merge each finished day's parts into one sorted file (all days before `before`)"""
+        before = before or datetime.now().strftime('%Y-%m-%d')
+        with self.lock:
+            # Merged parts lose their append order (appended()): bring the snapshots up to date first
+            for snapshot in (self.latest, self.aggregates):
+                snapshot.save(snapshot.current(self))
+            for directory in sorted(glob.glob(os.path.join(self.path, 'date=*'))):
+                date = os.path.basename(directory)[len('date='):]
+                parts = sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+                if date >= before or len(parts) < 2:
+                    continue
+                table = pq.read_table(parts, schema=pa.schema([f for f in self.schema if f.name != 'date']))
+                table = table.sort_by('timestamp')
+                tmp_path = os.path.join(directory, '_compacted.parquet')
+                pq.write_table(table, tmp_path, compression=PARQUET_COMPRESSION)
+                for part in parts:
+                    os.remove(part)
+                os.replace(tmp_path, os.path.join(directory, f"part-{date}-compacted.parquet"))
+
+    def drop_before(self, cutoff):
+        """Delete the date partitions wholly before cutoff (moved to another tier); returns the rows kept"""
+        cutoff_date = to_timestamp(cutoff).strftime('%Y-%m-%d')
+
+        def drop():
+            for directory in sorted(glob.glob(os.path.join(self.path, 'date=*'))):
+                if os.path.basename(directory)[len('date='):] < cutoff_date:
+                    shutil.rmtree(directory)
+            return self.rebuild_summary()['rows']
+
+        with self.lock:
+            return keep_through_drop(self, [self.latest, self.aggregates], lambda: self.dedup.shrink(self, drop))
+
+    def rebuild_summary(self):
+        self.manifest.reset()
+        return self.summary()
+
+
+class SqliteTrafficStore:
+    """
+    One SQLite table in WAL mode, so gunicorn workers can read while the
+    collector writes. Indexed on (route_name, timestamp) and (timestamp):
+    time-range reads and latest-per-route lookups cost O(log n) per route
+    instead of a scan of the whole history. Timestamps are stored as
+    'YYYY-MM-DD HH:MM:SS' text, which sorts chronologically.
+    """
+
+    backend = 'sqlite'
+    COLUMN_TYPES = {
+        'hour': 'INTEGER', 'is_weekend': 'INTEGER', 'is_rush_hour': 'INTEGER',
+        'distance_km': 'REAL', 'duration_minutes': 'REAL', 'duration_in_traffic_minutes': 'REAL',
+        'delay_minutes': 'REAL', 'avg_speed_kmh': 'REAL', 'traffic_multiplier': 'REAL'
+    }
+
+    def __init__(self, filename=SQLITE_FILENAME):
+        self.path = filename
+        self.local = threading.local()
+        self.lock = StoreLock(f"{filename}{LOCK_SUFFIX}")
+        self.manifest = StoreManifest(f"{filename}{MANIFEST_SUFFIX}")
+        self.dedup = DedupIndex(f"{filename}{KEYS_SUFFIX}")
+        self.latest = LatestState(f"{filename}{LATEST_SUFFIX}")
+        self.aggregates = TrafficAggregates(f"{filename}{STATS_SUFFIX}")
+        with self.connection() as connection:
+            columns = ', '.join(f"{c} {self.COLUMN_TYPES.get(c, 'TEXT')}" for c in TRAFFIC_COLUMNS)
+            connection.execute(f"CREATE TABLE IF NOT EXISTS traffic ({columns})")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_traffic_route_time ON traffic (route_name, timestamp)")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_traffic_time ON traffic (timestamp)")
+
+    def connection(self):
+        """One connection per thread (sqlite3 connections can't be shared between threads)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def exists(self):
+        return self.connection().execute("SELECT 1 FROM traffic LIMIT 1").fetchone() is not None
+
+    def append(self, data_records):
+        """Insert records (dicts or a DataFrame) in one transaction; returns the number written"""
+        if data_records is None or len(data_records) == 0:
+            return 0
+        df = data_records if isinstance(data_records, pd.DataFrame) else pd.DataFrame(data_records)
+        df = normalize_records(df)
+        placeholders = ', '.join('?' for _ in TRAFFIC_COLUMNS)
+        # SQLite serializes the insert itself; the lock keeps the manifest update in step with it
+        with self.lock:
+            df = self.dedup.admit(df, self)
+            if len(df) == 0:
+                return 0
+            base = self.summary()
+            with self.connection() as connection:
+                connection.executemany(
+                    f"INSERT INTO traffic ({', '.join(TRAFFIC_COLUMNS)}) VALUES ({placeholders})",
+                    df.itertuples(index=False, name=None)
+                )
+            state = self.manifest.record(df, base=base)
+            self.dedup.committed(df)
+            self.latest.record(df, state['rows'])
+            self.aggregates.record(df, state['rows'])
+        return len(df)
+
+    def summary(self):
+        """Manifest for the database (rebuilt with one indexed GROUP BY if missing)"""
+        state = self.manifest.load()
+        if state is not None:
+            return state
+        with self.lock:
+            state = self.manifest.load()
+            if state is not None:
+                return state
+            state = StoreManifest.empty()
+            rows = self.connection().execute(
+                "SELECT route_name, COUNT(*), MIN(timestamp), MAX(timestamp) FROM traffic GROUP BY route_name"
+            ).fetchall()
+            for route_name, count, min_ts, max_ts in rows:
+                state['route_counts'][route_name] = count
+                state['rows'] += count
+                state['min_timestamp'] = min(filter(None, [state['min_timestamp'], min_ts]))
+                state['max_timestamp'] = max(filter(None, [state['max_timestamp'], max_ts]))
+            self.manifest.save(state)
+            return state
+
+    def drop_before(self, cutoff):
+        """Delete the records before cutoff (moved to another tier); returns the rows kept"""
+        cutoff_text = to_timestamp(cutoff).strftime('%Y-%m-%d %H:%M:%S')
+
+        def drop():
+            with self.connection() as connection:
+                connection.execute("DELETE FROM traffic WHERE timestamp < ?", (cutoff_text,))
+            return self.rebuild_summary()['rows']
+
+        with self.lock:
+            return keep_through_drop(self, [self.latest, self.aggregates], lambda: self.dedup.shrink(self, drop))
+
+    def rebuild_summary(self):
+        self.manifest.reset()
+        return self.summary()
+
+    def select_columns(self, columns):
+        columns = list(columns) if columns else TRAFFIC_COLUMNS
+        unknown = set(columns) - set(TRAFFIC_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown traffic columns: {sorted(unknown)}")
+        return columns
+
+    def read(self, columns=None, start=None, end=None, typed=False):
+        """Load records, optionally only some columns and timestamps in [start, end) (index range scan)"""
+        columns = self.select_columns(columns)
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(to_timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(to_timestamp(end).strftime('%Y-%m-%d %H:%M:%S'))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT {', '.join(columns)} FROM traffic{where} ORDER BY timestamp"
+        df = pd.read_sql_query(query, self.connection(), params=params)
+        return apply_schema(df) if typed else df
+
+    def iter_chunks(self, columns=None, start=None, end=None, filters=None, chunk_rows=CSV_READ_CHUNK_ROWS):
+        """Records in [start, end) matching filters, in timestamp order, fetched chunk_rows at a time"""
+        if not self.exists():
+            return
+        columns = self.select_columns(columns)
+        conditions, params = [], []
+        for column, values in (filters or {}).items():
+            self.select_columns([column])
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(to_timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(to_timestamp(end).strftime('%Y-%m-%d %H:%M:%S'))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT {', '.join(columns)} FROM traffic{where} ORDER BY timestamp"
+        yield from pd.read_sql_query(query, self.connection(), params=params, chunksize=chunk_rows)
+
+    def tail(self, n=None, since=None, columns=None):
+        """The last n records and/or those at or after `since` (backwards index scan)"""
+        columns = self.select_columns(columns)
+        where, params = "", []
+        if since is not None:
+            where = " WHERE timestamp >= ?"
+            params.append(to_timestamp(since).strftime('%Y-%m-%d %H:%M:%S'))
+        limit = f" LIMIT {int(n)}" if n is not None else ""
+        query = f"SELECT {', '.join(columns)} FROM traffic{where} ORDER BY timestamp DESC{limit}"
+        df = pd.read_sql_query(query, self.connection(), params=params)
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def appended(self, n, columns=None):
+        """The last n records in the order they were inserted (rowid order), whatever their timestamps"""
+        columns = self.select_columns(columns)
+        query = f"SELECT {', '.join(columns)} FROM traffic ORDER BY rowid DESC LIMIT {int(n)}"
+        df = pd.read_sql_query(query, self.connection())
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def latest_per_route(self, columns=None, start=None, route_names=None):
+        """Most recent record of every route (optionally only if newer than start), one index seek per route"""
+        columns = self.select_columns(columns)
+        connection = self.connection()
+        if route_names is None:
+            route_names = [row[0] for row in connection.execute("SELECT DISTINCT route_name FROM traffic")]
+        route_names = list(dict.fromkeys(route_names))
+
+        since = to_timestamp(start).strftime('%Y-%m-%d %H:%M:%S') if start is not None else ''
+        query = (f"SELECT {', '.join(columns)} FROM traffic "
+                 f"WHERE route_name = ? AND timestamp >= ? ORDER BY timestamp DESC LIMIT 1")
+        rows = []
+        for route_name in route_names:
+            row = connection.execute(query, (route_name, since)).fetchone()
+            if row is not None:
+                rows.append(row)
+        df = pd.DataFrame(rows, columns=columns)
+        return df.sort_values('timestamp', ascending=False) if 'timestamp' in df.columns else df
+
+
+def latest_per_route(store, columns=None, start=None, route_names=None):
+    """Latest record per route from any backend (indexed on sqlite, a filtered read elsewhere)"""
+    if hasattr(store, 'latest_per_route'):
+        return store.latest_per_route(columns=columns, start=start, route_names=route_names)
+
+    wanted = list(dict.fromkeys(list(columns or TRAFFIC_COLUMNS) + ['timestamp', 'route_name']))
+    df = None
+    if route_names is not None:
+        # Every route is normally sampled within the last couple of hours: try just the tail first
+        since = datetime.now() - timedelta(minutes=LATEST_WINDOW_MINUTES)
+        if start is not None:
+            since = max(since, to_timestamp(start).to_pydatetime())
+        recent = store.tail(since=since, columns=wanted)
+        if set(route_names) <= set(recent['route_name'].dropna()):
+            df = recent
+    if df is None:
+        df = store.read(columns=wanted, start=start)
+    df = df.dropna(subset=['route_name'])
+    if route_names is not None:
+        df = df[df['route_name'].isin(route_names)]
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values(by='timestamp', ascending=False).drop_duplicates(subset=['route_name'], keep='first')
+    return df[list(columns)] if columns else df
+
+
+def open_store(backend='csv', path=None):
+    """Storage backend by name (STORAGE_BACKENDS); path defaults to that backend's usual location"""
+    if backend == 'csv':
+        return CsvTrafficStore(path or CSV_FILENAME)
+    if backend == 'parquet':
+        return ParquetTrafficStore(path or PARQUET_DIR)
+    if backend == 'sqlite':
+        return SqliteTrafficStore(path or SQLITE_FILENAME)
+    raise ValueError(f"Unknown storage backend {backend!r} (expected one of {STORAGE_BACKENDS})")
+
+
+def store_for_path(path):
+    """Open the store at path: a parquet directory, a SQLite .db file or a CSV file"""
+    if os.path.isdir(path):
+        return open_store('parquet', path)
+    if path.endswith('.db'):
+        return open_store('sqlite', path)
+    return open_store('csv', path)
+
+
+def read_traffic(path=CSV_FILENAME, columns=None, start=None, end=None, typed=True):
+    """
+    Load traffic records from a CSV file, a parquet store directory or a
+    SQLite database, by default in the compact schema: categoricals for
+    the repeated strings, int8 hours/flags, float32 measures and a parsed
+    timestamp.
+    """
+    return store_for_path(path).read(columns=columns, start=start, end=end, typed=typed)
+
+
+def read_tail(path=CSV_FILENAME, n=None, since=None, columns=None):
+    """The most recent records of the store at path without loading the rest"""
+    return store_for_path(path).tail(n=n, since=since, columns=columns)